@@ -1,108 +1,359 @@
+"""
+Сравнение genschema с genson: скорость, память и расхождения схем.
+
+Нагрузки — каждый файл ``tests/datasets`` (один документ) и синтетические потоки
+записей нескольких размеров (генерируются детерминированно из ``--seed``). Для каждой
+нагрузки и библиотеки измеряются время генерации (лучший и медианный из ``--repeat``
+прогонов), пропускная способность и пик памяти (отдельным прогоном под ``tracemalloc``),
+а выходные схемы сравниваются структурно: пути, типы, ``required`` и ``format``.
+Отдельно замеряются микробенчмарки горячих функций (без сравнения с genson).
+
+Результаты сохраняются в JSON (``--out``); с ``--baseline`` печатается ускорение
+относительно ранее сохранённых результатов::
+
+    python benchmark.py --sizes 100,1000,10000 --out bench.json
+    python benchmark.py --baseline bench.json
+
+genson необязателен: без него измеряется только genschema.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import sys
 import time
-from statistics import mean
+import timeit
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from typing import Any
 
-# ===== genschema (твоя библиотека) =====
-from genschema.pipeline import Converter
+from genschema import __version__
 from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
     FormatComparator,
     RequiredComparator,
-    EmptyComparator,
-    DeleteElement,
 )
+from genschema.comparators.type import infer_json_type, infer_json_types
+from genschema.pipeline import Pipeline
 
-# ===== genson =====
-from genson import SchemaBuilder
+try:
+    import genson
+except ImportError:  # pragma: no cover - зависит от окружения
+    genson = None
 
+# Конвейер собирается один раз и переиспользуется во всех прогонах
+PIPELINE = Pipeline(
+    [
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        DeleteElement(),
+    ]
+)
 
-# ===== входные данные =====
-SCHEMA = {}
+_COMBINATORS = ("anyOf", "oneOf")
+_CHILDREN = ("properties", "patternProperties")
 
-import json
-with open("tests/datasets/all_doctors_data.json", "r") as f:
-    jsn = json.loads(f.read())
 
-JSONS = [
-    jsn
-]
+def run_genschema(documents: list[Any]) -> dict:
+    return PIPELINE.generate(documents)
 
-RUNS = 5000
 
+def run_genson(documents: list[Any]) -> dict:
+    builder = genson.SchemaBuilder()
+    for document in documents:
+        builder.add_object(document)
+    return builder.to_schema()
 
-# ===== genschema прогон =====
-def run_genschema():
-    conv = Converter()
-    conv.add_schema(SCHEMA)
 
-    for j in JSONS:
-        conv.add_json(j)
+# ---------------- нагрузки ----------------
 
-    conv.register(FormatComparator())
-    conv.register(RequiredComparator())
-    #conv.register(FlagMaker())
-    conv.register(EmptyComparator())
-    conv.register(DeleteElement())
 
-    return conv.run()
+def _record(rng: random.Random, i: int) -> dict:
+    return {
+        "id": i,
+        "email": f"user{rng.randint(1, 10**6)}@example.com",
+        "created": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00Z",
+        "score": round(rng.random() * 100, 2),
+        "active": rng.random() < 0.5,
+        "tags": rng.sample(["a", "b", "c", "d"], rng.randint(0, 3)),
+    }
 
 
-# ===== genson прогон =====
-def run_genson():
-    builder = SchemaBuilder()
-    builder.add_schema(SCHEMA)
+def _order(rng: random.Random, i: int) -> dict:
+    order: dict[str, Any] = {
+        "id": str(i),
+        "customer": {"name": f"c{rng.randint(1, 500)}", "phone": None},
+        "lines": [
+            {"sku": f"SKU-{rng.randint(1, 999)}", "qty": rng.randint(1, 5)}
+            for _ in range(rng.randint(0, 4))
+        ],
+        "total": rng.choice([rng.randint(1, 999), rng.random() * 999, None]),
+    }
+    if rng.random() < 0.3:
+        order["coupon"] = rng.choice(["SPRING", 10, {"code": "X", "percent": 5}])
+    if rng.random() < 0.2:
+        order["customer"]["phone"] = f"+1555{rng.randint(10**6, 10**7 - 1)}"
+    return order
 
-    for j in JSONS:
-        builder.add_object(j)
 
-    return builder.to_schema()
+SYNTHETIC: dict[str, Callable[[random.Random, int], dict]] = {
+    "records": _record,  # однородные плоские записи с форматами
+    "orders": _order,  # вложенные записи с необязательными ключами и смешанными типами
+}
 
 
-# ===== бенчмарк =====
-def benchmark(fn, runs):
-    timings = []
+def iter_workloads(
+    dataset_dir: str, sizes: list[int], seed: int
+) -> Iterator[tuple[str, list[Any]]]:
+    for path in sorted(glob.glob(os.path.join(dataset_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            yield f"dataset:{os.path.basename(path)}", [json.load(f)]
+    for kind, make in SYNTHETIC.items():
+        for size in sizes:
+            rng = random.Random(f"{seed}:{kind}")
+            yield f"{kind}:{size}", [make(rng, i) for i in range(size)]
+
+
+# ---------------- структурное сравнение ----------------
+
+
+def _branches(node: Any) -> Iterator[dict]:
+    """Ветви узла без комбинаторов и списков типов: по одной на тип."""
+    if not isinstance(node, dict):
+        return
+    for key in _COMBINATORS:
+        if isinstance(node.get(key), list):
+            rest = {k: v for k, v in node.items() if k != key}
+            for branch in node[key]:
+                yield from _branches({**rest, **branch})
+            return
+    types = node.get("type")
+    if isinstance(types, list):
+        for t in types:
+            yield {**node, "type": t}
+    else:
+        yield node
+
+
+def structure(schema: Any) -> dict[str, dict[str, Any]]:
+    """Путь -> типы, ``required`` и форматы узла (ветви ``anyOf``/``oneOf`` объединены)."""
+    paths: dict[str, dict[str, Any]] = {}
+
+    def visit(node: Any, path: str) -> None:
+        info = paths.setdefault(path, {"types": set(), "required": set(), "formats": set()})
+        for branch in _branches(node):
+            info["types"].add(branch.get("type", "any"))
+            info["required"].update(branch.get("required", ()))
+            if "format" in branch:
+                info["formats"].add(branch["format"])
+            for key in _CHILDREN:
+                for name, child in branch.get(key, {}).items():
+                    visit(child, f"{path}/{key}/{name}")
+            for key in ("items", "additionalProperties"):
+                # пустая схема ({}) равносильна отсутствию ключевого слова
+                if isinstance(branch.get(key), dict) and branch[key]:
+                    visit(branch[key], f"{path}/{key}")
+
+    visit(schema, "")
+    return paths
+
 
-    for _ in range(runs):
+def structural_diff(left: Any, right: Any, limit: int = 20) -> dict[str, Any]:
+    """
+    Расхождения схем по путям: пути только в одной схеме, разные типы, ``required``
+    и ``format``. Каждый список обрезан до ``limit`` записей, полные количества — в ``counts``.
+    """
+    a, b = structure(left), structure(right)
+    diff: dict[str, list[Any]] = {
+        "only_genschema": sorted(a.keys() - b.keys()),
+        "only_genson": sorted(b.keys() - a.keys()),
+        "types": [],
+        "required": [],
+        "format": [],
+    }
+    for path in sorted(a.keys() & b.keys()):
+        for field, key in (("types", "types"), ("required", "required"), ("format", "formats")):
+            if a[path][key] != b[path][key]:
+                diff[field].append(
+                    {
+                        "path": path,
+                        "genschema": sorted(a[path][key]),
+                        "genson": sorted(b[path][key]),
+                    }
+                )
+    counts = {field: len(entries) for field, entries in diff.items()}
+    return {
+        "common_paths": len(a.keys() & b.keys()),
+        "identical": not any(counts.values()),
+        "counts": counts,
+        **{field: entries[:limit] for field, entries in diff.items()},
+    }
+
+
+# ---------------- микробенчмарки ----------------
+
+
+def _type_by_isinstance(v: Any) -> str:
+    """Классификация значения цепочкой isinstance — точка отсчёта для таблицы типов."""
+    if v is None:
+        return "null"
+    if isinstance(v, bool):
+        return "boolean"
+    if isinstance(v, int):
+        return "integer"
+    if isinstance(v, float):
+        return "number"
+    if isinstance(v, str):
+        return "string"
+    if isinstance(v, list):
+        return "array"
+    if isinstance(v, dict):
+        return "object"
+    return "any"
+
+
+def micro_type_dispatch(repeat: int) -> dict:
+    """Определение типов JSON: таблица точных типов и пакетный вызов против isinstance."""
+    values = ["text", {"a": 1}, "x", 12, 3.5, None, True, [1]] * 250
+    number = 10
+
+    def best(fn: Callable[[], Any]) -> float:
+        return min(timeit.repeat(fn, number=number, repeat=repeat))
+
+    return {
+        "values": len(values) * number,
+        "isinstance_seconds": best(lambda: [_type_by_isinstance(v) for v in values]),
+        "table_seconds": best(lambda: [infer_json_type(v) for v in values]),
+        "batch_seconds": best(lambda: infer_json_types(values)),
+    }
+
+
+# ---------------- измерения ----------------
+
+
+def measure(fn: Callable[[list[Any]], dict], documents: list[Any], repeat: int, size: int) -> dict:
+    timings = []
+    for _ in range(repeat):
         start = time.perf_counter()
-        fn()
+        fn(documents)
         timings.append(time.perf_counter() - start)
-
-    return timings
+    # пик памяти — отдельным прогоном: tracemalloc замедляет выполнение в разы
+    tracemalloc.start()
+    try:
+        schema = fn(documents)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    best = min(timings)
+    return {
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "documents_per_second": len(documents) / best if best else None,
+        "mb_per_second": size / best / 2**20 if best else None,
+        "peak_memory_bytes": peak,
+        "schema_bytes": len(json.dumps(schema, ensure_ascii=False)),
+        "schema": schema,
+    }
 
 
-if __name__ == "__main__":
-    print(f"Прогонов: {RUNS}\n")
-
-    t1 = benchmark(run_genschema, RUNS)
-    t2 = benchmark(run_genson, RUNS)
-
-    avg_genschema = mean(t1)
-    avg_genson = mean(t2)
-
-    print("=== РЕЗУЛЬТАТЫ ===")
-    print(f"genschema : {avg_genschema:.6f} сек (avg)")
-    print(f"genson      : {avg_genson:.6f} сек (avg)")
-
-    if avg_genson > 0:
-        print(f"\ngenschema / genson = {avg_genschema / avg_genson:.2f}x")
-    
-    print("\n")
-    from jsonschema_diff import JsonSchemaDiff, ConfigMaker
-    from jsonschema_diff.color import HighlighterPipeline
-    from jsonschema_diff.color.stages import (
-        MonoLinesHighlighter, PathHighlighter, ReplaceGenericHighlighter,
+def run(args: argparse.Namespace) -> dict:
+    results = []
+    for name, documents in iter_workloads(args.dataset_dir, args.sizes, args.seed):
+        size = len(json.dumps(documents, ensure_ascii=False).encode("utf-8"))
+        entry: dict[str, Any] = {"workload": name, "documents": len(documents), "bytes": size}
+        ours = measure(run_genschema, documents, args.repeat, size)
+        theirs = measure(run_genson, documents, args.repeat, size) if genson else None
+        schema = ours.pop("schema")
+        entry["genschema"], entry["genson"], entry["diff"] = ours, theirs, None
+        if theirs is not None:
+            entry["diff"] = structural_diff(schema, theirs.pop("schema"), args.max_diff)
+        results.append(entry)
+        print(_summary_line(entry), flush=True)
+    micro = {"infer_json_type": micro_type_dispatch(args.repeat)}
+    dispatch = micro["infer_json_type"]
+    print(
+        f"{'micro:infer_json_type':<32} isinstance {dispatch['isinstance_seconds'] * 1000:.2f} ms"
+        f" | table {dispatch['table_seconds'] * 1000:.2f} ms"
+        f" | batch {dispatch['batch_seconds'] * 1000:.2f} ms",
+        flush=True,
     )
-    prop = JsonSchemaDiff(
-        config=ConfigMaker.make(),
-        colorize_pipeline=HighlighterPipeline([
-            MonoLinesHighlighter(),
-            ReplaceGenericHighlighter(),
-            PathHighlighter(),
-        ])
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "genschema": __version__,
+            "genson": getattr(genson, "__version__", "installed") if genson else None,
+            "repeat": args.repeat,
+            "sizes": args.sizes,
+            "seed": args.seed,
+        },
+        "results": results,
+        "micro": micro,
+    }
+
+
+def _summary_line(entry: dict) -> str:
+    ours, theirs, diff = entry["genschema"], entry["genson"], entry["diff"]
+    line = f"{entry['workload']:<32} genschema {ours['best_seconds'] * 1000:9.2f} ms"
+    line += f" {ours['peak_memory_bytes'] / 2**20:7.2f} MiB"
+    if theirs:
+        line += f" | genson {theirs['best_seconds'] * 1000:9.2f} ms"
+        line += f" {theirs['peak_memory_bytes'] / 2**20:7.2f} MiB"
+        line += f" | x{ours['best_seconds'] / theirs['best_seconds']:.2f}"
+        line += " | same structure" if diff["identical"] else f" | diff {diff['counts']}"
+    return line
+
+
+def compare_baseline(current: dict, baseline: dict) -> None:
+    """Ускорение genschema по каждой нагрузке, общей с сохранёнными результатами."""
+    previous = {e["workload"]: e for e in baseline.get("results", [])}
+    print(f"\nvs baseline {baseline.get('meta', {}).get('created', '?')}:")
+    for entry in current["results"]:
+        old = previous.get(entry["workload"])
+        if old is None:
+            continue
+        speedup = old["genschema"]["best_seconds"] / entry["genschema"]["best_seconds"]
+        memory = entry["genschema"]["peak_memory_bytes"] / old["genschema"]["peak_memory_bytes"]
+        print(f"  {entry['workload']:<32} speed x{speedup:.2f}  memory x{memory:.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark genschema against genson")
+    parser.add_argument("--dataset-dir", default="tests/datasets")
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[100, 1000, 10000],
+        help="document counts of synthetic workloads, comma-separated",
     )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-diff", type=int, default=20, help="entries kept per diff list")
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="earlier results to compare genschema against")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be a positive integer")
 
-    #prop.compare( # Function accepts both file path and schema dict itself // can be combined
-    #    old_schema=run_genschema(),
-    #    new_schema=run_genson()
-    #)
+    if genson is None:
+        print("genson is not installed: measuring genschema only", file=sys.stderr)
+    results = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare_baseline(results, json.load(f))
+    return 0
 
-    # Теперь можно вывести
-    #prop.print(with_legend=False)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,52 @@
-from .pipeline import Converter
-from .pseudo_arrays import PseudoArrayHandler, PseudoArrayHandlerBase
-
-__all__ = ["Converter", "PseudoArrayHandler", "PseudoArrayHandlerBase"]
 __version__ = "0.1.1"
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+from .pipeline import Converter, Pipeline, Truncation
+from .pseudo_arrays import DynamicKeyHandler, PseudoArrayHandler, PseudoArrayHandlerBase
+from .tuples import TupleHandler, TupleHandlerBase
+from .writer import SchemaWriter
+
+if TYPE_CHECKING:
+    from .cache import SchemaCache
+    from .drift import Drift, DriftDetector
+    from .events import EventProfiler
+
+# Имена необязательных режимов (кэш, дрейф, события разбора): модуль импортируется
+# при первом обращении к имени, а не при import genschema
+_LAZY = {
+    "SchemaCache": "cache",
+    "Drift": "drift",
+    "DriftDetector": "drift",
+    "EventProfiler": "events",
+}
+
+__all__ = [
+    "Converter",
+    "Drift",
+    "DriftDetector",
+    "DynamicKeyHandler",
+    "EventProfiler",
+    "Pipeline",
+    "PseudoArrayHandler",
+    "PseudoArrayHandlerBase",
+    "SchemaCache",
+    "SchemaWriter",
+    "Truncation",
+    "TupleHandler",
+    "TupleHandlerBase",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY})
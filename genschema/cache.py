@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_CHUNK = 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """``$XDG_CACHE_HOME/genschema`` или ``~/.cache/genschema``."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "genschema"
+
+
+def file_digest(path: str | os.PathLike[str]) -> str:
+    """SHA-256 содержимого файла (читается блоками, без загрузки целиком)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_digest(value: Any) -> str:
+    """SHA-256 канонического JSON-представления значения."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SchemaCache:
+    """
+    Контентно-адресуемый кэш сгенерированных схем на диске.
+
+    Ключ строится из хэша входных данных и отпечатка конфигурации
+    :class:`~genschema.pipeline.Converter` (см. :meth:`key`).
+    Каждая запись — отдельный JSON-файл; при превышении ``max_bytes``
+    удаляются записи, к которым дольше всего не обращались (LRU по mtime).
+    Запись атомарна, поэтому каталог можно разделять между процессами,
+    а учёт размера защищён блокировкой — экземпляр можно разделять между потоками.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str | os.PathLike[str]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                schema: dict = json.load(f)
+            os.utime(path)  # отметка последнего обращения для LRU
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return schema
+
+    def put(self, key: str, schema: dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(schema, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def evict(self) -> None:
+        """Удаляет самые старые записи, пока размер кэша не станет меньше ``max_bytes``."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._size = 0
+
+    def _entries(self) -> list[tuple[Path, int, float]]:
+        entries: list[tuple[Path, int, float]] = []
+        if not self.directory.is_dir():
+            return entries
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
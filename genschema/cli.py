@@ -1,23 +1,174 @@
 import argparse
+import fnmatch
+import glob
+import gzip
+import itertools
 import json
+import math
+import os
 import sys
 import time
+from typing import Any, Optional, TextIO
 
-from rich.console import Console
-
-from . import Converter, PseudoArrayHandler
+from . import (
+    Converter,
+    DynamicKeyHandler,
+    Pipeline,
+    PseudoArrayHandler,
+    TupleHandler,
+)
 from .comparators import (
     DeleteElement,
     EmptyComparator,
     FormatComparator,
+    NumericRangeComparator,
     RequiredComparator,
     SchemaVersionComparator,
+    StatisticsComparator,
+    StringLengthComparator,
 )
+from .comparators.template import Comparator
+from .writer import SchemaWriter, open_output
 
-console = Console()
+# Файлы, выбираемые при обходе каталогов по умолчанию
+DEFAULT_INCLUDE = [
+    f"*{ext}{compression}"
+    for ext in (".json", ".jsonl", ".ndjson")
+    for compression in ("", ".gz", ".bz2", ".xz", ".zst")
+]
 
+# Консоли rich создаются при первом обращении: импорт rich заметно удлиняет запуск,
+# а в режиме --quiet и при выводе JSON в конвейер он не нужен вовсе.
+_consoles: dict[bool, Any] = {}
 
-def main() -> None:
+
+def _console(stderr: bool = True) -> Any:
+    console = _consoles.get(stderr)
+    if console is None:
+        from rich.console import Console
+
+        console = _consoles[stderr] = Console(stderr=stderr)
+    return console
+
+
+def _say(message: str, style: Optional[str] = None, quiet: bool = False) -> None:
+    """
+    Сообщение пользователю в stderr, чтобы не смешиваться со схемой в stdout.
+
+    В тихом режиме rich не используется: выводятся только ошибки и предупреждения
+    (``style`` ``red``/``yellow``), обычным текстом.
+    """
+    if quiet:
+        if style in ("red", "yellow"):
+            sys.stderr.write(message + "\n")
+        return
+    _console().print(f"[{style}]{message}[/{style}]" if style else message)
+
+
+def _write_schema(
+    conv: Converter, result: Optional[dict], stream: TextIO, indent: Optional[int]
+) -> None:
+    """Готовая схема записывается целиком, иначе — потоково по ходу генерации."""
+    if result is None:
+        conv.write(stream, indent)
+        return
+    writer = SchemaWriter(stream, indent)
+    writer.value(result)
+    writer.flush()
+
+
+def _add_pipeline_arguments(parser: argparse.ArgumentParser) -> None:
+    """Параметры конвейера: общие для генерации из файлов и для ``serve``."""
+    parser.add_argument(
+        "--base-of",
+        choices=["anyOf", "oneOf"],
+        default="anyOf",
+        help="Combinator for differing types (default: anyOf).",
+    )
+    parser.add_argument(
+        "--max-variants",
+        type=int,
+        default=None,
+        help="Maximum number of alternatives per node; "
+        "the rarest ones are collapsed into a single generic variant.",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        help="Do not descend below this nesting depth; deeper objects and arrays are "
+        "summarized by the types of their values.",
+    )
+    parser.add_argument(
+        "--max-properties",
+        type=int,
+        default=None,
+        help="Objects with more distinct keys are described by a single merged "
+        "additionalProperties schema.",
+    )
+    parser.add_argument(
+        "--max-schema-nodes",
+        type=int,
+        default=None,
+        help="Total node budget; once exhausted, remaining objects and arrays are summarized.",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Process scalar leaves as typed columnar batches (uses NumPy if installed).",
+    )
+    parser.add_argument(
+        "--canonical",
+        action="store_true",
+        help="Canonical ordering: the same inputs in any order produce byte-identical output.",
+    )
+    parser.add_argument(
+        "--numeric-range", action="store_true", help="Add minimum/maximum to numeric fields."
+    )
+    parser.add_argument(
+        "--string-length", action="store_true", help="Add minLength/maxLength to string fields."
+    )
+    parser.add_argument(
+        "--statistics",
+        action="store_true",
+        help="Add value statistics in one pass per leaf: minimum/maximum, minLength/maxLength, "
+        "multipleOf for integers and enum for low-cardinality fields.",
+    )
+    parser.add_argument(
+        "--max-enum",
+        type=int,
+        default=8,
+        help="Largest number of distinct values emitted as enum with --statistics (default: 8).",
+    )
+    parser.add_argument(
+        "--no-pseudo-array", action="store_true", help="Disable pseudo-array handling."
+    )
+    parser.add_argument(
+        "--dynamic-keys",
+        action="store_true",
+        help="Also collapse objects keyed by UUIDs, dates, hashes, SKUs and other dynamic "
+        "keys into a single patternProperties schema.",
+    )
+    parser.add_argument(
+        "--tuples",
+        action="store_true",
+        help="Describe fixed-length arrays with a consistent type per position "
+        "as tuples (prefixItems) instead of a single items schema.",
+    )
+    parser.add_argument("--no-format", action="store_true", help="Disable FormatComparator.")
+    parser.add_argument("--no-required", action="store_true", help="Disable RequiredComparator.")
+    parser.add_argument("--no-empty", action="store_true", help="Disable EmptyComparator.")
+    parser.add_argument(
+        "--no-schema-version",
+        action="store_true",
+        help="Disable SchemaVersionComparator.",
+    )
+    parser.add_argument(
+        "--no-delete-element", action="store_true", help="Disable DeleteElement comparators."
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Generate JSON Schema from JSON input using genschema.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -28,127 +179,400 @@ Examples:
   cat input.json | genschema -
   genschema --base-of anyOf < input.json
   genschema dir/file1.json dir/file2.json -o schema.json
+  genschema captures/ "logs/**/*.json" --jobs 8 -o schema.json
+  genschema serve --port 8750          (see genschema serve --help)
         """,
     )
     parser.add_argument(
         "inputs",
         nargs="*",
-        help="Paths to input JSON files. Use '-' for stdin. "
+        help="Paths to input JSON files, directories (traversed recursively) or glob "
+        "patterns ('**' matches nested directories). Use '-' for stdin. "
         "If no arguments are provided, show this help message.",
     )
+    parser.add_argument(
+        "--include",
+        action="append",
+        help="File name pattern used when traversing directories; may be repeated "
+        "(default: JSON and JSON Lines files, plain or compressed with gzip/bz2/xz/zstd).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="Profile the documents of each file in batches of N and merge the partial "
+        "schemas, bounding memory for large JSON Lines archives.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes that parse files and build partial schemas, "
+        "merged into the final schema (default: 1, no pool).",
+    )
     parser.add_argument(
         "-o",
         "--output",
-        help="Path to output JSON Schema file. If not specified, output to stdout.",
+        help="Path to output JSON Schema file. If not specified, output to stdout. "
+        "The schema is written as it is generated; a '.gz' suffix enables gzip.",
     )
     parser.add_argument(
-        "--base-of",
-        choices=["anyOf", "oneOf"],
-        default="anyOf",
-        help="Combinator for differing types (default: anyOf).",
+        "--compact",
+        action="store_true",
+        help="Write the schema without indentation and spaces.",
     )
     parser.add_argument(
-        "--no-pseudo-array", action="store_true", help="Disable pseudo-array handling."
+        "--gzip",
+        action="store_true",
+        help="Compress the output with gzip (implied by a '.gz' output path).",
     )
-    parser.add_argument("--no-format", action="store_true", help="Disable FormatComparator.")
-    parser.add_argument("--no-required", action="store_true", help="Disable RequiredComparator.")
-    parser.add_argument("--no-empty", action="store_true", help="Disable EmptyComparator.")
     parser.add_argument(
-        "--no-schema-version",
+        "-q",
+        "--quiet",
         action="store_true",
-        help="Disable SchemaVersionComparator.",
+        help="Machine mode: print the schema as plain JSON and suppress status messages "
+        "(errors and warnings still go to stderr).",
     )
     parser.add_argument(
-        "--no-delete-element", action="store_true", help="Disable DeleteElement comparators."
+        "--validator-out",
+        help="Also write a generated Python module with a specialized validate(instance) "
+        "function for the resulting schema.",
+    )
+    _add_pipeline_arguments(parser)
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory of the on-disk schema cache. Unchanged input files are not "
+        "re-parsed; only changed files are re-profiled and merged.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=64,
+        help="Maximum cache size in MiB before least recently used entries are evicted "
+        "(default: 64).",
     )
 
-    # If no arguments, show help and exit
-    if len(sys.argv) == 1:
-        parser.print_help(sys.stderr)
-        sys.exit(1)
+    return parser
 
-    args = parser.parse_args()
 
-    # Collect input data
-    datas = []
-    if not args.inputs:
-        # This case shouldn't happen due to the check above, but for safety
-        try:
-            data = json.load(sys.stdin)
-            datas.append(data)
-        except json.JSONDecodeError as e:
-            console.print(f"[red]Error reading JSON from stdin: {e}[/red]")
-            sys.exit(1)
-    else:
-        for input_path in args.inputs:
-            if input_path == "-":
-                try:
-                    data = json.load(sys.stdin)
-                    datas.append(data)
-                except json.JSONDecodeError as e:
-                    console.print(f"[red]Error reading JSON from stdin: {e}[/red]")
-                    sys.exit(1)
-            else:
-                try:
-                    with open(input_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    datas.append(data)
-                except FileNotFoundError:
-                    console.print(f"[red]File not found: {input_path}[/red]")
-                    sys.exit(1)
-                except json.JSONDecodeError as e:
-                    console.print(f"[red]Invalid JSON in file {input_path}: {e}[/red]")
-                    sys.exit(1)
-
-    if not datas:
-        console.print("[red]No valid JSON provided.[/red]")
+def _build_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="genschema serve",
+        description="Keep a warm genschema process behind a local HTTP or Unix socket "
+        "endpoint. POST /schema returns the schema of a JSON (one document) or NDJSON "
+        "(application/x-ndjson, one document per line) body; POST/GET/DELETE "
+        "/sessions/<name> accumulate documents and return their schema.",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)."
+    )
+    parser.add_argument("--port", type=int, default=8750, help="TCP port (default: 8750).")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of a TCP port.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="Size of the worker pool generating schemas (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--max-body",
+        type=int,
+        default=64,
+        help="Largest accepted request body in MiB (default: 64).",
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=1024,
+        help="Most sessions kept at once; the least recently used one is evicted to make "
+        "room for a new one. 0 means no limit (default: 1024).",
+    )
+    parser.add_argument(
+        "--session-ttl",
+        type=float,
+        default=3600,
+        help="Drop sessions not used for this many seconds. 0 keeps them until deleted "
+        "(default: 3600).",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Suppress status messages (errors still go to stderr).",
+    )
+    _add_pipeline_arguments(parser)
+    return parser
+
+
+def serve(argv: list[str]) -> None:
+    """``genschema serve``: конвейер настраивается один раз и обслуживает запросы до Ctrl+C."""
+    parser = _build_serve_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be a positive integer")
+    if args.max_sessions < 0 or args.session_ttl < 0:
+        parser.error("--max-sessions and --session-ttl must not be negative")
+
+    from .server import make_server
+
+    try:
+        server = make_server(
+            _build_pipeline(args),
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            workers=args.workers,
+            max_body=args.max_body * 1024 * 1024,
+            max_sessions=args.max_sessions or None,
+            session_ttl=args.session_ttl or None,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        _say(
+            f"Cannot listen on {args.socket or f'{args.host}:{args.port}'}: {e}", "red", args.quiet
+        )
         sys.exit(1)
 
-    # Converter setup
-    pseudo_handler = None if args.no_pseudo_array else PseudoArrayHandler()
-    conv = Converter(pseudo_handler=pseudo_handler, base_of=args.base_of)
+    _say(f"Serving on {server.url} with {args.workers} workers", "green", args.quiet)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
-    for data in datas:
-        conv.add_json(data)
+
+def _build_pipeline(args: argparse.Namespace) -> Pipeline:
+    pseudo_handler: Optional[PseudoArrayHandler] = None
+    if not args.no_pseudo_array:
+        pseudo_handler = DynamicKeyHandler() if args.dynamic_keys else PseudoArrayHandler()
 
     # Register comparators conditionally
+    comparators: list[Comparator] = []
     if not args.no_format:
-        conv.register(FormatComparator())
+        comparators.append(FormatComparator())
     if not args.no_schema_version:
-        conv.register(SchemaVersionComparator())
+        comparators.append(SchemaVersionComparator())
     if not args.no_required:
-        conv.register(RequiredComparator())
+        comparators.append(RequiredComparator())
     if not args.no_empty:
-        conv.register(EmptyComparator())
+        comparators.append(EmptyComparator())
+    if args.statistics:
+        # включает и границы, и длины: отдельные компараторы не нужны
+        comparators.append(StatisticsComparator(max_enum=args.max_enum))
+    else:
+        if args.numeric_range:
+            comparators.append(NumericRangeComparator())
+        if args.string_length:
+            comparators.append(StringLengthComparator())
     if not args.no_delete_element:
-        conv.register(DeleteElement())
-        conv.register(DeleteElement("isPseudoArray"))
+        comparators.append(DeleteElement())
+        comparators.append(DeleteElement("isPseudoArray"))
+
+    return Pipeline(
+        comparators,
+        pseudo_handler=pseudo_handler,
+        base_of=args.base_of,
+        max_variants=args.max_variants,
+        columnar=args.columnar,
+        max_depth=args.max_depth,
+        max_properties_per_object=args.max_properties,
+        max_schema_nodes=args.max_schema_nodes,
+        canonical=args.canonical,
+        tuple_handler=TupleHandler() if args.tuples else None,
+    )
+
+
+def _build_converter(args: argparse.Namespace, partial: bool = False) -> Converter:
+    pipeline = _build_pipeline(args)
+    if partial:
+        pipeline = pipeline._partial()
+    if not args.cache_dir:
+        return Converter.from_pipeline(pipeline)
+    from . import SchemaCache
+
+    cache = SchemaCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+    return Converter.from_pipeline(pipeline, cache=cache)
+
+
+def _expand_inputs(inputs: list[str], include: str | list[str]) -> list[str]:
+    """
+    Разворачивает каталоги (рекурсивно, по шаблону ``include``) и glob-шаблоны в пути к файлам.
+    ``-`` (stdin) сохраняется как есть. Несуществующий путь или пустой шаблон — ошибка.
+    """
+    patterns = [include] if isinstance(include, str) else include
+    paths: list[str] = []
+    for item in inputs:
+        if item == "-" or os.path.isfile(item):
+            paths.append(item)
+        elif os.path.isdir(item):
+            found: list[str] = []
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                found.extend(
+                    os.path.join(root, f)
+                    for f in files
+                    if any(fnmatch.fnmatch(f, pattern) for pattern in patterns)
+                )
+            paths.extend(sorted(found))
+        elif glob.has_magic(item):
+            matches = sorted(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+            if not matches:
+                raise FileNotFoundError(f"No files match pattern: {item}")
+            paths.extend(matches)
+        else:
+            raise FileNotFoundError(f"File not found: {item}")
+    return paths
+
+
+def _add_file(conv: Converter, path: str, args: argparse.Namespace) -> None:
+    # с --batch-size документы файла не накапливаются: в памяти пачка и схема прочитанного;
+    # при кэше разбор выполнит Converter, если схемы файла ещё нет в кэше
+    conv.add_json(path, args.batch_size)
+
+
+def _profile_files(paths: list[str], args: argparse.Namespace) -> dict:
+    """
+    Частичная схема для пачки файлов; выполняется в рабочем процессе.
+    Псевдомассивы и ``max_variants`` зависят от всех документов узла, поэтому
+    применяются только при слиянии пачек (см. ``Pipeline._partial``): разбиение файлов
+    на пачки не меняет обнаружение псевдомассивов.
+    """
+    conv = _build_converter(args, partial=True)
+    for path in paths:
+        _add_file(conv, path, args)
+    return conv.run()
+
+
+def _chunk(items: list[str], jobs: int) -> list[list[str]]:
+    # по несколько пачек на процесс, чтобы выровнять нагрузку, но не дробить слишком мелко
+    size = max(1, min(1000, math.ceil(len(items) / (jobs * 4))))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["serve"]:
+        # файл с именем serve передаётся как ./serve
+        serve(sys.argv[2:])
+        return
+
+    parser = _build_parser()
+
+    # If no arguments, show help and exit
+    if len(sys.argv) == 1:
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be a positive integer")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be a positive integer")
+
+    try:
+        inputs = _expand_inputs(args.inputs or ["-"], args.include or DEFAULT_INCLUDE)
+    except FileNotFoundError as e:
+        _say(str(e), "red", args.quiet)
+        sys.exit(1)
+
+    files = [p for p in inputs if p != "-"]
+    if not inputs:
+        _say("No valid JSON provided.", "red", args.quiet)
+        sys.exit(1)
+
+    # Collect stdin data
+    stdin_datas = []
+    if len(files) < len(inputs):
+        try:
+            stdin_datas.append(json.load(sys.stdin))
+        except json.JSONDecodeError as e:
+            _say(f"Error reading JSON from stdin: {e}", "red", args.quiet)
+            sys.exit(1)
+
+    try:
+        conv = _build_converter(args)
+    except ValueError as e:
+        parser.error(str(e))
+    instances = len(files) + len(stdin_datas)
 
-    # Generate schema
     start_time = time.time()
     try:
-        result = conv.run()
-    except Exception as e:
-        console.print(f"[red]Error generating schema: {e}[/red]")
+        if args.jobs > 1 and len(files) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Разбор и частичный вывод схем в пуле процессов, слияние — здесь
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                for partial in pool.map(
+                    _profile_files, _chunk(files, args.jobs), itertools.repeat(args)
+                ):
+                    conv.add_schema(partial)
+        else:
+            for path in files:
+                _add_file(conv, path, args)
+    except (OSError, ValueError) as e:
+        _say(str(e), "red", args.quiet)
         sys.exit(1)
-    elapsed = round(time.time() - start_time, 4)
 
-    # Output result
-    if args.output:
+    for data in stdin_datas:
+        conv.add_json(data)
+
+    indent = None if args.compact else 2
+    to_terminal = not args.output and not args.quiet and sys.stdout.isatty()
+    # Схема целиком нужна только для валидатора и подсветки в терминале,
+    # иначе узлы записываются в вывод по мере построения
+    result: Optional[dict] = None
+    if args.validator_out or to_terminal:
         try:
-            with open(args.output, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            console.print(f"[green]Schema successfully written to {args.output}[/green]")
+            result = conv.run()
         except Exception as e:
-            console.print(f"[red]Error writing file {args.output}: {e}[/red]")
+            _say(f"Error generating schema: {e}", "red", args.quiet)
             sys.exit(1)
+
+    # Output result
+    if to_terminal:
+        # подсветка rich только для человека в терминале: на больших схемах она медленная
+        _console(stderr=False).print(result)
     else:
-        console.print(result)
+        try:
+            if args.output:
+                with open_output(args.output, args.gzip or None) as f:
+                    _write_schema(conv, result, f, indent)
+            elif args.gzip:
+                with gzip.open(sys.stdout.buffer, "wt", encoding="utf-8") as f:
+                    _write_schema(conv, result, f, indent)
+            else:
+                _write_schema(conv, result, sys.stdout, indent)
+                sys.stdout.write("\n")
+        except OSError as e:
+            _say(f"Error writing file {args.output or 'stdout'}: {e}", "red", args.quiet)
+            sys.exit(1)
+        except Exception as e:
+            _say(f"Error generating schema: {e}", "red", args.quiet)
+            sys.exit(1)
+        if args.output:
+            _say(f"Schema successfully written to {args.output}", "green", args.quiet)
+    elapsed = round(time.time() - start_time, 4)
+
+    if args.validator_out:
+        from .validator import UnsupportedSchemaError, generate_validator_source
+
+        try:
+            source = generate_validator_source(result)
+            with open(args.validator_out, "w", encoding="utf-8") as f:
+                f.write(source)
+            _say(f"Validator successfully written to {args.validator_out}", "green", args.quiet)
+        except (OSError, UnsupportedSchemaError) as e:
+            _say(f"Error writing validator {args.validator_out}: {e}", "red", args.quiet)
+            sys.exit(1)
+
+    for t in conv.truncations:
+        _say(f"Truncated at {t.path}: {t.reason}={t.limit}", "yellow", args.quiet)
 
     # Execution info
-    instances_word = "instance" if len(datas) == 1 else "instances"
-    console.print(f"Generated from {len(datas)} JSON {instances_word}.")
-    console.print(f"Elapsed time: {elapsed} sec.")
+    instances_word = "instance" if instances == 1 else "instances"
+    _say(f"Generated from {instances} JSON {instances_word}.", quiet=args.quiet)
+    _say(f"Elapsed time: {elapsed} sec.", quiet=args.quiet)
 
 
 if __name__ == "__main__":
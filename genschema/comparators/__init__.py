@@ -1,3 +1,4 @@
+from .bounds import NumericRangeComparator, StatisticsComparator, StringLengthComparator
 from .delete_element import DeleteElement
 from .empty import EmptyComparator
 from .flag import FlagMaker
@@ -16,4 +17,7 @@ __all__ = [
     "NoAdditionalProperties",
     "DeleteElement",
     "SchemaVersionComparator",
+    "NumericRangeComparator",
+    "StringLengthComparator",
+    "StatisticsComparator",
 ]
@@ -0,0 +1,203 @@
+import math
+from typing import Any, Optional
+
+from .columnar import ScalarBatch
+from .template import Comparator, ComparatorResult, ProcessingContext
+
+
+def _schema_bounds(
+    ctx: ProcessingContext, types: tuple[str, ...], low: str, high: str
+) -> Optional[tuple[Any, Any]]:
+    """
+    Границы из входных схем нужного типа.
+    Если хотя бы одна схема не ограничивает значение — граница не выводится (``None``).
+    """
+    lows: list[Any] = []
+    highs: list[Any] = []
+    for s in ctx.schemas:
+        c = s.content
+        if not isinstance(c, dict) or c.get("type") not in types:
+            continue
+        lows.append(c.get(low))
+        highs.append(c.get(high))
+    if not lows:
+        return None
+    return (
+        None if None in lows else min(lows),
+        None if None in highs else max(highs),
+    )
+
+
+def _merge_bounds(
+    data: Optional[tuple[Any, Any]], schemas: Optional[tuple[Any, Any]], low: str, high: str
+) -> Optional[dict[str, Any]]:
+    if data is None and schemas is None:
+        return None
+    if schemas is None:
+        lo, hi = data  # type: ignore[misc]
+    elif data is None:
+        lo, hi = schemas
+    else:
+        lo = None if schemas[0] is None else min(data[0], schemas[0])
+        hi = None if schemas[1] is None else max(data[1], schemas[1])
+
+    result = {}
+    if lo is not None:
+        result[low] = lo
+    if hi is not None:
+        result[high] = hi
+    return result or None
+
+
+def _schema_enum(ctx: ProcessingContext, types: tuple[str, ...]) -> Optional[list[Any]]:
+    """Объединение ``enum`` входных схем; ``None``, если хотя бы одна схема его не задаёт."""
+    values: list[Any] = []
+    for s in ctx.schemas:
+        c = s.content
+        if not isinstance(c, dict) or c.get("type") not in types:
+            continue
+        if not isinstance(c.get("enum"), list):
+            return None
+        values.extend(c["enum"])
+    return values
+
+
+def _schema_divisor(ctx: ProcessingContext) -> Optional[int]:
+    """НОД ``multipleOf`` целочисленных входных схем; 0 — схем нет, ``None`` — не задан."""
+    divisor = 0
+    for s in ctx.schemas:
+        c = s.content
+        if not isinstance(c, dict) or c.get("type") != "integer":
+            continue
+        m = c.get("multipleOf")
+        if m is None and c.get("minimum") == c.get("maximum") == 0:
+            continue  # единственное значение 0 кратно любому делителю, как и в данных
+        if not isinstance(m, int) or isinstance(m, bool):
+            return None
+        divisor = math.gcd(divisor, m)
+    return divisor
+
+
+class StatisticsComparator(Comparator):
+    """
+    Статистики скалярных листьев за один проход по значениям узла.
+
+    Значения берутся из сводки узла (колонки по типам, см. :attr:`ProcessingContext.summary`),
+    после чего все агрегаты считаются по готовым колонкам:
+
+    - ``minimum``/``maximum`` для ``integer`` и ``number``;
+    - ``minLength``/``maxLength`` для ``string``;
+    - ``multipleOf`` — НОД целых значений, если он больше 1 и различных ненулевых значений
+      не меньше ``min_multiple_of_values``: у единственного значения 42 кратность 42 —
+      совпадение, а не свойство поля;
+    - ``enum`` для полей с малым числом различных значений: не более ``max_enum``,
+      и каждое в среднем встречается не реже ``min_enum_repeats`` раз.
+      Различные значения отслеживаются только до ``max_enum``, после чего подсчёт прекращается.
+
+    Каждое ключевое слово включается своим флагом. Ограничения из входных схем сохраняются:
+    граница, ``enum`` или ``multipleOf`` выводятся, только если их задают все схемы узла.
+    """
+
+    name = "statistics"
+
+    def __init__(
+        self,
+        numeric_range: bool = True,
+        string_length: bool = True,
+        multiple_of: bool = True,
+        enum: bool = True,
+        max_enum: int = 8,
+        min_enum_repeats: float = 2.0,
+        min_multiple_of_values: int = 3,
+    ):
+        self.numeric_range = numeric_range
+        self.string_length = string_length
+        self.multiple_of = multiple_of
+        self.enum = enum
+        self.max_enum = max_enum
+        self.min_enum_repeats = min_enum_repeats
+        self.min_multiple_of_values = min_multiple_of_values
+
+    def can_process(self, ctx: ProcessingContext, env: str, node: dict) -> bool:
+        t = node.get("type")
+        if t in ("integer", "number"):
+            return self.numeric_range or self.enum or (self.multiple_of and t == "integer")
+        return t == "string" and (self.string_length or self.enum)
+
+    def process(self, ctx: ProcessingContext, env: str, node: dict) -> ComparatorResult:
+        t = node["type"]
+        types: tuple[str, ...] = ("string",) if t == "string" else ("integer", "number")
+        batch = ctx.summary if ctx.summary.is_leaf else None
+        result: dict[str, Any] = {}
+
+        if self.numeric_range and t != "string":
+            data = batch.numeric_range() if batch else None
+            schemas = _schema_bounds(ctx, types, "minimum", "maximum")
+            result.update(_merge_bounds(data, schemas, "minimum", "maximum") or {})
+        if self.string_length and t == "string":
+            data = batch.string_length_range() if batch else None
+            schemas = _schema_bounds(ctx, types, "minLength", "maxLength")
+            result.update(_merge_bounds(data, schemas, "minLength", "maxLength") or {})
+        if self.multiple_of and t == "integer":
+            divisor = _schema_divisor(ctx)
+            # делитель из входных схем уже прошёл этот порог — данные его только уточняют
+            if divisor is not None and (divisor or self._has_divisor_values(batch)):
+                divisor = math.gcd(divisor, batch.divisor() if batch else 0)
+                if divisor > 1:
+                    result["multipleOf"] = divisor
+        if self.enum:
+            values = self._enum(ctx, batch, types)
+            if values is not None:
+                result["enum"] = values
+
+        return result or None, None
+
+    def _has_divisor_values(self, batch: Optional[ScalarBatch]) -> bool:
+        """Достаточно ли различных ненулевых целых значений, чтобы вывести ``multipleOf``."""
+        if batch is None:
+            return False
+        seen = batch.distinct(("integer",), self.min_multiple_of_values)
+        return seen is None or len(seen - {0}) >= self.min_multiple_of_values
+
+    def _enum(
+        self, ctx: ProcessingContext, batch: Optional[ScalarBatch], types: tuple[str, ...]
+    ) -> Optional[list[Any]]:
+        schema_values = _schema_enum(ctx, types)
+        if schema_values is None:
+            return None
+        try:
+            values = set(schema_values)
+        except TypeError:  # enum из объектов или массивов
+            return None
+        if batch is not None and batch.count(types):
+            seen = batch.distinct(types, self.max_enum)
+            if seen is None or batch.count(types) < self.min_enum_repeats * len(seen):
+                return None
+            values |= seen
+        if not values or len(values) > self.max_enum:
+            return None
+        try:
+            return sorted(values)
+        except TypeError:  # значения разных типов из входных схем
+            return sorted(values, key=repr)
+
+
+class NumericRangeComparator(StatisticsComparator):
+    """
+    Добавляет ``minimum``/``maximum`` для числовых листьев.
+    Значения берутся из колоночной пачки узла (NumPy, если установлен).
+    """
+
+    name = "numeric_range"
+
+    def __init__(self) -> None:
+        super().__init__(string_length=False, multiple_of=False, enum=False)
+
+
+class StringLengthComparator(StatisticsComparator):
+    """Добавляет ``minLength``/``maxLength`` для строковых листьев."""
+
+    name = "string_length"
+
+    def __init__(self) -> None:
+        super().__init__(numeric_range=False, multiple_of=False, enum=False)
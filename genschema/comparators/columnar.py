@@ -0,0 +1,136 @@
+import importlib.util
+import math
+from collections.abc import Iterable
+from types import ModuleType
+from typing import Any, Optional
+
+from .format import FormatDetector
+from .template import Resource
+from .type import _JSON_TYPES, infer_json_type
+
+# NumPy — необязательная и тяжёлая при импорте зависимость: загружается при первой
+# большой колонке, а не при импорте genschema
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+_np: Optional[ModuleType] = None
+
+
+def _numpy() -> ModuleType:
+    global _np
+    if _np is None:
+        import numpy
+
+        _np = numpy
+    return _np
+
+
+# Начиная с какого размера колонки min/max считаются через NumPy
+NUMPY_THRESHOLD = 64
+
+_CONTAINER_TYPES = (list, dict)
+
+# Размер блока при подсчёте различных значений
+_DISTINCT_BLOCK = 256
+
+
+class ScalarBatch:
+    """
+    Колоночное представление скалярного листа: значения JSON,
+    сгруппированные по типу за один проход.
+
+    Классификация — поиск точного python-типа в общей таблице (см. :func:`infer_json_type`),
+    форматы строк определяются один раз на каждое уникальное значение.
+    """
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self) -> None:
+        self.ids: dict[str, list[str]] = {}
+        self.values: dict[str, list[Any]] = {}
+
+    @classmethod
+    def collect(cls, jsons: Iterable[Resource]) -> Optional["ScalarBatch"]:
+        """
+        Собирает пачку из JSON-ресурсов узла.
+        Возвращает ``None``, если среди значений есть объект или массив (узел не лист).
+        """
+        batch = cls()
+        kind = _JSON_TYPES.get
+        for j in jsons:
+            v = j.content
+            if isinstance(v, _CONTAINER_TYPES):
+                return None
+            t = kind(type(v)) or infer_json_type(v)
+            ids = batch.ids.get(t)
+            if ids is None:
+                ids = batch.ids[t] = []
+                batch.values[t] = []
+            ids.append(j.id)
+            batch.values[t].append(v)
+        return batch
+
+    @property
+    def types(self) -> list[str]:
+        return list(self.ids)
+
+    @property
+    def has_null(self) -> bool:
+        return "null" in self.ids
+
+    def formats(self) -> dict[Optional[str], list[str]]:
+        """Форматы строковых значений: ``format -> ids`` в порядке первого появления."""
+        by_value: dict[str, list[str]] = {}
+        for rid, value in zip(self.ids.get("string", ()), self.values.get("string", ())):
+            by_value.setdefault(value, []).append(rid)
+
+        result: dict[Optional[str], list[str]] = {}
+        for value, ids in by_value.items():
+            result.setdefault(FormatDetector.detect(value), []).extend(ids)
+        return result
+
+    def numeric_range(self) -> Optional[tuple[int | float, int | float]]:
+        """Минимум и максимум среди integer и number значений."""
+        bounds = [_min_max(self.values[t]) for t in ("integer", "number") if self.values.get(t)]
+        if not bounds:
+            return None
+        return min(b[0] for b in bounds), max(b[1] for b in bounds)
+
+    def string_length_range(self) -> Optional[tuple[int, int]]:
+        """Минимальная и максимальная длина строковых значений."""
+        strings = self.values.get("string")
+        if not strings:
+            return None
+        lengths = list(map(len, strings))
+        return min(lengths), max(lengths)
+
+    def divisor(self) -> int:
+        """НОД целых значений (0, если их нет или все равны нулю)."""
+        return math.gcd(*self.values.get("integer", ()))
+
+    def distinct(self, types: Iterable[str], limit: int) -> Optional[set[Any]]:
+        """
+        Различные значения указанных типов; ``None``, если их больше ``limit``.
+        Множество растёт блоками и не превышает ``limit`` + размер блока.
+        """
+        seen: set[Any] = set()
+        for t in types:
+            values = self.values.get(t, ())
+            for start in range(0, len(values), _DISTINCT_BLOCK):
+                seen.update(values[start : start + _DISTINCT_BLOCK])
+                if len(seen) > limit:
+                    return None
+        return seen
+
+    def count(self, types: Iterable[str]) -> int:
+        return sum(len(self.ids.get(t, ())) for t in types)
+
+
+def _min_max(values: list[Any]) -> tuple[Any, Any]:
+    if HAS_NUMPY and len(values) >= NUMPY_THRESHOLD:
+        try:
+            arr = _numpy().asarray(values)
+        except (OverflowError, ValueError):
+            arr = None
+        # int64/float64 колонка; слишком большие int дают dtype=object
+        if arr is not None and arr.dtype.kind in "iuf":
+            return arr.min().item(), arr.max().item()
+    return min(values), max(values)
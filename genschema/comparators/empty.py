@@ -1,4 +1,5 @@
-from .template import Comparator, ComparatorResult, ProcessingContext, Resource
+from .template import Comparator, ComparatorResult, ProcessingContext
+from .type import infer_schema_type
 
 
 class EmptyComparator(Comparator):
@@ -20,28 +21,33 @@ class EmptyComparator(Comparator):
 
     def process(self, ctx: ProcessingContext, env: str, node: dict) -> ComparatorResult:
 
-        # Проверяем есть ли непустые кандидаты на этом уровне
-        def is_nonempty(r: Resource) -> bool:
-            c = r.content
-            if isinstance(c, dict):
-                return bool(c)  # не пустой словарь
-            if isinstance(c, list):
-                return bool(c)  # не пустой список
-            return True  # скаляры считаем непустыми
-
-        candidates = [is_nonempty(r) for r in ctx.schemas + ctx.jsons]
-
-        if self.flag_empty and not any(candidates):
-            t = node.get("type")
-            if t == "object":
-                return {"maxProperties": 0}, None
-            elif t == "array":
-                return {"maxItems": 0}, None
-        elif self.flag_non_empty and all(candidates):
-            t = node.get("type")
-            if t == "object":
-                return {"minProperties": 1}, None
-            elif t == "array":
-                return {"minItems": 1}, None
+        t = node.get("type")
+        min_key, max_key = (
+            ("minProperties", "maxProperties") if t == "object" else ("minItems", "maxItems")
+        )
+
+        # JSON: пустота уже подсчитана в сводке узла (скаляры считаем непустыми)
+        summary = ctx.summary
+        can_be_empty = summary.empty > 0
+        can_be_non_empty = summary.non_empty > 0
+
+        # Схема допускает пустоту/непустоту, если не ограничивает её явно
+        for s in ctx.schemas:
+            c = s.content
+            if not isinstance(c, dict):
+                can_be_non_empty = True
+                continue
+            if infer_schema_type(c) is None:
+                # схема без типа (items пустого массива) не описывает ни одного значения
+                continue
+            can_be_empty = can_be_empty or c.get(min_key, 0) < 1
+            can_be_non_empty = can_be_non_empty or c.get(max_key) != 0
+
+        if self.flag_empty and not can_be_non_empty:
+            if t in ("object", "array"):
+                return {max_key: 0}, None
+        elif self.flag_non_empty and not can_be_empty:
+            if t in ("object", "array"):
+                return {min_key: 1}, None
 
         return None, None
@@ -1,9 +1,10 @@
 import re
+import threading
 from collections import defaultdict
-from functools import lru_cache
 from typing import Any, Optional
 
 from .template import Comparator, ComparatorResult, ProcessingContext
+from .type import infer_schema_type
 
 
 class FormatDetector:
@@ -27,14 +28,31 @@ class FormatDetector:
         }
     }
 
+    # Кэш результатов у каждого потока свой: общий lru_cache сериализует потоки
+    # на своей блокировке (заметно в сборке CPython без GIL).
+    _CACHE_SIZE = 512
+    _local = threading.local()
+
     @classmethod
-    @lru_cache(maxsize=512)
     def detect(cls, value: Any, type_hint: str = "string") -> Optional[str]:
-        patterns = cls._registry.get(type_hint, {})
-        for pattern, name in patterns.items():
+        cache: Optional[dict[tuple[Any, str], Optional[str]]] = getattr(cls._local, "cache", None)
+        if cache is None:
+            cache = cls._local.cache = {}
+        key = (value, type_hint)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+
+        result = None
+        for pattern, name in cls._registry.get(type_hint, {}).items():
             if pattern.fullmatch(str(value)):
-                return name
-        return None
+                result = name
+                break
+        if len(cache) >= cls._CACHE_SIZE:
+            cache.clear()
+        cache[key] = result
+        return result
 
 
 class FormatComparator(Comparator):
@@ -46,12 +64,14 @@ class FormatComparator(Comparator):
 
     def process(self, ctx: ProcessingContext, env: str, prev_result: dict) -> ComparatorResult:
 
-        # Базовые триггеры из предыдущих компараторов (обычно из TypeComparator)
-        base_triggers = set(prev_result.get("j2sElementTrigger", []))
+        # Без триггеров узла (см. ProcessingContext.triggers) списки id нужны
+        # только для разбиения на варианты — то есть если найдутся форматы
+        lazy = not ctx.triggers
 
         # Собираем все возможные форматы и их источники
         format_to_ids: dict[str | None, set[str]] = defaultdict(set)
-        format_to_ids[None].update(base_triggers)
+        # Базовые триггеры из предыдущих компараторов (обычно из TypeComparator)
+        format_to_ids[None].update(() if lazy else prev_result.get("j2sElementTrigger", []))
 
         # 1. Форматы, явно указанные в схемах
         for s in ctx.schemas:
@@ -62,12 +82,24 @@ class FormatComparator(Comparator):
                     format_to_ids[None].discard(s.id)
 
         # 2. Форматы, выведенные из значений JSON
-        for j in ctx.jsons:
-            if isinstance(j.content, str):
-                fmt = FormatDetector.detect(j.content)
-                format_to_ids[fmt].add(j.id)
+        for fmt, json_ids in ctx.summary.formats().items():
+            format_to_ids[fmt].update(json_ids)
+            if fmt is not None:
+                format_to_ids[None].difference_update(json_ids)
+
+        if lazy:
+            if len(format_to_ids) == 1:
+                return None, None  # форматов нет — менять нечего
+            # базовый триггер неявный — все строковые ресурсы узла
+            if "j2sElementTrigger" in prev_result:
+                base = set(prev_result["j2sElementTrigger"])
+            else:
+                base = {s.id for s in ctx.schemas if infer_schema_type(s.content) == "string"}
+                base.update(ctx.summary.ids.get("string", ()))
+            for fmt, ids in format_to_ids.items():
                 if fmt is not None:
-                    format_to_ids[None].discard(j.id)
+                    base.difference_update(ids)
+            format_to_ids[None].update(base)
 
         # Формируем варианты
         variants: list[dict] = []
@@ -81,8 +113,16 @@ class FormatComparator(Comparator):
 
         # Результат
         if len(variants) == 1:
+            if not ctx.triggers:
+                variants[0].pop("j2sElementTrigger")
             return variants[0], None
         if len(variants) > 1:
+            if ctx.sealed:
+                # в sealed-контексте нельзя порождать Of — остаётся общий string без формата
+                general: dict[str, Any] = {"type": "string"}
+                if ctx.triggers:
+                    general["j2sElementTrigger"] = sorted(set().union(*format_to_ids.values()))
+                return general, None
             return None, variants
 
         # Если ничего нового не нашли — оставляем как есть
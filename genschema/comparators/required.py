@@ -1,6 +1,7 @@
 import logging
 
 from .template import Comparator, ComparatorResult, ProcessingContext
+from .type import infer_schema_type
 
 logger = logging.getLogger(__name__)
 
@@ -12,39 +13,40 @@ class RequiredComparator(Comparator):
     """
 
     def can_process(self, ctx: ProcessingContext, env: str, node: dict) -> bool:
-        # обрабатываем только объекты
-        return (
-            (node.get("type") == "object" and not node.get("isPseudoArray", False))
-            or node.get("type") is None
-            or not ctx.jsons
-        )
+        # обрабатываем только объекты; ключи псевдомассива - индексы, а не поля,
+        # независимо от того, пришёл он из JSON или из схемы
+        if node.get("isPseudoArray", False):
+            return False
+        return node.get("type") in ("object", None) or not ctx.jsons
 
     def process(self, ctx: ProcessingContext, env: str, node: dict) -> ComparatorResult:
         required_sets: list[set[str]] = []
 
         # Если есть хотя бы один JSON, который не является объектом,
         # мы не можем корректно определить обязательные ключи.
-        if ctx.jsons and any(not isinstance(j.content, dict) for j in ctx.jsons):
+        summary = ctx.summary
+        if not summary.only_objects:
             return None, None
 
         # ---------- из json ----------
-        objects = [j.content for j in ctx.jsons if isinstance(j.content, dict)]
-        if objects:
-            keys: set[str] = set()
-            for obj in objects:
-                keys.update(obj.keys())
-
-            required_from_json = {k for k in keys if all(k in obj for obj in objects)}
-            required_sets.append(required_from_json)
+        # ключи, присутствующие во всех объектах, уже посчитаны в сводке узла
+        if summary.common_keys is not None:
+            required_sets.append(summary.common_keys)
 
         # ---------- из схем ----------
         for schema in ctx.schemas:
             content = schema.content
             if not isinstance(content, dict):
                 continue
+            # схема не-объекта, как и JSON не-объект, не позволяет вывести required
+            t = infer_schema_type(content)
+            if t not in (None, "object"):
+                return None, None
+            # схема без типа и свойств (например, items пустого массива) ключей не описывает
+            if t is None and "required" not in content:
+                continue
             req = content.get("required")
-            if isinstance(req, list):
-                required_sets.append(set(req))
+            required_sets.append(set(req) if isinstance(req, list) else set())
 
         if not required_sets:
             return None, None
@@ -0,0 +1,86 @@
+from collections.abc import Iterable
+from typing import Optional
+
+from .columnar import ScalarBatch
+from .template import Resource
+from .type import _JSON_TYPES, infer_json_type
+
+_CONTAINER_TYPES = ("object", "array")
+
+
+class NodeSummary(ScalarBatch):
+    """
+    Сводка JSON-значений узла, собранная за один проход.
+
+    Кроме колонок скалярных значений (см. :class:`ScalarBatch`) содержит
+    гистограмму типов для всех значений, признаки пустоты и ключи объектов.
+    Доступна компараторам как :attr:`ProcessingContext.summary` и вычисляется
+    не более одного раза на узел, сколько бы компараторов её ни читало.
+    """
+
+    __slots__ = ("empty", "non_empty", "keys", "common_keys", "occurrences")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.empty = 0  # пустых объектов и массивов
+        self.non_empty = 0  # скаляров и непустых объектов/массивов
+        self.keys: set[str] = set()  # объединение ключей объектов
+        self.common_keys: Optional[set[str]] = None  # ключи всех объектов; None — объектов нет
+        self.occurrences = 0  # вхождений ключей по всем объектам
+
+    @classmethod
+    def collect(
+        cls, jsons: Iterable[Resource], batch: Optional[ScalarBatch] = None
+    ) -> "NodeSummary":
+        """
+        Собирает сводку по JSON-ресурсам узла.
+        Уже собранная колоночная пачка листа используется без повторного обхода.
+        """
+        summary = cls()
+        if batch is not None:
+            summary.ids = batch.ids
+            summary.values = batch.values
+            summary.non_empty = sum(map(len, batch.ids.values()))
+            return summary
+
+        kind = _JSON_TYPES.get
+        ids_by_type = summary.ids
+        values_by_type = summary.values
+        keys = summary.keys
+        common: Optional[set[str]] = None
+        for j in jsons:
+            v = j.content
+            t = kind(type(v)) or infer_json_type(v)
+            ids = ids_by_type.get(t)
+            if ids is None:
+                ids = ids_by_type[t] = []
+                if t not in _CONTAINER_TYPES:
+                    values_by_type[t] = []
+            ids.append(j.id)
+            if t == "object":
+                keys.update(v)
+                summary.occurrences += len(v)
+                if common is None:
+                    common = set(v)
+                elif common:
+                    common.intersection_update(v)
+            elif t != "array":
+                values_by_type[t].append(v)
+                summary.non_empty += 1
+                continue
+            if v:
+                summary.non_empty += 1
+            else:
+                summary.empty += 1
+        summary.common_keys = common
+        return summary
+
+    @property
+    def is_leaf(self) -> bool:
+        """Среди значений нет объектов и массивов."""
+        return not (self.ids.keys() & _CONTAINER_TYPES)
+
+    @property
+    def only_objects(self) -> bool:
+        """Все значения узла (если они есть) — объекты."""
+        return not self.ids or list(self.ids) == ["object"]
@@ -1,5 +1,12 @@
-from dataclasses import dataclass
-from typing import Any, Optional
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional, TypeVar, overload
+
+if TYPE_CHECKING:
+    from .columnar import ScalarBatch
+    from .summary import NodeSummary
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -8,18 +15,114 @@ class ToDelete:
     comparator_trigger: Optional["Comparator"] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Resource:
     id: str
     type: str
     content: Any
 
 
+class ResourceView(Sequence[Resource]):
+    """
+    Ленивое представление дочерних ресурсов поверх содержимого родителя.
+
+    Каждый обход заново порождает ресурсы из ``factory``, поэтому однопроходные
+    компараторы не создают промежуточных списков. Доступ по индексу, ``len()``
+    и :meth:`materialize` однократно сохраняют ресурсы в список.
+    """
+
+    __slots__ = ("_factory", "_items")
+
+    def __init__(self, factory: Callable[[], Iterable[Resource]]):
+        self._factory = factory
+        self._items: Optional[list[Resource]] = None
+
+    def materialize(self) -> list[Resource]:
+        if self._items is None:
+            self._items = list(self._factory())
+        return self._items
+
+    def __iter__(self) -> Iterator[Resource]:
+        if self._items is not None:
+            return iter(self._items)
+        return iter(self._factory())
+
+    def __bool__(self) -> bool:
+        if self._items is not None:
+            return bool(self._items)
+        return next(iter(self._factory()), None) is not None
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    @overload
+    def __getitem__(self, index: int) -> Resource: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Resource]: ...
+
+    def __getitem__(self, index: int | slice) -> Resource | list[Resource]:
+        return self.materialize()[index]
+
+    def __add__(self, other: Iterable[Resource]) -> list[Resource]:
+        return [*self, *other]
+
+    def __radd__(self, other: Iterable[Resource]) -> list[Resource]:
+        return [*other, *self]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        state = "materialized" if self._items is not None else "lazy"
+        return f"<ResourceView {state}>"
+
+
 @dataclass
 class ProcessingContext:
-    schemas: list[Resource]
-    jsons: list[Resource]
+    schemas: Sequence[Resource]
+    jsons: Sequence[Resource]
     sealed: bool = False
+    batch: Optional["ScalarBatch"] = None  # колоночная пачка скалярного листа, если собрана
+    depth: int = 0  # уровень вложенности узла (корень — 0)
+    # Строить ли j2sElementTrigger для узла без альтернатив. При False триггер узла —
+    # неявно «все ресурсы контекста»: списки id создаются только при разбиении на варианты.
+    triggers: bool = True
+    _summary: Optional["NodeSummary"] = field(default=None, init=False, repr=False, compare=False)
+    _memo: dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def summary(self) -> "NodeSummary":
+        """
+        Сводка JSON-значений узла (типы, пустота, ключи, скалярные колонки).
+        Собирается при первом обращении за один проход и дальше общая для всех компараторов.
+        """
+        if self._summary is None:
+            from .summary import NodeSummary
+
+            self._summary = NodeSummary.collect(self.jsons, self.batch)
+        return self._summary
+
+    def memo(self, key: str, compute: Callable[[], T]) -> T:
+        """
+        Значение ``compute()``, вычисленное не более одного раза на контекст.
+        Для производных данных узла, нужных не только компараторам (например, обработчику
+        псевдомассивов), по аналогии с :attr:`summary`.
+        """
+        if key not in self._memo:
+            self._memo[key] = compute()
+        result: T = self._memo[key]
+        return result
+
+    def materialize(self) -> None:
+        """Фиксирует ленивые представления в списки перед многократным обходом."""
+        for resources in (self.schemas, self.jsons):
+            if isinstance(resources, ResourceView):
+                resources.materialize()
 
 
 ComparatorResult = tuple[Optional[dict[str, ToDelete | Any | bool]], Optional[list[dict]]]
@@ -27,6 +130,8 @@ ComparatorResult = tuple[Optional[dict[str, ToDelete | Any | bool]], Optional[li
 
 class Comparator:
     name = "base"
+    # Компаратор читает j2sElementTrigger узла: конвейер строит триггеры для всех узлов
+    needs_triggers = False
 
     def can_process(self, ctx: ProcessingContext, env: str, prev_result: dict) -> bool:
         return False
@@ -1,9 +1,39 @@
+from collections.abc import Iterable
 from typing import Any
 
 from .template import Comparator, ComparatorResult, ProcessingContext
 
+# Точный python-тип -> тип JSON. Самые частые в документах типы идут первыми;
+# подклассы (IntEnum, OrderedDict...) классифицируются через isinstance и дописываются сюда.
+_JSON_TYPES: dict[type, str] = {
+    str: "string",
+    dict: "object",
+    int: "integer",
+    float: "number",
+    list: "array",
+    bool: "boolean",
+    type(None): "null",
+}
+
 
 def infer_json_type(v: Any) -> str:
+    t = _JSON_TYPES.get(type(v))
+    if t is None:
+        t = _infer_subclass_type(v)
+        # в таблицу попадают только подклассы типов JSON (IntEnum, OrderedDict...):
+        # прочие типы дали бы "any", а таблица росла бы с каждым новым типом без предела
+        if t != "any":
+            _JSON_TYPES[type(v)] = t
+    return t
+
+
+def infer_json_types(values: Iterable[Any]) -> list[str]:
+    """Типы JSON для последовательности значений (один поиск в таблице на значение)."""
+    get = _JSON_TYPES.get
+    return [get(type(v)) or infer_json_type(v) for v in values]
+
+
+def _infer_subclass_type(v: Any) -> str:
     if v is None:
         return "null"
     if isinstance(v, bool):
@@ -42,34 +72,33 @@ class TypeComparator(Comparator):
         return "type" not in prev_result and bool(ctx.schemas or ctx.jsons)
 
     def process(self, ctx: ProcessingContext, env: str, prev_result: dict) -> ComparatorResult:
-        type_map: dict[str, set[str]] = {}
-
+        schema_ids: dict[str, list[str]] = {}
         for s in ctx.schemas:
             t = infer_schema_type(s.content)
             if t:
-                type_map.setdefault(t, set()).add(s.id)
-
-        for j in ctx.jsons:
-            t = infer_json_type(j.content)
-            type_map.setdefault(t, set()).add(j.id)
+                schema_ids.setdefault(t, []).append(s.id)
+        json_ids = ctx.summary.ids
 
+        types = list(dict.fromkeys([*schema_ids, *json_ids]))
         # Нормализация: number поглощает integer
-        if "number" in type_map and "integer" in type_map:
-            type_map["number"].update(type_map["integer"])
-            del type_map["integer"]
+        merged = "number" in types and "integer" in types
+        if merged:
+            types.remove("integer")
 
-        if not type_map:
+        if not types:
             return None, None
 
-        variants: list[dict[str, Any]] = [
-            {"type": t, "j2sElementTrigger": sorted(ids)} for t, ids in type_map.items()
-        ]
+        def triggers(t: str) -> list[str]:
+            ids = {*schema_ids.get(t, ()), *json_ids.get(t, ())}
+            if merged and t == "number":
+                ids.update(schema_ids.get("integer", ()), json_ids.get("integer", ()))
+            return sorted(ids)
 
-        if ctx.sealed:
+        if ctx.sealed or len(types) == 1:
             # cannot create Of inside sealed context — choose first deterministic
-            return variants[0], None
-
-        if len(variants) == 1:
-            return variants[0], None
+            variant: dict[str, Any] = {"type": types[0]}
+            if ctx.triggers:
+                variant["j2sElementTrigger"] = triggers(types[0])
+            return variant, None
 
-        return None, variants
+        return None, [{"type": t, "j2sElementTrigger": triggers(t)} for t in types]
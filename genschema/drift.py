@@ -0,0 +1,314 @@
+"""
+Обнаружение дрейфа схемы.
+
+:class:`DriftDetector` сопоставляет новые документы с эталонной схемой
+(обычно — результатом предыдущего :meth:`Converter.run`) без повторного вывода схемы.
+Сообщается только о путях, где расходятся тип, формат, набор обязательных полей
+или признак псевдомассива; поддеревья с несовпавшим типом дальше не обходятся.
+Локальные ``$ref`` эталона (например, ``$defs`` слитых эталонов) разыменовываются;
+узел определения строится один раз, и путь расхождения внутри него ведёт в ``$defs``.
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .comparators.format import FormatDetector
+from .comparators.template import ProcessingContext, Resource
+from .comparators.type import infer_json_type, infer_schema_type
+from .pseudo_arrays import PseudoArrayHandlerBase
+from .refs import ANNOTATIONS, MAX_REF_HOPS, local_pointer, resolve_pointer
+
+_PY_TYPES: dict[str, tuple[type, ...]] = {
+    "null": (type(None),),
+    "boolean": (bool,),
+    "integer": (int,),
+    "number": (int, float),
+    "string": (str,),
+}
+
+
+@dataclass(frozen=True)
+class Drift:
+    """
+    Расхождение документа с эталоном.
+
+    :param path: JSON Pointer узла в эталонной схеме.
+    :param kind: ``type``, ``format``, ``required``, ``property`` или ``pseudo_array``.
+    :param count: Сколько раз расхождение встретилось.
+    :param first_document: Порядковый номер первого документа с этим расхождением.
+    """
+
+    path: str
+    kind: str
+    expected: Any
+    actual: Any
+    count: int = 1
+    first_document: int = 0
+
+
+class _Node:
+    """Эталонный узел, подготовленный для быстрого сопоставления."""
+
+    __slots__ = (
+        "path",
+        "types",
+        "formats",
+        "required",
+        "properties",
+        "patterns",
+        "additional",
+        "open",
+        "items",
+        "prefix",
+        "pseudo",
+        "variants",
+        "scalar",
+        "anything",
+    )
+
+    def __init__(self, schema: Any, path: str, refs: "_Refs"):
+        self.path = path
+        self.types: set[str] = set()
+        self.formats: set[Optional[str]] = set()
+        self.required: frozenset[str] = frozenset()
+        self.properties: dict[str, _Node] = {}
+        self.patterns: list[tuple[re.Pattern[str], _Node]] = []
+        self.additional: Optional[_Node] = None  # схема additionalProperties
+        self.open = False  # additionalProperties: true — неизвестные ключи допустимы
+        self.items: Optional[_Node] = None
+        self.prefix: list[_Node] = []  # позиции кортежа (prefixItems)
+        self.pseudo = False
+        self.variants: list[_Node] = []
+        # python-типы листа без format: значение проверяется одним isinstance
+        self.scalar: Optional[tuple[type, ...]] = None
+        self.anything = False  # неразрешимая или циклическая ссылка: значение не проверяется
+
+        if isinstance(schema, dict) and "$ref" in schema:
+            schema = refs.expand(schema)
+            if schema is None:
+                self.anything = True
+                return
+        if not isinstance(schema, dict):
+            return
+        for key in ("anyOf", "oneOf"):
+            for i, alt in enumerate(schema.get(key, ())):
+                merged = {k: v for k, v in schema.items() if k not in ("anyOf", "oneOf")}
+                merged.update(alt)
+                node = refs.node(merged, f"{path}/{key}/{i}")
+                self.variants.append(node)
+                self.types |= node.types
+                self.formats |= node.formats
+        if self.variants:
+            return
+
+        t = schema.get("type")
+        types = t if isinstance(t, list) else [t] if t else [infer_schema_type(schema)]
+        self.types = {t for t in types if t}
+        if "string" in self.types:
+            self.formats = {schema.get("format")}
+        self.required = frozenset(schema.get("required", ()))
+        for name, sub in schema.get("properties", {}).items():
+            self.properties[name] = refs.node(sub, f"{path}/properties/{_escape(name)}")
+        for pattern, sub in schema.get("patternProperties", {}).items():
+            node = refs.node(sub, f"{path}/patternProperties/{_escape(pattern)}")
+            self.patterns.append((re.compile(pattern), node))
+        self.pseudo = bool(self.patterns) and not self.properties
+        # схемой additionalProperties усечённый узел описывает значения всех своих ключей;
+        # дрейфом считаются только ключи, не описанные ничем (или запрещённые false)
+        additional = schema.get("additionalProperties")
+        if isinstance(additional, dict) and additional:
+            self.additional = refs.node(additional, f"{path}/additionalProperties")
+        self.open = additional is True or additional == {}
+        if isinstance(schema.get("items"), dict):
+            self.items = refs.node(schema["items"], f"{path}/items")
+        for i, sub in enumerate(schema.get("prefixItems", ())):
+            self.prefix.append(refs.node(sub, f"{path}/prefixItems/{i}"))
+
+        if self.types and self.types <= _PY_TYPES.keys() and self.formats <= {None}:
+            self.scalar = tuple({p for t in self.types for p in _PY_TYPES[t]})
+
+    def accepts_type(self, t: str) -> bool:
+        return t in self.types or (t == "integer" and "number" in self.types)
+
+
+class _Refs:
+    """Разыменование локальных ``$ref`` эталона ``root``."""
+
+    def __init__(self, root: Any):
+        self.root = root
+        self._nodes: dict[str, _Node] = {}  # указатель -> узел определения
+
+    def node(self, schema: Any, path: str) -> _Node:
+        """
+        Узел схемы. Чистая ссылка (рядом только аннотации) строится один раз на указатель:
+        узел регистрируется до построения потомков, поэтому рекурсивное определение
+        ссылается само на себя, а не разворачивается бесконечно.
+        """
+        pointer = local_pointer(schema.get("$ref")) if isinstance(schema, dict) else None
+        if pointer is None or not schema.keys() - ANNOTATIONS <= {"$ref"}:
+            return _Node(schema, path, self)
+        node = self._nodes.get(pointer)
+        if node is None:
+            node = self._nodes[pointer] = _Node.__new__(_Node)
+            node.__init__(schema, pointer, self)  # type: ignore[misc]
+        return node
+
+    def expand(self, schema: dict) -> Optional[dict]:
+        """
+        Схема с подставленным определением: ключевые слова рядом с ``$ref`` дополняют его.
+        ``None`` — ссылка внешняя, не разрешается или зацикливается.
+        """
+        for _ in range(MAX_REF_HOPS):
+            if "$ref" not in schema:
+                return schema
+            pointer = local_pointer(schema["$ref"])
+            if pointer is None:
+                return None
+            try:
+                target = resolve_pointer(self.root, pointer)
+            except LookupError:
+                return None
+            if not isinstance(target, dict):
+                return None
+            siblings = {k: v for k, v in schema.items() if k != "$ref" and k not in ANNOTATIONS}
+            schema = {**target, **siblings}
+        return None
+
+
+def _escape(name: str) -> str:
+    return name.replace("~", "~0").replace("/", "~1")
+
+
+class DriftDetector:
+    """
+    Потоковая проверка документов на соответствие эталонной схеме.
+
+    :param baseline: Эталонная схема.
+    :param pseudo_handler: Тот же обработчик псевдомассивов, что использовался при выводе
+    эталона; без него признак псевдомассива сверяется только по ``patternProperties``.
+    """
+
+    def __init__(self, baseline: dict, pseudo_handler: Optional[PseudoArrayHandlerBase] = None):
+        self._root = _Refs(baseline).node(baseline, "")
+        self._pseudo_handler = pseudo_handler
+        self._drifts: dict[tuple[str, str, str], Drift] = {}
+        self._documents = 0
+        self._events = 0
+
+    @property
+    def documents(self) -> int:
+        """Количество проверенных документов."""
+        return self._documents
+
+    def feed(self, document: Any) -> bool:
+        """Проверяет документ. Возвращает ``True``, если расхождений не найдено."""
+        before = self._events
+        self._check(self._root, document)
+        self._documents += 1
+        return self._events == before
+
+    def feed_many(self, documents: Iterable[Any]) -> None:
+        for document in documents:
+            self.feed(document)
+
+    def report(self) -> list[Drift]:
+        """Расхождения, упорядоченные по пути."""
+        return sorted(self._drifts.values(), key=lambda d: (d.path, d.kind, repr(d.actual)))
+
+    def _add(self, path: str, kind: str, expected: Any, actual: Any) -> None:
+        self._events += 1
+        key = (path, kind, repr(actual))
+        drift = self._drifts.get(key)
+        if drift is None:
+            self._drifts[key] = Drift(path, kind, expected, actual, 1, self._documents)
+        else:
+            self._drifts[key] = Drift(
+                path, kind, expected, actual, drift.count + 1, drift.first_document
+            )
+
+    def _check(self, node: _Node, value: Any) -> None:
+        if node.anything:
+            return
+        if (
+            node.scalar is not None
+            and isinstance(value, node.scalar)
+            and (not isinstance(value, bool) or "boolean" in node.types)
+        ):
+            return
+
+        t = infer_json_type(value)
+        if node.variants:
+            candidates = [n for n in node.variants if n.accepts_type(t)]
+            if not candidates:
+                self._add(node.path, "type", sorted(node.types), t)
+            elif t == "string" and len(candidates) > 1:
+                fmt = FormatDetector.detect(value)
+                if not any(None in n.formats or fmt in n.formats for n in candidates):
+                    self._add(node.path, "format", sorted(f for f in node.formats if f), fmt)
+            else:
+                self._check(candidates[0], value)
+            return
+
+        if not node.accepts_type(t):
+            self._add(node.path, "type", sorted(node.types), t)
+        elif t == "string":
+            if node.formats and None not in node.formats:
+                fmt = FormatDetector.detect(value)
+                if fmt not in node.formats:
+                    self._add(node.path, "format", sorted(f for f in node.formats if f), fmt)
+        elif t == "object":
+            self._check_object(node, value)
+        elif t == "array":
+            self._check_items(node, value)
+
+    def _check_items(self, node: _Node, items: list) -> None:
+        prefix = node.prefix
+        for sub, item in zip(prefix, items):
+            self._check(sub, item)
+        rest = items[len(prefix) :] if prefix else items
+        if node.items is None:
+            for item in rest:
+                self._add(f"{node.path}/items", "type", [], infer_json_type(item))
+            return
+        for item in rest:
+            self._check(node.items, item)
+
+    def _check_object(self, node: _Node, obj: dict) -> None:
+        properties = node.properties
+        # ключи уже известны эталону: объединение ключей узла не меняется,
+        # значит и решение обработчика псевдомассивов тоже
+        known = properties.keys() >= obj.keys()
+        if obj and not known and self._pseudo_handler is not None:
+            ctx = ProcessingContext([], [Resource(node.path, "json", obj)])
+            is_pseudo, _ = self._pseudo_handler.is_pseudo_array(sorted(obj), ctx)
+            if is_pseudo != node.pseudo and (properties or node.patterns):
+                self._add(node.path, "pseudo_array", node.pseudo, is_pseudo)
+                return
+
+        for name in node.required:
+            if name not in obj:
+                self._add(
+                    f"{node.path}/properties/{_escape(name)}", "required", "present", "missing"
+                )
+
+        for key, value in obj.items():
+            child = properties.get(key)
+            if child is not None:
+                self._check(child, value)
+                continue
+            for pattern, sub in node.patterns:
+                if pattern.search(key):
+                    self._check(sub, value)
+                    break
+            else:
+                if node.additional is not None:
+                    self._check(node.additional, value)
+                elif not node.open:
+                    self._add(
+                        f"{node.path}/properties/{_escape(key)}",
+                        "property",
+                        None,
+                        infer_json_type(value),
+                    )
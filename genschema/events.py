@@ -0,0 +1,326 @@
+"""
+Потоковый (SAX-подобный) приём документов.
+
+:class:`EventProfiler` принимает события разбора (начало/конец объекта и массива, ключ,
+скалярное значение) от инкрементального парсера — например, ``ijson`` — или от собственного
+декодера и сразу сводит их в профиль по путям документа: типы, форматы строк, ключи
+и их частоту, пустоту контейнеров, границы чисел и длин строк. Дерево python-объектов
+не строится, поэтому огромный документ профилируется в памяти порядка размера схемы.
+
+Профиль выдаётся как JSON Schema (:meth:`EventProfiler.schema`) и сливается конвейером
+как обычная входная схема: типы, форматы, ``required`` и пустоту выводят те же компараторы,
+что и для документов, переданных целиком.
+
+В адаптивном режиме (``converge_after``) путь, профиль которого не менялся заданное число
+наблюдений подряд, проверяется выборочно: значения, укладывающиеся в уже известные тип
+и границы, не проходят определение формата. Ключи, типы, ``required`` и границы остаются
+точными, а новый тип или выход за границы возвращает путь к полной проверке. Формат
+непроверенной строки не определяется вовсе: она учитывается с единственным известным пути
+форматом, и формат, встретившийся только у непроверенных значений, в профиль не попадает.
+"""
+
+import math
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any, Optional
+
+from .comparators.format import FormatDetector
+from .comparators.type import infer_json_type
+
+# Имена событий: собственные и принятые в ijson
+_START_OBJECT = frozenset({"start_object", "start_map"})
+_END_OBJECT = frozenset({"end_object", "end_map"})
+_KEY = frozenset({"key", "map_key"})
+_VALUE = frozenset({"value", "null", "boolean", "integer", "double", "number", "string"})
+# multipleOf выводится не раньше, чем у пути столько различных ненулевых целых
+# (как StatisticsComparator.min_multiple_of_values по умолчанию)
+_DIVISOR_VALUES = 3
+
+
+class _Node:
+    """Профиль одного пути документа."""
+
+    __slots__ = (
+        "types",
+        "formats",
+        "low",
+        "high",
+        "divisor",
+        "divisor_values",
+        "objects",
+        "empty_objects",
+        "keys",
+        "properties",
+        "arrays",
+        "empty_arrays",
+        "items",
+        "stable",
+    )
+
+    def __init__(self) -> None:
+        self.types: dict[str, None] = {}  # в порядке первого появления
+        self.formats: dict[Optional[str], list[int]] = {}  # формат -> [мин., макс. длина]
+        self.low: Optional[int | float] = None
+        self.high: Optional[int | float] = None
+        self.divisor = 0  # НОД целых значений
+        self.divisor_values: set[int] = set()  # различные ненулевые целые, до _DIVISOR_VALUES
+        self.objects = 0
+        self.empty_objects = 0
+        self.keys: dict[str, int] = {}  # ключ -> в скольких объектах встретился
+        self.properties: dict[str, _Node] = {}
+        self.arrays = 0
+        self.empty_arrays = 0
+        self.items: Optional[_Node] = None
+        self.stable = 0  # наблюдений подряд без нового типа или формата
+
+    def add_value(self, v: Any) -> bool:
+        """Учитывает значение; ``True``, если у пути появился новый тип или формат."""
+        t = infer_json_type(v)
+        changed = t not in self.types
+        self.types[t] = None
+        if t == "string":
+            fmt = FormatDetector.detect(v)
+            lengths = self.formats.get(fmt)
+            if lengths is None:
+                self.formats[fmt] = [len(v), len(v)]
+                changed = True
+            else:
+                lengths[0] = min(lengths[0], len(v))
+                lengths[1] = max(lengths[1], len(v))
+        elif t in ("integer", "number"):
+            self.low = v if self.low is None else min(self.low, v)
+            self.high = v if self.high is None else max(self.high, v)
+            if t == "integer":
+                self.divisor = math.gcd(self.divisor, v)
+                if v and len(self.divisor_values) < _DIVISOR_VALUES:
+                    self.divisor_values.add(v)
+        return changed
+
+    def covers(self, v: Any) -> bool:
+        """
+        Значение не изменит профиль пути: тип уже встречался, число — в границах и кратно
+        НОД, строка — в границах длины единственного известного формата. Сам формат строки
+        не проверяется.
+        """
+        t = infer_json_type(v)
+        if t not in self.types:
+            return False
+        if t == "string":
+            if len(self.formats) != 1:
+                return False
+            shortest, longest = next(iter(self.formats.values()))
+            return shortest <= len(v) <= longest
+        if t in ("integer", "number"):
+            low, high = self.low, self.high
+            if low is None or high is None or not low <= v <= high:
+                return False
+            if t == "integer":
+                if (
+                    v
+                    and len(self.divisor_values) < _DIVISOR_VALUES
+                    and v not in self.divisor_values
+                ):
+                    return False
+                return not v % self.divisor if self.divisor else v == 0
+        return True
+
+    def schema(self) -> dict:
+        branches: list[dict[str, Any]] = []
+        for t in self.types:
+            if t == "string":
+                for fmt, (shortest, longest) in self.formats.items():
+                    branch: dict[str, Any] = {"type": "string"}
+                    if fmt is not None:
+                        branch["format"] = fmt
+                    branch.update(minLength=shortest, maxLength=longest)
+                    branches.append(branch)
+            elif t in ("integer", "number"):
+                branch = {"type": t, "minimum": self.low, "maximum": self.high}
+                if t == "integer" and self.divisor and len(self.divisor_values) >= _DIVISOR_VALUES:
+                    branch["multipleOf"] = self.divisor
+                branches.append(branch)
+            elif t == "object":
+                branches.append(self._object_schema())
+            elif t == "array":
+                branches.append(self._array_schema())
+            else:
+                branches.append({"type": t})
+        if len(branches) == 1:
+            return branches[0]
+        return {"anyOf": branches}
+
+    def _object_schema(self) -> dict:
+        schema: dict[str, Any] = {"type": "object"}
+        if self.properties:
+            schema["properties"] = {k: node.schema() for k, node in self.properties.items()}
+        required = [k for k, count in self.keys.items() if count == self.objects]
+        if required:
+            schema["required"] = required
+        schema.update(_emptiness("Properties", self.objects, self.empty_objects))
+        return schema
+
+    def _array_schema(self) -> dict:
+        schema: dict[str, Any] = {"type": "array"}
+        if self.items is not None:
+            schema["items"] = self.items.schema()
+        schema.update(_emptiness("Items", self.arrays, self.empty_arrays))
+        return schema
+
+
+def _emptiness(suffix: str, total: int, empty: int) -> dict[str, int]:
+    if empty == total:
+        return {"max" + suffix: 0}
+    if not empty:
+        return {"min" + suffix: 1}
+    return {}
+
+
+class _Frame:
+    __slots__ = ("node", "is_object", "key", "size")
+
+    def __init__(self, node: _Node, is_object: bool):
+        self.node = node
+        self.is_object = is_object
+        self.key: Optional[str] = None
+        self.size = 0
+
+
+class EventProfiler:
+    """
+    Приёмник событий разбора. Каждое значение верхнего уровня — отдельный документ;
+    профиль накапливается по всем документам.
+
+    Методы вызываются в порядке документа::
+
+        profiler.start_object()
+        profiler.key("id")
+        profiler.value(1)
+        profiler.end_object()
+
+    или пачкой через :meth:`feed`. Вывод позиционных кортежей (``prefixItems``)
+    и ``enum`` требует самих значений и по событиям не выполняется.
+
+    :param converge_after: Адаптивный режим: после стольких значений подряд без нового
+        типа или формата путь проверяется выборочно — значение, которое укладывается
+        в известные тип и границы, учитывается без определения формата, и лишь каждое
+        ``sample_every``-е проверяется полностью. ``None`` — проверять всё.
+        Формат, встретившийся только у непроверенных строк, в профиль не попадает.
+    :param sample_every: Частота полной проверки сошедшегося пути.
+    :raises ValueError: Несогласованная последовательность событий.
+    """
+
+    def __init__(self, converge_after: Optional[int] = None, sample_every: int = 16) -> None:
+        if converge_after is not None and converge_after < 1:
+            raise ValueError("converge_after must be a positive integer or None")
+        if sample_every < 1:
+            raise ValueError("sample_every must be a positive integer")
+        self._root = _Node()
+        self._stack: list[_Frame] = []
+        self._converge_after = converge_after
+        self._sample_every = sample_every
+        self.documents = 0
+        self.skipped = 0  # значений, учтённых без полной проверки
+
+    def start_object(self) -> None:
+        node = self._target()
+        node.types["object"] = None
+        node.objects += 1
+        self._stack.append(_Frame(node, True))
+
+    def end_object(self) -> None:
+        frame = self._pop(True)
+        if not frame.size:
+            frame.node.empty_objects += 1
+
+    def start_array(self) -> None:
+        node = self._target()
+        node.types["array"] = None
+        node.arrays += 1
+        self._stack.append(_Frame(node, False))
+
+    def end_array(self) -> None:
+        frame = self._pop(False)
+        if not frame.size:
+            frame.node.empty_arrays += 1
+
+    def key(self, name: str) -> None:
+        if not self._stack or not self._stack[-1].is_object:
+            raise ValueError(f"Unexpected key {name!r} outside of an object")
+        frame = self._stack[-1]
+        frame.key = name
+        frame.size += 1
+        keys = frame.node.keys
+        keys[name] = keys.get(name, 0) + 1
+
+    def value(self, value: Any) -> None:
+        if isinstance(value, Decimal):
+            # ijson отдаёт числа как Decimal: целые — без дробной части и экспоненты
+            value = int(value) if value.as_tuple().exponent == 0 else float(value)
+        node = self._target()
+        if self._converge_after is None:
+            node.add_value(value)
+            return
+        if (
+            node.stable >= self._converge_after
+            and node.stable % self._sample_every
+            and node.covers(value)
+        ):
+            node.stable += 1
+            self.skipped += 1
+            return
+        node.stable = 0 if node.add_value(value) else node.stable + 1
+
+    def feed(self, events: Iterable[tuple[Any, ...]]) -> None:
+        """
+        События парами ``(событие, значение)`` или тройками ``(префикс, событие, значение)``,
+        как у ``ijson.parse``. Имена событий — методы этого класса либо имена ijson
+        (``start_map``, ``map_key``, ``string``, ``number``...).
+        """
+        for item in events:
+            event, payload = item[-2], item[-1]
+            if event in _VALUE:
+                self.value(payload)
+            elif event in _KEY:
+                self.key(payload)
+            elif event in _START_OBJECT:
+                self.start_object()
+            elif event in _END_OBJECT:
+                self.end_object()
+            elif event == "start_array":
+                self.start_array()
+            elif event == "end_array":
+                self.end_array()
+            else:
+                raise ValueError(f"Unknown parse event: {event!r}")
+
+    def schema(self) -> dict:
+        """Профиль всех завершённых документов в виде JSON Schema."""
+        if self._stack:
+            raise ValueError("Document is not finished: unclosed object or array")
+        return self._root.schema()
+
+    def _target(self) -> _Node:
+        """Узел профиля, к которому относится очередное значение."""
+        if not self._stack:
+            self.documents += 1
+            return self._root
+        frame = self._stack[-1]
+        parent = frame.node
+        if not frame.is_object:
+            frame.size += 1
+            if parent.items is None:
+                parent.items = _Node()
+            return parent.items
+        if frame.key is None:
+            raise ValueError("Object member value without a key")
+        name, frame.key = frame.key, None
+        node = parent.properties.get(name)
+        if node is None:
+            node = parent.properties[name] = _Node()
+        return node
+
+    def _pop(self, is_object: bool) -> _Frame:
+        if not self._stack or self._stack[-1].is_object != is_object:
+            kind = "object" if is_object else "array"
+            raise ValueError(f"Unbalanced events: no open {kind} to close")
+        return self._stack.pop()
@@ -0,0 +1,155 @@
+"""
+Чтение входных файлов.
+
+Сжатие определяется по сигнатуре (magic bytes) и распаковывается потоково — без временной
+распакованной копии: gzip, bz2 и xz из стандартной библиотеки, zstd — через необязательный
+пакет ``zstandard``. Файлы JSON Lines (``.jsonl``, ``.ndjson``, в т.ч. ``.jsonl.gz``)
+читаются построчно: в памяти находится только текущий документ.
+"""
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, BinaryIO, Optional, TextIO
+
+if TYPE_CHECKING:
+    from hashlib import _Hash
+
+# сигнатура -> формат сжатия
+_MAGIC: list[tuple[bytes, str]] = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+_COMPRESSED_SUFFIXES = (".gz", ".gzip", ".bz2", ".xz", ".zst", ".zstd")
+JSON_LINES_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def detect_compression(path: str | os.PathLike[str]) -> Optional[str]:
+    """Формат сжатия файла по сигнатуре: ``gzip``, ``bz2``, ``xz``, ``zstd`` или ``None``."""
+    with open(path, "rb") as f:
+        return _compression(f.read(6))
+
+
+def _compression(head: bytes) -> Optional[str]:
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    Файл, передающий прочитанные байты в хэш: хэш и разбор видят одни и те же байты.
+    При закрытии дочитывает остаток, чтобы хэш покрывал файл целиком.
+    """
+
+    def __init__(self, raw: BinaryIO, digest: "_Hash"):
+        self._raw = raw
+        self._digest = digest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        n = self._raw.readinto(b)  # type: ignore[attr-defined]
+        if n:
+            self._digest.update(memoryview(b)[:n])
+        return int(n or 0)
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                while chunk := self._raw.read(1024 * 1024):
+                    self._digest.update(chunk)
+            finally:
+                self._raw.close()
+        super().close()
+
+
+def is_json_lines(path: str | os.PathLike[str]) -> bool:
+    """JSON Lines определяется по расширению без учёта суффикса сжатия."""
+    name = os.fspath(path).lower()
+    for suffix in _COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return name.endswith(JSON_LINES_SUFFIXES)
+
+
+class _Text(io.TextIOWrapper):
+    """Текст распакованного потока; распаковщик не закрывает переданный ему файл — закрываем мы."""
+
+    def __init__(self, stream: io.BufferedIOBase, source: BinaryIO):
+        super().__init__(stream, encoding="utf-8")  # type: ignore[arg-type]
+        self._source = source
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._source.close()
+
+
+def open_input(path: str | os.PathLike[str], digest: Optional["_Hash"] = None) -> TextIO:
+    """
+    Открывает файл как текст UTF-8, распаковывая его на лету.
+
+    :param digest: Объект :mod:`hashlib`, в который передаются байты файла (сжатые,
+        как на диске) по мере чтения. После закрытия файла он содержит хэш ровно тех байтов,
+        которые были разобраны.
+    """
+    binary: io.BufferedReader = open(path, "rb")
+    if digest is not None:
+        binary = io.BufferedReader(_HashingReader(binary, digest))
+    try:
+        compression = _compression(binary.peek(6)[:6])
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ValueError(
+                    f"{os.fspath(path)}: reading zstd input requires the 'zstandard' package"
+                ) from e
+            raw = zstandard.ZstdDecompressor().stream_reader(binary, closefd=True)
+            return io.TextIOWrapper(raw, encoding="utf-8")
+    except BaseException:
+        binary.close()
+        raise
+    if compression == "gzip":
+        return _Text(gzip.GzipFile(fileobj=binary, mode="rb"), binary)
+    if compression == "bz2":
+        return _Text(bz2.BZ2File(binary), binary)
+    if compression == "xz":
+        return _Text(lzma.LZMAFile(binary), binary)
+    return io.TextIOWrapper(binary, encoding="utf-8")
+
+
+def iter_documents(path: str | os.PathLike[str], digest: Optional["_Hash"] = None) -> Iterator[Any]:
+    """
+    Документы файла: один для JSON, по одному на непустую строку для JSON Lines.
+
+    :param digest: См. :func:`open_input`.
+    :raises ValueError: Некорректный JSON (с номером строки для JSON Lines).
+    """
+    with open_input(path, digest) as f:
+        if not is_json_lines(path):
+            try:
+                yield json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in file {os.fspath(path)}: {e}") from e
+            return
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(
+                    f"Invalid JSON in file {os.fspath(path)}, line {lineno}: {e}"
+                ) from e
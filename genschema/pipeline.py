@@ -1,78 +1,432 @@
+import functools
+import hashlib
+import itertools
 import json
 import logging
-from typing import Literal, Optional
+import re
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import asdict, dataclass, replace
+from typing import TYPE_CHECKING, Any, Literal, Optional, TextIO
 
-from .comparators import TypeComparator
-from .comparators.template import Comparator, ProcessingContext, Resource, ToDelete
+from . import __version__
+from .comparators import DeleteElement, TypeComparator
+from .comparators.columnar import ScalarBatch
+from .comparators.template import (
+    Comparator,
+    ProcessingContext,
+    Resource,
+    ResourceView,
+    ToDelete,
+)
+from .comparators.type import infer_json_types, infer_schema_type
 from .pseudo_arrays import PseudoArrayHandlerBase
+from .refs import (
+    MAX_REF_HOPS,
+    ResolvedSchema,
+    Signature,
+    definition_name,
+    local_pointer,
+    resolve_pointer,
+    siblings_digest,
+)
+from .tuples import TupleHandlerBase
+from .writer import SchemaWriter
+
+# кэш, дрейф, события и чтение файлов нужны не каждому запуску:
+# модули импортируются в использующих их методах, чтобы не удлинять import genschema
+if TYPE_CHECKING:
+    from .cache import SchemaCache
+    from .drift import Drift
 
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 
-class Converter:
+def _is_union_schema(c: object) -> bool:
+    if not isinstance(c, dict):
+        return False
+    if isinstance(c.get("type"), list):
+        return True
+    return any(isinstance(c.get(k), list) for k in ("anyOf", "oneOf"))
+
+
+def _is_ref(c: object) -> bool:
+    return isinstance(c, dict) and "$ref" in c
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern: str) -> Optional[re.Pattern[str]]:
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _matches(pattern: str, name: str) -> bool:
+    """Подходит ли ключ под регулярное выражение ``patternProperties`` (некорректное — нет)."""
+    compiled = _compile_pattern(pattern)
+    return compiled is not None and compiled.search(name) is not None
+
+
+def _load_json_file(path: str, digest: Optional["hashlib._Hash"] = None) -> list[Any]:
+    """Документы файла: сжатого или нет, JSON или JSON Lines (``digest`` — см. open_input)."""
+    from .inputs import iter_documents
+
+    return list(iter_documents(path, digest))
+
+
+def _by_id(resources: list[Resource]) -> list[Resource]:
+    """Ресурсы в порядке добавления в :class:`Converter`."""
+    return sorted(resources, key=lambda r: int(r.id))
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    it = iter(items)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+class _MergedVariant(dict):
+    """Обобщённая альтернатива, полученная схлопыванием. Обрабатывается в sealed-контексте."""
+
+
+@dataclass(frozen=True)
+class Truncation:
+    """Место, где генерация остановила спуск из-за исчерпания бюджета."""
+
+    path: str
+    reason: Literal["max_depth", "max_properties_per_object", "max_schema_nodes"]
+    limit: int
+
+
+# Формат записи кэша: {"schema": ..., "truncations": [...]}. Входит в ключ, поэтому записи
+# прежнего формата (одна схема) не читаются
+_CACHE_ENTRY = "schema+truncations"
+
+
+def _cache_get(cache: "SchemaCache", key: str) -> Optional[tuple[dict, list[Truncation]]]:
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    return entry["schema"], [Truncation(**t) for t in entry["truncations"]]
+
+
+def _cache_put(cache: "SchemaCache", key: str, schema: dict, truncations: list[Truncation]) -> None:
+    cache.put(key, {"schema": schema, "truncations": [asdict(t) for t in truncations]})
+
+
+def _is_map_schema(c: object) -> bool:
+    # объект, описанный только схемой значений (в т.ч. результат усечения)
+    return (
+        isinstance(c, dict)
+        and isinstance(c.get("additionalProperties"), dict)
+        and "properties" not in c
+        and "patternProperties" not in c
+    )
+
+
+class Pipeline:
+    """
+    Неизменяемый скомпилированный конвейер генерации схем.
+
+    Параметры и цепочка компараторов проверяются и фиксируются один раз при создании,
+    после чего :meth:`generate` вызывается без подготовки и не изменяет конвейер:
+    всё состояние прогона (идентификаторы ресурсов, бюджеты, отчёт об усечениях)
+    создаётся на каждый вызов. Поэтому один экземпляр можно переиспользовать
+    и вызывать параллельно из нескольких потоков.
+
+    Параметры совпадают с :class:`Converter` (кроме ``cache``);
+    ``comparators`` — компараторы в порядке вызова.
+    """
+
+    __slots__ = (
+        "pseudo_handler",
+        "base_of",
+        "core_comparator",
+        "comparators",
+        "max_variants",
+        "columnar",
+        "max_depth",
+        "max_properties_per_object",
+        "max_schema_nodes",
+        "canonical",
+        "tuple_handler",
+    )
+
+    pseudo_handler: Optional[PseudoArrayHandlerBase]
+    base_of: Literal["anyOf", "oneOf", "allOf"]
+    core_comparator: TypeComparator
+    comparators: tuple[Comparator, ...]
+    max_variants: Optional[int]
+    columnar: bool
+    max_depth: Optional[int]
+    max_properties_per_object: Optional[int]
+    max_schema_nodes: Optional[int]
+    canonical: bool
+    tuple_handler: Optional[TupleHandlerBase]
+
     def __init__(
         self,
+        comparators: Iterable[Comparator] = (),
         pseudo_handler: Optional[PseudoArrayHandlerBase] = None,
         base_of: Literal["anyOf", "oneOf", "allOf"] = "anyOf",
         core_comparator: Optional[TypeComparator] = None,
+        max_variants: Optional[int] = None,
+        columnar: bool = False,
+        max_depth: Optional[int] = None,
+        max_properties_per_object: Optional[int] = None,
+        max_schema_nodes: Optional[int] = None,
+        canonical: bool = False,
+        tuple_handler: Optional[TupleHandlerBase] = None,
     ):
+        for name, value in (
+            ("max_variants", max_variants),
+            ("max_properties_per_object", max_properties_per_object),
+            ("max_schema_nodes", max_schema_nodes),
+        ):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be a positive integer or None")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("max_depth must be a non-negative integer or None")
+        comparators = tuple(comparators)
+        for c in comparators:
+            if isinstance(c, TypeComparator):
+                raise UserWarning(
+                    "A TypeComparator-like comparator must be provided during initialization "
+                    "using the core_comparator attribute."
+                )
+
+        init = object.__setattr__
+        init(self, "comparators", comparators)
+        init(self, "pseudo_handler", pseudo_handler)
+        init(self, "base_of", base_of)
+        init(self, "core_comparator", core_comparator or TypeComparator())
+        init(self, "max_variants", max_variants)
+        init(self, "columnar", columnar)
+        init(self, "max_depth", max_depth)
+        init(self, "max_properties_per_object", max_properties_per_object)
+        init(self, "max_schema_nodes", max_schema_nodes)
+        init(self, "canonical", canonical)
+        init(self, "tuple_handler", tuple_handler)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def extend(self, *comparators: Comparator) -> "Pipeline":
+        """Новый конвейер с теми же параметрами и дополненной цепочкой компараторов."""
+        return Pipeline(
+            self.comparators + comparators,
+            pseudo_handler=self.pseudo_handler,
+            base_of=self.base_of,
+            core_comparator=self.core_comparator,
+            max_variants=self.max_variants,
+            columnar=self.columnar,
+            max_depth=self.max_depth,
+            max_properties_per_object=self.max_properties_per_object,
+            max_schema_nodes=self.max_schema_nodes,
+            canonical=self.canonical,
+            tuple_handler=self.tuple_handler,
+        )
+
+    def _partial(self) -> "Pipeline":
         """
-        Конвертер JSON + JSON Schema структур в JSON Schema.
+        Конвейер частичных схем, которые затем сливает этот конвейер: без обнаружения
+        псевдомассивов и без ограничения числа альтернатив. Оба решения зависят от всех
+        документов узла, поэтому принимаются один раз — при слиянии частичных схем.
+        """
+        return Pipeline(
+            self.comparators,
+            base_of=self.base_of,
+            core_comparator=self.core_comparator,
+            columnar=self.columnar,
+            max_depth=self.max_depth,
+            max_properties_per_object=self.max_properties_per_object,
+            max_schema_nodes=self.max_schema_nodes,
+            canonical=self.canonical,
+            tuple_handler=self.tuple_handler,
+        )
 
-        :param pseudo_handler: Обработчик псевдомассивов
-        (большие словари с одинаковым паттерном значений, а ключами являются индефикаторы).
-        :type pseudo_handler: Optional[PseudoArrayHandlerBase]
+    def fingerprint(self) -> str:
+        """
+        Отпечаток конфигурации: версия, обработчик псевдомассивов, компараторы и их параметры.
+        Используется как часть ключа кэша.
+        """
 
-        :param base_of: Базовый оператор объединения схем.
-        Логики определения конкретного типа Of индивидуально не предусмотрено.
-        :type base_of: Literal["anyOf", "oneOf", "allOf"]
+        def describe(obj: object) -> str:
+            if obj is None:
+                return "None"
+            cls = type(obj)
+            params = sorted(getattr(obj, "__dict__", {}).items())
+            return f"{cls.__module__}.{cls.__qualname__}{params!r}"
 
-        :param core_comparator: Базовый компаратор типов.
-        Он вынесен отдельно,
-        так как type - единственное поле без которого Converter не может построить структуру.
-        :type core_comparator: TypeComparator
+        parts = [
+            __version__,
+            self.base_of,
+            repr(self.max_variants),
+            repr(self.columnar),
+            repr((self.max_depth, self.max_properties_per_object, self.max_schema_nodes)),
+            describe(self.pseudo_handler),
+            describe(self.core_comparator),
+            *(describe(c) for c in self.comparators),
+        ]
+        if self.canonical:
+            parts.append("canonical")
+        if self.tuple_handler is not None:
+            parts.append(describe(self.tuple_handler))
+        from .cache import SchemaCache
+
+        return SchemaCache.key(*parts)
+
+    def _tracks_triggers(self) -> bool:
         """
-        self._schemas: list[Resource] = []
-        self._jsons: list[Resource] = []
-        self._comparators: list[Comparator] = []
-        self._core_comparator = core_comparator or TypeComparator()
-        self._id = 0
-        self._pseudo_handler = pseudo_handler
-        self._base_of = base_of
+        Нужны ли ``j2sElementTrigger`` узлам без альтернатив: да, если их не удаляет
+        :class:`DeleteElement` (триггеры попадают в вывод) или их читает компаратор
+        с ``needs_triggers``. Иначе списки id строятся только при разбиении на варианты.
+        """
+        compared = (self.core_comparator, *self.comparators)
+        if any(c.needs_triggers for c in compared):
+            return True
+        return not any(
+            isinstance(c, DeleteElement) and c.attribute == "j2sElementTrigger"
+            for c in self.comparators
+        )
 
-    def add_schema(self, s: dict | str) -> None:
-        if isinstance(s, str):
-            with open(s, "r") as f:
-                s = json.loads(f.read())
+    def generate(self, jsons: Iterable[Any] = (), schemas: Iterable[Any] = ()) -> dict:
+        """Схема для набора JSON-документов и (необязательно) ранее полученных схем."""
+        return self.generate_with_report(jsons, schemas)[0]
 
-        self._schemas.append(Resource(str(self._id), "schema", s))
-        self._id += 1
+    def generate_with_report(
+        self, jsons: Iterable[Any] = (), schemas: Iterable[Any] = ()
+    ) -> tuple[dict, list[Truncation]]:
+        """Как :meth:`generate`, но дополнительно возвращает места усечения."""
+        return self._generate(*self._resources(jsons, schemas))
 
-    def add_json(self, j: dict | list | str) -> None:
-        if isinstance(j, str):
-            with open(j, "r") as f:
-                j = json.loads(f.read())
+    def generate_batched(self, documents: Iterable[Any], batch_size: int = 1000) -> dict:
+        """
+        Схема для потока документов при ограниченной памяти: документы читаются пачками
+        по ``batch_size``, схема каждой пачки сливается с накопленной как частичная.
+        Подходит для больших файлов JSON Lines (см. :func:`~genschema.inputs.iter_documents`).
 
-        self._jsons.append(Resource(str(self._id), "json", j))
-        self._id += 1
+        Пачки сводятся конвейером частичных схем (см. :meth:`_partial`), а псевдомассивы
+        и ``max_variants`` применяются один раз — к накопленной схеме.
+        """
+        schema, _ = self._partial()._accumulate(documents, batch_size)
+        return self.generate() if schema is None else self.generate([], [schema])
 
-    def clear_data(self) -> None:
-        self._id = 0
-        self._jsons = []
-        self._schemas = []
+    def _accumulate(
+        self, documents: Iterable[Any], batch_size: int
+    ) -> tuple[Optional[dict], list[Truncation]]:
+        """Схема потока документов, сведённого пачками; ``None`` — документов не было."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        schema: Optional[dict] = None
+        truncations: list[Truncation] = []
+        for batch in _batched(documents, batch_size):
+            schema, found = self.generate_with_report(batch, [] if schema is None else [schema])
+            truncations += [t for t in found if t not in truncations]
+        return schema, truncations
 
-    def register(self, c: Comparator) -> None:
-        if isinstance(c, TypeComparator):
-            raise UserWarning(
-                "A TypeComparator-like comparator must be provided during initialization "
-                "using the core_comparator attribute."
-            )
-        self._comparators.append(c)
+    def write(
+        self,
+        stream: TextIO,
+        jsons: Iterable[Any] = (),
+        schemas: Iterable[Any] = (),
+        indent: Optional[int] = 2,
+    ) -> list[Truncation]:
+        """
+        Потоковый вариант :meth:`generate`: узлы схемы записываются в ``stream``
+        по мере построения (см. :class:`~genschema.writer.SchemaWriter`),
+        итоговый словарь не собирается. Возвращает места усечения.
+
+        :param indent: Отступ; ``None`` — компактный вывод.
+        """
+        writer = SchemaWriter(stream, indent)
+        _, truncations = self._generate(*self._resources(jsons, schemas), writer=writer)
+        return truncations
+
+    def _resources(
+        self, jsons: Iterable[Any], schemas: Iterable[Any]
+    ) -> tuple[list[Resource], list[Resource]]:
+        schema_resources = [Resource(str(i), "schema", s) for i, s in enumerate(schemas)]
+        offset = len(schema_resources)
+        json_resources = [Resource(str(offset + i), "json", j) for i, j in enumerate(jsons)]
+        return schema_resources, json_resources
+
+    def _generate(
+        self,
+        schemas: Sequence[Resource],
+        jsons: Sequence[Resource],
+        writer: Optional[SchemaWriter] = None,
+    ) -> tuple[dict, list[Truncation]]:
+        if self.canonical:
+            schemas, jsons = _canonical_order(schemas, jsons)
+        run = _Run(self, writer)
+        root = ProcessingContext(schemas, jsons, sealed=False, triggers=self._tracks_triggers())
+        result = run.run(root)
+        if writer is not None:
+            writer.flush()
+        return result, run.truncations
+
+
+def _canonical_order(
+    schemas: Sequence[Resource], jsons: Sequence[Resource]
+) -> tuple[list[Resource], list[Resource]]:
+    """
+    Входы, упорядоченные по хэшу содержимого и перенумерованные заново.
+
+    Порядок первого появления, от которого зависят порядок альтернатив, выбор варианта
+    в sealed-контексте и т.п., становится функцией набора входов, а не порядка их подачи.
+    """
+    from .cache import content_digest
+
+    ordered_schemas = sorted(schemas, key=lambda r: content_digest(r.content))
+    ordered_jsons = sorted(jsons, key=lambda r: content_digest(r.content))
+    offset = len(ordered_schemas)
+    return (
+        [Resource(str(i), "schema", r.content) for i, r in enumerate(ordered_schemas)],
+        [Resource(str(offset + i), "json", r.content) for i, r in enumerate(ordered_jsons)],
+    )
+
+
+class _Run:
+    """Обход одного прогона конвейера; создаётся на каждый вызов и хранит его состояние."""
+
+    def __init__(self, pipeline: Pipeline, writer: Optional[SchemaWriter] = None):
+        self._writer = writer
+        self._pseudo_handler = pipeline.pseudo_handler
+        self._base_of = pipeline.base_of
+        self._core_comparator = pipeline.core_comparator
+        self._comparators = pipeline.comparators
+        self._max_variants = pipeline.max_variants
+        self._columnar = pipeline.columnar
+        self._max_depth = pipeline.max_depth
+        self._max_properties = pipeline.max_properties_per_object
+        self._max_nodes = pipeline.max_schema_nodes
+        self._canonical = pipeline.canonical
+        self._tuple_handler = pipeline.tuple_handler
+        self._nodes = 0  # пройдено узлов за прогон
+        self._pending = 0  # зарезервировано родителями, но ещё не пройдено
+        self.truncations: list[Truncation] = []
+        # $ref: корневые схемы по id, разыменованные указатели, определения результата
+        self._roots: dict[str, Any] = {}
+        self._targets: dict[tuple[str, str], Any] = {}
+        self._ref_names: dict[tuple[Signature, ...], str] = {}
+        self._defs: dict[str, dict] = {}
+        self._streaming = False  # корень уже начат в потоковом выводе
+
+    def run(self, ctx: ProcessingContext) -> dict:
+        """Обход от корня; определения, на которые сослались узлы, попадают в ``$defs``."""
+        self._roots = {s.id: s.content for s in ctx.schemas}
+        result = self._run_level(ctx, "/", {})
+        if self._defs and self._writer is None:
+            result["$defs"] = self._defs
+        return result
 
     # ---------------- utils ----------------
 
-    def _collect_prop_names(self, schemas: list[Resource], jsons: list[Resource]) -> list[str]:
+    def _collect_prop_names(
+        self, schemas: Iterable[Resource], jsons: Iterable[Resource]
+    ) -> list[str]:
         names = set()
         for s in schemas:
             c = s.content
@@ -83,85 +437,331 @@ class Converter:
                 names.update(j.content.keys())
         return sorted(names)
 
-    def _gather_property_candidates(
-        self, schemas: list[Resource], jsons: list[Resource], prop: str
-    ) -> tuple[list[Resource], list[Resource]]:
-        s_out, j_out = [], []
+    def _node_prop_names(self, ctx: ProcessingContext) -> list[str]:
+        """Имена свойств узла: ключи JSON берутся из сводки узла, а не новым обходом."""
+        return sorted(ctx.summary.keys.union(self._collect_prop_names(ctx.schemas, ())))
 
-        for s in schemas:
-            c = s.content
-            if isinstance(c, dict) and prop in c.get("properties", {}):
-                s_out.append(Resource(f"{s.id}/{prop}", "schema", c["properties"][prop]))
+    def _gather_property_candidates(
+        self, schemas: Sequence[Resource], jsons: Sequence[Resource], prop: str
+    ) -> tuple[ResourceView, ResourceView]:
+        def iter_schemas() -> Iterator[Resource]:
+            for s in schemas:
+                c = s.content
+                if not isinstance(c, dict):
+                    continue
+                if prop in c.get("properties", {}):
+                    yield Resource(f"{s.id}/{prop}", "schema", c["properties"][prop])
+                # ключ, описанный ранее только шаблоном, сливается со схемой шаблона
+                for pattern, sub in c.get("patternProperties", {}).items():
+                    if _matches(pattern, prop):
+                        yield Resource(f"{s.id}/patternProperties/{pattern}", "schema", sub)
 
-        for j in jsons:
-            if isinstance(j.content, dict) and prop in j.content:
-                j_out.append(Resource(f"{j.id}/{prop}", "json", j.content[prop]))
+        def iter_jsons() -> Iterator[Resource]:
+            for j in jsons:
+                if isinstance(j.content, dict) and prop in j.content:
+                    yield Resource(f"{j.id}/{prop}", "json", j.content[prop])
 
-        return s_out, j_out
+        return ResourceView(iter_schemas), ResourceView(iter_jsons)
 
     def _split_array_ctx(
-        self, ctx: ProcessingContext
+        self, ctx: ProcessingContext, pseudo: bool = False
     ) -> tuple[ProcessingContext, ProcessingContext]:
-        obj_jsons = []
-        item_jsons = []
+        """
+        Делит контекст на ресурсы, не являющиеся массивами, и элементы массивов.
+        При ``pseudo`` (узел уже признан псевдомассивом) элементами считаются и значения
+        объектов. Обе части — ленивые представления поверх ``ctx``.
+        """
 
-        for j in ctx.jsons:
-            c = j.content
-            if isinstance(c, list):
-                for i, el in enumerate(c):
-                    item_jsons.append(Resource(f"{j.id}/{i}", "json", el))
-            elif isinstance(c, dict):
-                keys = self._collect_prop_names([], [j])
-                if self._pseudo_handler and self._pseudo_handler.is_pseudo_array(keys, ctx):
-                    sorted_keys = sorted(keys, key=lambda k: int(k) if k.isdigit() else -1)
-                    for i, k in enumerate(sorted_keys):
-                        item_jsons.append(Resource(f"{j.id}/{i}", "json", c[k]))
-                else:
-                    obj_jsons.append(j)
-            else:
-                obj_jsons.append(j)
+        def view(resources: Sequence[Resource], items: bool) -> ResourceView:
+            return ResourceView(lambda: self._iter_split(resources, items, pseudo))
+
+        return (
+            ProcessingContext(
+                view(ctx.schemas, False),
+                view(ctx.jsons, False),
+                ctx.sealed,
+                depth=ctx.depth,
+                triggers=ctx.triggers,
+            ),
+            ProcessingContext(
+                view(ctx.schemas, True),
+                view(ctx.jsons, True),
+                ctx.sealed,
+                depth=ctx.depth + 1,
+                triggers=ctx.triggers,
+            ),
+        )
 
-        obj_schemas = []
-        item_schemas = []
+    def _iter_split(
+        self, resources: Sequence[Resource], items: bool, pseudo: bool
+    ) -> Iterator[Resource]:
+        for r in resources:
+            children = (
+                self._array_item_jsons(r, pseudo)
+                if r.type == "json"
+                else self._array_item_schemas(r, pseudo)
+            )
+            if children is None:
+                if not items:
+                    yield r
+            elif items:
+                yield from children
+
+    def _array_item_jsons(self, j: Resource, pseudo: bool) -> Optional[Iterator[Resource]]:
+        c = j.content
+        if isinstance(c, list):
+            return (Resource(f"{j.id}/{i}", "json", el) for i, el in enumerate(c))
+        if pseudo and isinstance(c, dict):
+            keys = self._collect_prop_names([], [j])
+            sorted_keys = sorted(keys, key=lambda k: int(k) if k.isdigit() else -1)
+            return (Resource(f"{j.id}/{i}", "json", c[k]) for i, k in enumerate(sorted_keys))
+        return None
+
+    def _array_item_schemas(self, s: Resource, pseudo: bool) -> Optional[Iterator[Resource]]:
+        c = s.content
+        if not isinstance(c, dict):
+            return None
+        t = c.get("type")
+        if t == "array" and ("items" in c or "prefixItems" in c):
+            # позиции кортежа сливаются в общую схему элементов
+            return itertools.chain(
+                (
+                    Resource(f"{s.id}/prefixItems/{i}", "schema", sub)
+                    for i, sub in enumerate(c.get("prefixItems", ()))
+                ),
+                (
+                    (Resource(f"{s.id}/items", "schema", c["items"]),)
+                    if c.get("items", False) is not False
+                    else ()
+                ),
+            )
+        if t == "object" and "patternProperties" in c and "properties" not in c:
+            return (
+                Resource(f"{s.id}/patternProperties/{i}", "schema", sub)
+                for i, sub in enumerate(c["patternProperties"].values())
+            )
+        if pseudo and t == "object" and "properties" in c:
+            props = c["properties"]
+            sorted_keys = sorted(sorted(props), key=lambda k: int(k) if k.isdigit() else -1)
+            return (Resource(f"{s.id}/{i}", "schema", props[k]) for i, k in enumerate(sorted_keys))
+        return None
 
+    def _schema_patterns(self, schemas: Iterable[Resource]) -> list[str]:
+        patterns: list[str] = []
+        for s in schemas:
+            c = s.content
+            if isinstance(c, dict) and isinstance(c.get("patternProperties"), dict):
+                patterns.extend(p for p in c["patternProperties"] if p not in patterns)
+        return patterns
+
+    def _expand_schema_unions(self, ctx: ProcessingContext) -> ProcessingContext:
+        """
+        Раскрывает входные схемы-объединения (``anyOf``/``oneOf`` без ``type``,
+        а также ``type`` в виде списка) в отдельные ресурсы-ветви,
+        чтобы ранее сгенерированные схемы сливались так же, как исходные JSON.
+        Ссылки ``$ref`` в ветвях разыменовываются.
+        """
+        if not any(_is_union_schema(s.content) or _is_ref(s.content) for s in ctx.schemas):
+            return ctx
+        return replace(ctx, schemas=list(self._iter_union_branches(ctx.schemas)))
+
+    # ---------------- $ref ----------------
+
+    def _resolve(self, s: Resource) -> Optional[Resource]:
+        """
+        Схема ``s`` с разыменованной локальной ссылкой (и цепочкой ссылок за ней);
+        ``None`` для внешних, неразрешимых и циклических ссылок.
+        """
+        root_id = s.id.split("/", 1)[0]
+        if root_id not in self._roots:
+            return None
+        content: Any = s.content
+        siblings: dict[str, Any] = {}
+        first: Optional[str] = None
+        for _ in range(MAX_REF_HOPS):
+            pointer = local_pointer(content.get("$ref"))
+            if pointer is None:
+                return None
+            # ключевые слова внешней ссылки важнее ключевых слов определения
+            siblings = {**{k: v for k, v in content.items() if k != "$ref"}, **siblings}
+            first = pointer if first is None else first
+            key = (root_id, pointer)
+            if key not in self._targets:
+                try:
+                    self._targets[key] = resolve_pointer(self._roots[root_id], pointer)
+                except LookupError as e:
+                    logger.debug("%s in schema %s", e, root_id)
+                    self._targets[key] = None
+            content = self._targets[key]
+            if not isinstance(content, dict):
+                return None
+            if "$ref" not in content:
+                signature = (root_id, first, siblings_digest(siblings))
+                return Resource(s.id, "schema", ResolvedSchema({**content, **siblings}, signature))
+        return None
+
+    def _resolve_refs(self, ctx: ProcessingContext) -> ProcessingContext:
+        if not any(_is_ref(s.content) for s in ctx.schemas):
+            return ctx
+        return replace(ctx, schemas=[self._resolve(s) or s for s in ctx.schemas])
+
+    def _ref_signature(self, ctx: ProcessingContext, env: str) -> Optional[tuple[Signature, ...]]:
+        """
+        Подпись узла, целиком описанного определениями: только разыменованные схемы,
+        без JSON. Такой узел не зависит от места, где на него сослались.
+        """
+        if env == "/" or ctx.sealed or not ctx.schemas or ctx.jsons:
+            return None
+        signatures = set()
         for s in ctx.schemas:
+            if not isinstance(s.content, ResolvedSchema):
+                return None
+            signatures.add(s.content.signature)
+        return tuple(sorted(signatures))
+
+    def _run_ref(self, ctx: ProcessingContext, signature: tuple[Signature, ...]) -> dict:
+        """
+        Ссылка на определение результата. Определение обрабатывается при первой встрече
+        подписи; рекурсивная ссылка на ещё строящееся определение замыкается на его имя.
+        """
+        name = self._ref_names.get(signature)
+        if name is None:
+            base = definition_name(signature[0][1])
+            name, n = base, 1
+            while name in self._defs:
+                n += 1
+                name = f"{base}{n}"
+            self._ref_names[signature] = name
+            self._defs[name] = {}  # место в порядке первой встречи
+            def_ctx = replace(
+                ctx, schemas=[Resource(s.id, "schema", dict(s.content)) for s in ctx.schemas]
+            )
+            # определение не пишется в поток по месту: оно выводится в $defs корня
+            self._defs[name] = self._run_detached(def_ctx, f"/$defs/{name}")
+        return self._leaf({"$ref": f"#/$defs/{name}"})
+
+    def _run_detached(self, ctx: ProcessingContext, env: str) -> dict:
+        """Узел, собираемый целиком в памяти даже при потоковом выводе."""
+        writer, self._writer = self._writer, None
+        try:
+            return self._run_level(ctx, env, {})
+        finally:
+            self._writer = writer
+
+    def _iter_union_branches(self, schemas: Iterable[Resource]) -> Iterator[Resource]:
+        for s in schemas:
             c = s.content
-            if isinstance(c, dict):
-                t = c.get("type")
-                if t == "array" and "items" in c:
-                    item_schemas.append(Resource(f"{s.id}/items", "schema", c["items"]))
-                elif t == "object" and "properties" in c:
-                    keys = sorted(c["properties"].keys())
-                    if self._pseudo_handler and self._pseudo_handler.is_pseudo_array(keys, ctx):
-                        sorted_keys = sorted(keys, key=lambda k: int(k) if k.isdigit() else -1)
-                        for i, k in enumerate(sorted_keys):
-                            item_schemas.append(
-                                Resource(f"{s.id}/{i}", "schema", c["properties"][k])
-                            )
-                    else:
-                        obj_schemas.append(s)
+            if _is_ref(c):
+                resolved = self._resolve(s)
+                if resolved is None:
+                    yield s
                 else:
-                    obj_schemas.append(s)
+                    yield from self._iter_union_branches([resolved])
+            elif not _is_union_schema(c):
+                yield s
+            elif isinstance(c.get("type"), list):
+                for t in c["type"]:
+                    yield Resource(f"{s.id}/type/{t}", "schema", {**c, "type": t})
             else:
-                obj_schemas.append(s)
+                # ветвь наследует соседние ключевые слова (type, $schema...)
+                key = "anyOf" if "anyOf" in c else "oneOf"
+                shared = {k: v for k, v in c.items() if k != key}
+                yield from self._iter_union_branches(
+                    Resource(f"{s.id}/{key}/{i}", "schema", {**shared, **branch})
+                    for i, branch in enumerate(c[key])
+                )
 
-        return (
-            ProcessingContext(obj_schemas, obj_jsons, ctx.sealed),
-            ProcessingContext(item_schemas, item_jsons, ctx.sealed),
-        )
+    def _partition_ctx(self, ctx: ProcessingContext, alts: list[dict]) -> list[ProcessingContext]:
+        """
+        Разбивает контекст по альтернативам за один проход.
 
-    def _filter_ctx_by_ids(self, ctx: ProcessingContext, ids: set) -> ProcessingContext:
-        if not ids:
-            return ctx
-        schemas = [s for s in ctx.schemas if s.id in ids]
-        jsons = [j for j in ctx.jsons if j.id in ids]
-        return ProcessingContext(schemas, jsons, ctx.sealed)
+        Индекс ``id -> номера альтернатив`` строится по ``j2sElementTrigger``,
+        поэтому стоимость O(n + сумма триггеров), а не O(n × число альтернатив).
+        Альтернатива без триггеров получает весь контекст.
+        """
+        owners: dict[str, list[int]] = {}
+        for idx, alt in enumerate(alts):
+            for rid in alt.get("j2sElementTrigger", []):
+                owners.setdefault(rid, []).append(idx)
+
+        schemas: list[list[Resource]] = [[] for _ in alts]
+        jsons: list[list[Resource]] = [[] for _ in alts]
+        for s in ctx.schemas:
+            for idx in owners.get(s.id, ()):
+                schemas[idx].append(s)
+        for j in ctx.jsons:
+            for idx in owners.get(j.id, ()):
+                jsons[idx].append(j)
+
+        return [
+            (
+                ProcessingContext(
+                    schemas[idx], jsons[idx], ctx.sealed, depth=ctx.depth, triggers=ctx.triggers
+                )
+                if alt.get("j2sElementTrigger")
+                else ctx
+            )
+            for idx, alt in enumerate(alts)
+        ]
+
+    def _limit_variants(self, alts: list[dict]) -> list[dict]:
+        """
+        Ограничивает число альтернатив значением ``max_variants``.
+
+        Сохраняются самые многочисленные варианты (в исходном порядке),
+        остальные объединяются через :meth:`_merge_variants`.
+        """
+        if self._max_variants is None or len(alts) <= self._max_variants:
+            return alts
+
+        keep_count = self._max_variants - 1
+        ranked = sorted(range(len(alts)), key=lambda i: -len(alts[i].get("j2sElementTrigger", [])))
+        keep = set(ranked[:keep_count])
+        merged = self._merge_variants([alt for i, alt in enumerate(alts) if i not in keep])
+        return [alt for i, alt in enumerate(alts) if i in keep] + [merged]
+
+    def _merge_variants(self, alts: list[dict]) -> dict:
+        """
+        Стратегия схлопывания лишних альтернатив: обобщённый вариант,
+        допускающий все их типы. Прочие ключевые слова (format, properties...)
+        отбрасываются, так как перестают быть общими для всех источников.
+        """
+        types: list[str] = []
+        triggers: set[str] = set()
+        for alt in alts:
+            t = alt.get("type")
+            for item in t if isinstance(t, list) else [t]:
+                if isinstance(item, str) and item not in types:
+                    types.append(item)
+            triggers.update(alt.get("j2sElementTrigger", []))
+
+        merged = _MergedVariant()
+        if len(types) == 1:
+            merged["type"] = types[0]
+        elif types:
+            merged["type"] = types
+        if triggers:
+            merged["j2sElementTrigger"] = sorted(triggers)
+        return merged
 
     # ---------------- core ----------------
 
     def _run_level(self, ctx: ProcessingContext, env: str, prev: dict) -> dict:
         logger.debug("Entering _run_level: env=%s, prev_result=%s", env, prev)
+        self._nodes += 1
+        if self._pending:
+            self._pending -= 1  # узел был зарезервирован родителем
         node = dict(prev)
+        ctx = self._resolve_refs(ctx)
+        signature = self._ref_signature(ctx, env)
+        if signature is not None:
+            return self._run_ref(ctx, signature)
+        ctx = self._expand_schema_unions(ctx)
+
+        if self._columnar and ctx.batch is None and ctx.jsons:
+            batch = ScalarBatch.collect(ctx.jsons)
+            if batch is not None:
+                ctx = replace(ctx, batch=batch)
 
         def use_comp(comp: Comparator) -> bool:
             if not comp.can_process(ctx, env, node):
@@ -171,17 +771,33 @@ class Converter:
             if g:
                 node.update(g)
             if alts:
-                node.setdefault(self._base_of, []).extend(alts)
+                alts = self._limit_variants(alts)
+                if len(alts) == 1:
+                    node.update(alts[0])
+                else:
+                    node.setdefault(self._base_of, []).extend(alts)
             return True
 
         # Вызов базового компаратора
         use_comp(self._core_comparator)
 
+        # Узлы с потомками обходятся многократно — фиксируем ленивые представления.
+        # Листья (скаляры) остаются ленивыми и не создают списков ресурсов.
+        if node.get("type") in ("object", "array") or self._base_of in node:
+            ctx.materialize()
+
         # Определение является ли объект псевдомассивом
+        props: list[str] = []
         if node.get("type") == "object":
-            props = self._collect_prop_names(ctx.schemas, ctx.jsons)
+            props = self._node_prop_names(ctx)
             if self._pseudo_handler:
-                is_pseudo_array, pattern = self._pseudo_handler.is_pseudo_array(props, ctx)
+                pattern: Optional[str]
+                patterns = self._schema_patterns(ctx.schemas)
+                if not props and patterns:
+                    # псевдомассив, пришедший из ранее сгенерированной схемы
+                    is_pseudo_array, pattern = True, patterns[0]
+                else:
+                    is_pseudo_array, pattern = self._pseudo_handler.is_pseudo_array(props, ctx)
                 node["isPseudoArray"] = is_pseudo_array
             else:
                 # node["isPseudoArray"] = False
@@ -201,61 +817,319 @@ class Converter:
 
         # если есть Of — обработаем каждую альтернативу через _run_level
         if self._base_of in node:
-            new_of = []
-            for idx, alt in enumerate(node[self._base_of]):
-                alt_ids = set(alt.get("j2sElementTrigger", []))
-                alt_ctx = self._filter_ctx_by_ids(ctx, alt_ids) if alt_ids else ctx
-                processed_alt = self._run_level(alt_ctx, env + f"/{self._base_of}/{idx}", alt)
-                new_of.append(processed_alt)
-            node[self._base_of] = new_of
+            alts = node[self._base_of]
+            self._pending += len(alts)
+            node = self._descend(
+                node, self._base_of, "list", self._iter_alternatives(ctx, env, alts)
+            )
             logger.debug(
                 "Exiting _run_level (%s handled): env=%s, node=%s", self._base_of, env, node
             )
             return node
 
+        # массив-кортеж определяется до спуска — по длинам и типам позиций
+        tuple_length: Optional[int] = None
+        if node.get("type") == "array" and self._tuple_handler is not None:
+            tuple_length = self._tuple_handler.tuple_length(ctx)
+
         # recursion based on type
+        if node.get("type") in ("object", "array"):
+            wide = node["type"] == "object" and not is_pseudo_array and self._is_wide(ctx, props)
+            width = tuple_length or (
+                len(props) if node["type"] == "object" and not is_pseudo_array and not wide else 1
+            )
+            exceeded = self._exceeded_budget(ctx, width)
+            if exceeded is not None:
+                return self._leaf(self._truncate(ctx, env, node, *exceeded))
+            self._pending += width
+            if wide:
+                if self._max_properties is not None and len(props) > self._max_properties:
+                    self._record(env, "max_properties_per_object", self._max_properties)
+                return self._run_wide_object(ctx, env, node)
+
         if node.get("type") == "object":
             if is_pseudo_array:
                 node = self._run_pseudo_array(ctx, env, node, str(pattern))
             else:
                 node = self._run_object(ctx, env, node)
         elif node.get("type") == "array":
-            node = self._run_array(ctx, env, node)
+            if tuple_length:
+                node = self._run_tuple(ctx, env, node, tuple_length)
+            else:
+                node = self._run_array(ctx, env, node)
+        else:
+            self._leaf(node)
 
         logger.debug("Exiting _run_level: env=%s, node=%s", env, node)
         return node
 
+    def _iter_alternatives(
+        self, ctx: ProcessingContext, env: str, alts: list[dict]
+    ) -> Iterator[tuple[Any, ProcessingContext, str, dict]]:
+        for idx, (alt, alt_ctx) in enumerate(zip(alts, self._partition_ctx(ctx, alts))):
+            if isinstance(alt, _MergedVariant):
+                alt_ctx = replace(alt_ctx, sealed=True, batch=None)
+            yield idx, alt_ctx, f"{env}/{self._base_of}/{idx}", alt
+
+    # ---------------- descent ----------------
+
+    def _descend(
+        self,
+        node: dict,
+        key: str,
+        shape: Literal["map", "list", "single"],
+        children: Iterable[tuple[Any, ProcessingContext, str, dict]],
+    ) -> dict:
+        """
+        Обход потомков узла, хранящихся под ``key``: словарь ``имя -> схема`` (``map``),
+        список альтернатив (``list``) или одна схема (``single``).
+        Потомки заданы кортежами ``(имя, контекст, путь, исходная схема)``.
+
+        При потоковом выводе узел записывается по ходу обхода: ключевые слова до ``key``,
+        потомки, затем остальные ключевые слова. Записанные потомки в узле не сохраняются.
+        """
+        children = iter(children)
+        first = next(children, None)
+        if first is None:
+            if shape == "map" and not node[key]:
+                node.pop(key)
+            return self._leaf(node)
+
+        writer = self._writer
+        if writer is None:
+            results = [
+                (name, self._run_level(sub_ctx, sub_env, prev))
+                for name, sub_ctx, sub_env, prev in itertools.chain([first], children)
+            ]
+            if shape == "map":
+                node[key].update(results)
+            elif shape == "list":
+                node[key] = [result for _, result in results]
+            else:
+                node[key] = results[0][1]
+            return node
+
+        is_root, self._streaming = not self._streaming, True
+        members = list(node.items())
+        pos = [k for k, _ in members].index(key)
+        writer.begin_object()
+        for k, v in members[:pos]:
+            writer.key(k)
+            writer.value(v)
+        writer.key(key)
+        if shape == "map":
+            writer.begin_object()
+        elif shape == "list":
+            writer.begin_array()
+        for name, sub_ctx, sub_env, prev in itertools.chain([first], children):
+            if shape == "map":
+                writer.key(name)
+            self._run_level(sub_ctx, sub_env, prev)
+        if shape == "map":
+            writer.end_object()
+        elif shape == "list":
+            writer.end_array()
+        for k, v in members[pos + 1 :]:
+            writer.key(k)
+            writer.value(v)
+        if is_root and self._defs:
+            writer.key("$defs")
+            writer.value(self._defs)
+        writer.end_object()
+        return node
+
+    def _leaf(self, node: dict) -> dict:
+        """Узел без спуска: при потоковом выводе записывается целиком."""
+        if self._writer is not None:
+            self._writer.value(node)
+        return node
+
     # ---------------- object ----------------
 
     def _run_object(self, ctx: ProcessingContext, env: str, node: dict) -> dict:
         node = dict(node)
         node.setdefault("properties", {})
+        props = self._node_prop_names(ctx)
+        patterns = self._schema_patterns(ctx.schemas)
+        if patterns:
+            # ранее сгенерированная схема описала часть ключей только шаблоном: имена
+            # этих ключей неизвестны, поэтому шаблон сохраняется рядом с properties
+            node["patternProperties"] = {
+                pattern: self._run_detached(
+                    self._pattern_ctx(ctx, pattern, props), f"{env}/patternProperties/{pattern}"
+                )
+                for pattern in patterns
+            }
+        return self._descend(
+            node, "properties", "map", self._iter_properties(ctx, env, node, props)
+        )
 
-        props = self._collect_prop_names(ctx.schemas, ctx.jsons)
+    def _pattern_ctx(
+        self, ctx: ProcessingContext, pattern: str, props: list[str]
+    ) -> ProcessingContext:
+        """
+        Схемы шаблона и все значения подходящих под него ключей: ключ проверяется
+        и по ``properties``, и по ``patternProperties``, поэтому шаблон описывает их все.
+        """
+        matching = [name for name in props if _matches(pattern, name)]
+
+        def iter_schemas() -> Iterator[Resource]:
+            for s in ctx.schemas:
+                c = s.content
+                if not isinstance(c, dict):
+                    continue
+                if pattern in c.get("patternProperties", {}):
+                    sub = c["patternProperties"][pattern]
+                    yield Resource(f"{s.id}/patternProperties/{pattern}", "schema", sub)
+                for name in matching:
+                    if name in c.get("properties", {}):
+                        yield Resource(f"{s.id}/{name}", "schema", c["properties"][name])
+
+        def iter_jsons() -> Iterator[Resource]:
+            for j in ctx.jsons:
+                if isinstance(j.content, dict):
+                    for name in matching:
+                        if name in j.content:
+                            yield Resource(f"{j.id}/{name}", "json", j.content[name])
+
+        return ProcessingContext(
+            ResourceView(iter_schemas),
+            ResourceView(iter_jsons),
+            ctx.sealed,
+            depth=ctx.depth + 1,
+            triggers=ctx.triggers,
+        )
+
+    def _iter_properties(
+        self, ctx: ProcessingContext, env: str, node: dict, props: list[str]
+    ) -> Iterator[tuple[Any, ProcessingContext, str, dict]]:
         for name in props:
             s, j = self._gather_property_candidates(ctx.schemas, ctx.jsons, name)
-            sub_ctx = ProcessingContext(s, j, ctx.sealed)
-            node["properties"][name] = self._run_level(
-                sub_ctx, f"{env}/properties/{name}", node["properties"].get(name, {})
+            sub_ctx = ProcessingContext(
+                s, j, ctx.sealed, depth=ctx.depth + 1, triggers=ctx.triggers
             )
+            yield name, sub_ctx, f"{env}/properties/{name}", node["properties"].get(name, {})
+
+    # ---------------- budgets ----------------
+
+    def _is_wide(self, ctx: ProcessingContext, props: list[str]) -> bool:
+        if self._max_properties is not None and len(props) > self._max_properties:
+            return True
+        # ранее усечённая схема остаётся усечённой при слиянии
+        return any(_is_map_schema(s.content) for s in ctx.schemas)
+
+    def _exceeded_budget(
+        self, ctx: ProcessingContext, width: int
+    ) -> Optional[tuple[Literal["max_depth", "max_schema_nodes"], int]]:
+        """Какой бюджет не позволяет спуститься в потомков узла (``width`` — их число)."""
+        if self._max_depth is not None and ctx.depth >= self._max_depth:
+            return "max_depth", self._max_depth
+        if self._max_nodes is not None and self._nodes + self._pending + width > self._max_nodes:
+            return "max_schema_nodes", self._max_nodes
+        return None
+
+    def _record(
+        self,
+        env: str,
+        reason: Literal["max_depth", "max_properties_per_object", "max_schema_nodes"],
+        limit: int,
+    ) -> None:
+        self.truncations.append(Truncation("/" + env.lstrip("/"), reason, limit))
+
+    def _iter_child_schemas(self, schemas: Iterable[Resource]) -> Iterator[Resource]:
+        for s in schemas:
+            c = s.content
+            if not isinstance(c, dict):
+                continue
+            for key in ("properties", "patternProperties"):
+                for name, sub in self._items(c.get(key, {})):
+                    yield Resource(f"{s.id}/{key}/{name}", "schema", sub)
+            for i, sub in enumerate(c.get("prefixItems", ())):
+                yield Resource(f"{s.id}/prefixItems/{i}", "schema", sub)
+            for key in ("additionalProperties", "items"):
+                if isinstance(c.get(key), dict):
+                    yield Resource(f"{s.id}/{key}", "schema", c[key])
+
+    def _iter_child_jsons(self, jsons: Iterable[Resource]) -> Iterator[Resource]:
+        for j in jsons:
+            c = j.content
+            if isinstance(c, dict):
+                for key, value in self._items(c):
+                    yield Resource(f"{j.id}/{key}", "json", value)
+            elif isinstance(c, list):
+                for i, value in enumerate(c):
+                    yield Resource(f"{j.id}/{i}", "json", value)
 
-        if not node["properties"]:
-            node.pop("properties", None)
+    def _items(self, d: dict) -> Iterable[tuple[str, Any]]:
+        # в каноническом режиме порядок ключей объекта не влияет на результат
+        return sorted(d.items()) if self._canonical else d.items()
 
+    def _truncate(
+        self,
+        ctx: ProcessingContext,
+        env: str,
+        node: dict,
+        reason: Literal["max_depth", "max_schema_nodes"],
+        limit: int,
+    ) -> dict:
+        """
+        Обобщённая схема вместо спуска: перечень типов значений объекта или элементов массива.
+        """
+        node = dict(node)
+        for key in ("properties", "patternProperties", "additionalProperties", "required"):
+            node.pop(key, None)
+        node.pop("items", None)
+        node.pop("prefixItems", None)
+
+        types: list[str] = []
+        for r in self._iter_union_branches(self._iter_child_schemas(ctx.schemas)):
+            t = infer_schema_type(r.content)
+            if t and t not in types:
+                types.append(t)
+        for t in infer_json_types(r.content for r in self._iter_child_jsons(ctx.jsons)):
+            if t not in types:
+                types.append(t)
+        if "number" in types and "integer" in types:
+            types.remove("integer")
+
+        if types:
+            key = "additionalProperties" if node["type"] == "object" else "items"
+            node[key] = {"type": types[0] if len(types) == 1 else types}
+        self._record(env, reason, limit)
         return node
 
+    def _run_wide_object(self, ctx: ProcessingContext, env: str, node: dict) -> dict:
+        """Слияние значений всех ключей слишком широкого объекта в одну схему."""
+        node = dict(node)
+        for key in ("properties", "patternProperties", "required"):
+            node.pop(key, None)
+        values_ctx = ProcessingContext(
+            ResourceView(lambda: self._iter_child_schemas(ctx.schemas)),
+            ResourceView(lambda: self._iter_child_jsons(ctx.jsons)),
+            ctx.sealed,
+            depth=ctx.depth + 1,
+            triggers=ctx.triggers,
+        )
+        node["additionalProperties"] = {}
+        return self._descend(
+            node,
+            "additionalProperties",
+            "single",
+            [(None, values_ctx, f"{env}/additionalProperties", {})],
+        )
+
     # ---------------- pseudo array ----------------
 
     def _run_pseudo_array(self, ctx: ProcessingContext, env: str, node: dict, pattern: str) -> dict:
         node = dict(node)
         node.setdefault("patternProperties", {})
-        _, items_ctx = self._split_array_ctx(ctx)
-        node["patternProperties"][pattern] = self._run_level(
-            items_ctx, f"{env}/patternProperties/{pattern}", {}
+        _, items_ctx = self._split_array_ctx(ctx, pseudo=True)
+        return self._descend(
+            node,
+            "patternProperties",
+            "map",
+            [(pattern, items_ctx, f"{env}/patternProperties/{pattern}", {})],
         )
-        if not node["patternProperties"]:
-            node.pop("patternProperties", None)
-        return node
 
     # ---------------- array ----------------
 
@@ -264,12 +1138,426 @@ class Converter:
         node.setdefault("items", {})
 
         _, items_ctx = self._split_array_ctx(ctx)
-        node["items"] = self._run_level(items_ctx, f"{env}/items", node.get("items", {}))
+        return self._descend(
+            node, "items", "single", [(None, items_ctx, f"{env}/items", node.get("items", {}))]
+        )
 
-        return node
+    def _run_tuple(self, ctx: ProcessingContext, env: str, node: dict, length: int) -> dict:
+        """Позиционная схема: ``prefixItems`` по схеме на позицию, лишние элементы запрещены."""
+        node = dict(node)
+        node.pop("items", None)
+        node["prefixItems"] = []
+        node["items"] = False
+        return self._descend(node, "prefixItems", "list", self._iter_positions(ctx, env, length))
+
+    def _iter_positions(
+        self, ctx: ProcessingContext, env: str, length: int
+    ) -> Iterator[tuple[Any, ProcessingContext, str, dict]]:
+        def iter_schemas(i: int) -> Iterator[Resource]:
+            for s in ctx.schemas:
+                yield Resource(f"{s.id}/prefixItems/{i}", "schema", s.content["prefixItems"][i])
+
+        def iter_jsons(i: int) -> Iterator[Resource]:
+            for j in ctx.jsons:
+                yield Resource(f"{j.id}/{i}", "json", j.content[i])
+
+        for i in range(length):
+            sub_ctx = ProcessingContext(
+                ResourceView(functools.partial(iter_schemas, i)),
+                ResourceView(functools.partial(iter_jsons, i)),
+                ctx.sealed,
+                depth=ctx.depth + 1,
+                triggers=ctx.triggers,
+            )
+            yield i, sub_ctx, f"{env}/prefixItems/{i}", {}
+
+
+class Converter:
+    def __init__(
+        self,
+        pseudo_handler: Optional[PseudoArrayHandlerBase] = None,
+        base_of: Literal["anyOf", "oneOf", "allOf"] = "anyOf",
+        core_comparator: Optional[TypeComparator] = None,
+        max_variants: Optional[int] = None,
+        columnar: bool = False,
+        cache: Optional["SchemaCache"] = None,
+        max_depth: Optional[int] = None,
+        max_properties_per_object: Optional[int] = None,
+        max_schema_nodes: Optional[int] = None,
+        canonical: bool = False,
+        tuple_handler: Optional[TupleHandlerBase] = None,
+    ):
+        """
+        Конвертер JSON + JSON Schema структур в JSON Schema.
+
+        :param pseudo_handler: Обработчик псевдомассивов
+        (большие словари с одинаковым паттерном значений, а ключами являются индефикаторы).
+        :type pseudo_handler: Optional[PseudoArrayHandlerBase]
+
+        :param base_of: Базовый оператор объединения схем.
+        Логики определения конкретного типа Of индивидуально не предусмотрено.
+        :type base_of: Literal["anyOf", "oneOf", "allOf"]
+
+        :param core_comparator: Базовый компаратор типов.
+        Он вынесен отдельно,
+        так как type - единственное поле без которого Converter не может построить структуру.
+        :type core_comparator: TypeComparator
+
+        :param max_variants: Максимальное количество альтернатив в одном узле.
+        Если компаратор вернул больше вариантов, самые малочисленные (по числу источников)
+        схлопываются в один обобщённый вариант с перечнем типов, без дальнейшего спуска.
+        ``None`` - без ограничений.
+        :type max_variants: Optional[int]
+
+        :param columnar: Колоночная обработка скалярных листьев.
+        Значения листа один раз собираются в типизированные пачки (:class:`ScalarBatch`),
+        по которым компараторы считают типы, форматы и статистики целиком.
+        :type columnar: bool
+
+        :param cache: Дисковый кэш схем.
+        Файлы, добавленные через ``add_json(path)``, не читаются сразу: по хэшу их содержимого
+        и отпечатку конфигурации ищется готовая схема. Если её нет, но в кэше есть частичные
+        схемы части файлов, заново обрабатываются только изменившиеся файлы, после чего
+        частичные схемы сливаются в итоговую. Без ``max_variants``,
+        ``max_properties_per_object`` и ``max_schema_nodes`` она совпадает со схемой
+        без кэша (с точностью до порядка альтернатив при ``canonical``).
+        :type cache: Optional[SchemaCache]
+
+        :param max_depth: Максимальная глубина вложенности (корень — 0).
+        Объекты и массивы на этой глубине не обходятся: вместо них выдаётся обобщённая схема
+        с перечнем типов значений в ``additionalProperties`` / ``items``.
+        :type max_depth: Optional[int]
+
+        :param max_properties_per_object: Максимальное число различных ключей объекта.
+        У более широкого объекта значения всех ключей сливаются в одну схему
+        ``additionalProperties``, ``properties`` и ``required`` не выдаются.
+        :type max_properties_per_object: Optional[int]
+
+        :param max_schema_nodes: Бюджет узлов схемы на один запуск.
+        После его исчерпания объекты и массивы обобщаются так же, как при ``max_depth``.
+        :type max_schema_nodes: Optional[int]
+
+        Места усечения после :meth:`run` перечислены в :attr:`truncations`.
+
+        :param canonical: Канонический порядок.
+        Входы упорядочиваются по содержимому, поэтому любая перестановка одних и тех же
+        документов и схем даёт побайтно одинаковую схему, а ключ кэша не зависит
+        от порядка добавления файлов.
+        :type canonical: bool
+
+        :param tuple_handler: Обработчик массивов-кортежей.
+        Массивы одной длины с постоянным типом на каждой позиции описываются через
+        ``prefixItems`` (по схеме на позицию) вместо общей схемы ``items``.
+        :type tuple_handler: Optional[TupleHandlerBase]
+        """
+        self._pipeline = Pipeline(
+            pseudo_handler=pseudo_handler,
+            base_of=base_of,
+            core_comparator=core_comparator,
+            max_variants=max_variants,
+            columnar=columnar,
+            max_depth=max_depth,
+            max_properties_per_object=max_properties_per_object,
+            max_schema_nodes=max_schema_nodes,
+            canonical=canonical,
+            tuple_handler=tuple_handler,
+        )
+        self._schemas: list[Resource] = []
+        self._jsons: list[Resource] = []
+        self._id = 0
+        self._cache = cache
+        # файлы, разбираемые в run(): (id, путь, размер пачки или None)
+        self._files: list[tuple[str, str, Optional[int]]] = []
+        self.truncations: list[Truncation] = []
+        self._lock = threading.RLock()
+
+    def add_schema(self, s: dict | str) -> None:
+        if isinstance(s, str):
+            from .inputs import open_input
+
+            with open_input(s) as f:
+                s = json.load(f)
+
+        with self._lock:
+            self._schemas.append(Resource(str(self._id), "schema", s))
+            self._id += 1
+
+    def add_json(self, j: dict | list | str, batch_size: Optional[int] = None) -> None:
+        """
+        JSON-документ или путь к файлу (JSON или JSON Lines, в т.ч. сжатому).
+
+        Без ``batch_size`` документы файла загружаются в память целиком. С ``batch_size``
+        файл читается потоком в :meth:`run`: документы сводятся пачками в частичную схему,
+        как в :meth:`Pipeline.generate_batched`, и память не зависит от размера файла.
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if isinstance(j, str) and (self._cache is not None or batch_size is not None):
+            # чтение, хэширование и разбор откладываются до run(): файл может оказаться в кэше
+            open(j, "rb").close()  # недоступный файл — ошибка здесь же, как без кэша
+            with self._lock:
+                self._files.append((str(self._id), j, batch_size))
+                self._id += 1
+            return
+        # файл JSON Lines даёт по документу на строку
+        documents = _load_json_file(j) if isinstance(j, str) else [j]
+
+        with self._lock:
+            for document in documents:
+                self._jsons.append(Resource(str(self._id), "json", document))
+                self._id += 1
+
+    def add_events(
+        self,
+        events: Iterable[tuple[Any, ...]],
+        converge_after: Optional[int] = None,
+        sample_every: int = 16,
+    ) -> None:
+        """
+        Документы в виде потока событий разбора (см. :class:`EventProfiler`),
+        например ``ijson.parse(f)``. Документы не материализуются: события сразу сводятся
+        в профиль, который добавляется как входная схема.
+
+        Без ``max_variants`` и обработчика кортежей результат совпадает с ``add_json``
+        тех же документов, кроме ``enum``, ``j2sElementTrigger`` и порядка альтернатив
+        значений псевдомассивов.
+
+        ``converge_after`` и ``sample_every`` включают адаптивный режим профилировщика:
+        сошедшиеся пути проверяются выборочно. Непроверенная строка учитывается с уже
+        известным форматом пути, поэтому формат, встретившийся только у непроверенных
+        значений, в схему не попадает.
+        """
+        from .events import EventProfiler
+
+        profiler = EventProfiler(converge_after, sample_every)
+        profiler.feed(events)
+        if profiler.documents:
+            self.add_schema(profiler.schema())
+
+    def clear_data(self) -> None:
+        with self._lock:
+            self._id = 0
+            self._jsons = []
+            self._schemas = []
+            self._files = []
+
+    def session(self) -> "Converter":
+        """
+        Новый конвертер с тем же конвейером и кэшем, но без входных данных.
+        Дешёвый способ изолировать состояние отдельного запроса.
+        """
+        return Converter.from_pipeline(self._pipeline, cache=self._cache)
+
+    def generate(self, jsons: Iterable[Any] = (), schemas: Iterable[Any] = ()) -> dict:
+        """
+        Схема для переданных данных без использования накопленных ``add_*`` входов.
+        Потокобезопасно: см. :meth:`Pipeline.generate`.
+        """
+        return self._pipeline.generate(jsons, schemas)
+
+    @classmethod
+    def from_pipeline(
+        cls, pipeline: Pipeline, cache: Optional["SchemaCache"] = None
+    ) -> "Converter":
+        """Конвертер поверх готового конвейера (без повторной настройки и регистрации)."""
+        conv = cls(cache=cache)
+        conv._pipeline = pipeline
+        return conv
+
+    def register(self, c: Comparator) -> None:
+        with self._lock:
+            self._pipeline = self._pipeline.extend(c)
+
+    @property
+    def pipeline(self) -> Pipeline:
+        """
+        Скомпилированный конвейер с текущей конфигурацией и компараторами.
+        Неизменяем: его можно сохранить и переиспользовать через :meth:`Pipeline.generate`.
+        """
+        return self._pipeline
+
+    def fingerprint(self) -> str:
+        return self._pipeline.fingerprint()
 
     # ---------------- entry ----------------
 
     def run(self) -> dict:
-        ctx = ProcessingContext(self._schemas, self._jsons, sealed=False)
-        return self._run_level(ctx, "/", {})
+        # снимок входов под блокировкой; сам прогон идёт без неё
+        with self._lock:
+            pipeline = self._pipeline
+            schemas, jsons = list(self._schemas), list(self._jsons)
+            files = list(self._files)
+
+        if self._cache is not None and files:
+            result, truncations = self._run_cached(self._cache, pipeline, schemas, jsons, files)
+        else:
+            partials, truncations = self._stream_files(pipeline, files)
+            result, found = pipeline._generate(_by_id(schemas + partials), jsons)
+            truncations += found
+        self.truncations = truncations
+        return result
+
+    def write(self, stream: TextIO, indent: Optional[int] = 2) -> None:
+        """
+        Как :meth:`run`, но схема записывается в ``stream`` по мере построения узлов:
+        вывод начинается до окончания обхода, а вторая копия схемы в памяти не создаётся.
+        При использовании кэша готовая схема записывается целиком.
+
+        :param indent: Отступ; ``None`` — компактный вывод.
+        """
+        with self._lock:
+            pipeline = self._pipeline
+            schemas, jsons = list(self._schemas), list(self._jsons)
+            files = list(self._files)
+
+        writer = SchemaWriter(stream, indent)
+        if self._cache is not None and files:
+            result, truncations = self._run_cached(self._cache, pipeline, schemas, jsons, files)
+            writer.value(result)
+            writer.flush()
+        else:
+            partials, truncations = self._stream_files(pipeline, files)
+            _, found = pipeline._generate(_by_id(schemas + partials), jsons, writer=writer)
+            truncations += found
+        self.truncations = truncations
+
+    def drift(self) -> list["Drift"]:
+        """
+        Режим обнаружения дрейфа: схемы, добавленные через :meth:`add_schema`, служат эталоном,
+        а JSON, добавленные через :meth:`add_json`, сверяются с ним без повторного вывода схемы.
+        Несколько эталонных схем предварительно сливаются.
+        """
+        with self._lock:
+            pipeline = self._pipeline
+            schemas, jsons = list(self._schemas), list(self._jsons)
+            files = list(self._files)
+
+        if not schemas:
+            raise ValueError("drift() requires a baseline schema added with add_schema()")
+        if len(schemas) == 1:
+            baseline = schemas[0].content
+        else:
+            baseline, _ = pipeline._generate(schemas, [])
+
+        from .drift import DriftDetector
+        from .inputs import iter_documents
+
+        detector = DriftDetector(baseline, pipeline.pseudo_handler)
+        # файлы читаются по одному, в порядке добавления
+        sources: list[tuple[int, Optional[str], Any]] = [
+            (int(j.id), None, j.content) for j in jsons
+        ] + [(int(rid), path, None) for rid, path, _ in files]
+        for _, path, document in sorted(sources, key=lambda d: d[0]):
+            if path is None:
+                detector.feed(document)
+            else:
+                detector.feed_many(iter_documents(path))
+        return detector.report()
+
+    def _stream_files(
+        self, pipeline: Pipeline, files: list[tuple[str, str, Optional[int]]]
+    ) -> tuple[list[Resource], list[Truncation]]:
+        """Частичные схемы файлов, читаемых пачками (``add_json(path, batch_size)``)."""
+        from .inputs import iter_documents
+
+        partial_pipeline = pipeline._partial()
+        partials: list[Resource] = []
+        truncations: list[Truncation] = []
+        for rid, path, batch_size in files:
+            assert batch_size is not None
+            schema, found = partial_pipeline._accumulate(iter_documents(path), batch_size)
+            if schema is not None:
+                partials.append(Resource(rid, "schema", schema))
+            truncations += found
+        return partials, truncations
+
+    def _run_cached(
+        self,
+        cache: "SchemaCache",
+        pipeline: Pipeline,
+        schemas: list[Resource],
+        jsons: list[Resource],
+        files: list[tuple[str, str, Optional[int]]],
+    ) -> tuple[dict, list[Truncation]]:
+        from .cache import SchemaCache, content_digest, file_digest
+        from .inputs import is_json_lines
+
+        # запись кэша — схема вместе с отчётом об усечении (см. _cache_get/_cache_put)
+        config = pipeline.fingerprint()
+        # одно и то же содержимое разбирается по-разному как JSON и как JSON Lines
+        modes = {rid: "jsonl" if is_json_lines(path) else "json" for rid, path, _ in files}
+        digests = {rid: file_digest(path) for rid, path, _ in files}
+
+        def result_key() -> str:
+            inputs = sorted(
+                [(int(rid), f"file:{modes[rid]}:{digest}") for rid, digest in digests.items()]
+                + [(int(r.id), f"{r.type}:{content_digest(r.content)}") for r in schemas]
+                + [(int(r.id), f"{r.type}:{content_digest(r.content)}") for r in jsons]
+            )
+            parts = [part for _, part in inputs]
+            if pipeline.canonical:
+                parts.sort()  # результат не зависит от порядка входов — и ключ тоже
+            return SchemaCache.key(config, _CACHE_ENTRY, *parts)
+
+        hit = _cache_get(cache, result_key())
+        if hit is not None:
+            return hit
+
+        # Частичная схема для каждого файла: изменившиеся файлы обрабатываются заново.
+        # Частичные схемы строятся без решений, зависящих от всех документов узла
+        # (см. Pipeline._partial): их принимает слияние
+        partial_pipeline = pipeline._partial()
+        truncations: list[Truncation] = []
+        partials = []
+        # документы файлов, если все они разобраны в этом прогоне (холодный кэш)
+        loaded: Optional[list[tuple[tuple[int, int], Resource]]] = []
+        for rid, path, batch_size in files:
+            file_key = SchemaCache.key(config, _CACHE_ENTRY, "partial", modes[rid], digests[rid])
+            hit = _cache_get(cache, file_key)
+            if hit is None:
+                # хэш считается по тем же байтам, что разбираются: файл мог измениться
+                digest = hashlib.sha256()
+                if batch_size is not None:
+                    from .inputs import iter_documents
+
+                    # файл читается потоком: документы не сохраняются
+                    schema, found = partial_pipeline._accumulate(
+                        iter_documents(path, digest), batch_size
+                    )
+                    if schema is None:
+                        schema, found = partial_pipeline._generate([], [])
+                    hit = schema, found
+                    loaded = None
+                else:
+                    documents = _load_json_file(path, digest)
+                    ids = (
+                        [rid]
+                        if len(documents) == 1
+                        else [f"{rid}/{i}" for i in range(len(documents))]
+                    )
+                    json_resources = [Resource(i, "json", d) for i, d in zip(ids, documents)]
+                    if loaded is not None:
+                        loaded += [((int(rid), i), r) for i, r in enumerate(json_resources)]
+                    hit = partial_pipeline._generate([], json_resources)
+                digests[rid] = digest.hexdigest()
+                file_key = SchemaCache.key(
+                    config, _CACHE_ENTRY, "partial", modes[rid], digests[rid]
+                )
+                _cache_put(cache, file_key, *hit)
+            else:
+                loaded = None
+            partial, found = hit
+            truncations += found
+            partials.append(Resource(rid, "schema", partial))
+
+        if loaded is not None:
+            # Все файлы разобраны заново: итоговая схема строится по самим документам,
+            # как без кэша, а частичные схемы сохранены для следующих прогонов
+            loaded += [((int(r.id), 0), r) for r in jsons]
+            all_jsons = [r for _, r in sorted(loaded, key=lambda item: item[0])]
+            result, truncations = pipeline._generate(schemas, all_jsons)
+        else:
+            result, found = pipeline._generate(_by_id(schemas + partials), jsons)
+            truncations += found
+        _cache_put(cache, result_key(), result, truncations)
+        return result, truncations
@@ -1,6 +1,9 @@
+import re
+from collections import Counter
 from typing import Optional
 
 from .comparators.template import ProcessingContext
+from .comparators.type import infer_json_types
 
 
 class PseudoArrayHandlerBase:
@@ -21,3 +24,128 @@ class PseudoArrayHandler(PseudoArrayHandlerBase):
             return True, "^[0-9]+$"
         except ValueError:
             return False, None
+
+
+# (название, шаблон, "сильная" форма) — от более частных к более общим.
+# Ключи сильной формы (uuid, даты, длинные хэши) сами по себе указывают на словарь;
+# для слабой формы (артикулы, короткие hex) нужна ещё и статистика повторяемости ключей.
+# Слабые формы требуют не менее 8 символов: иначе под них попадают поля вроде "a", "b",
+# "line1" и "zip5".
+KEY_SHAPES: list[tuple[str, str, bool]] = [
+    (
+        "uuid",
+        r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$",
+        True,
+    ),
+    ("date", r"^\d{4}-\d{2}-\d{2}$", True),
+    (
+        "date-time",
+        r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$",
+        True,
+    ),
+    ("hash", r"^[0-9a-fA-F]{16,}$", True),
+    ("hex", r"^[0-9a-fA-F]{8,}$", False),
+    ("token", r"^(?=[^0-9]*[0-9])[A-Za-z0-9][A-Za-z0-9_.:-]{7,}$", False),
+]
+_COMPILED_SHAPES = [
+    (name, pattern, re.compile(pattern), strong) for name, pattern, strong in KEY_SHAPES
+]
+
+
+def _value_kind(t: str) -> str:
+    return "number" if t == "integer" else t
+
+
+class DynamicKeyHandler(PseudoArrayHandler):
+    """
+    Обнаружение словарей с динамическими ключами (uuid, даты, хэши, артикулы...).
+
+    Помимо числовых псевдомассивов узел считается словарём, если:
+
+    - все ключи имеют одну форму из :data:`KEY_SHAPES` (сильную — или слабую, но не менее
+      ``min_keys`` различных ключей, каждый из которых в среднем встречается
+      не чаще ``max_key_repeat`` раз на документ узла);
+    - либо форма не определена, но различных ключей не меньше ``min_generic_keys``
+      и они почти не повторяются между документами (шаблон ``^.*$``);
+    - для слабой и неопределённой формы узел должен встречаться не менее чем
+      в ``min_documents`` документах: по одному документу нельзя отличить словарь
+      от записи, ведь каждый ключ в нём встречается ровно один раз;
+    - и значения однородны: доля самого частого типа значений не ниже ``min_homogeneity``.
+
+    Форма должна подходить к каждому ключу: кандидаты отсеиваются ключ за ключом,
+    поэтому после первых ключей обычно остаётся один-два regex на ключ. Статистика
+    документов узла собирается один раз на контекст.
+    """
+
+    def __init__(
+        self,
+        min_keys: int = 4,
+        min_generic_keys: int = 64,
+        max_key_repeat: float = 1.5,
+        min_homogeneity: float = 0.9,
+        min_documents: int = 2,
+    ):
+        self.min_keys = min_keys
+        self.min_generic_keys = min_generic_keys
+        self.max_key_repeat = max_key_repeat
+        self.min_homogeneity = min_homogeneity
+        self.min_documents = min_documents
+
+    def is_pseudo_array(
+        self, keys: list[str], ctx: ProcessingContext
+    ) -> tuple[bool, Optional[str]]:
+        is_pseudo, pattern = super().is_pseudo_array(keys, ctx)
+        if is_pseudo or not keys:
+            return is_pseudo, pattern
+
+        shape = self._key_shape(keys)
+        documents, occurrences, value_types = ctx.memo(
+            "pseudo_arrays.statistics", lambda: self._statistics(ctx)
+        )
+        # ключи словаря почти не повторяются: их число растёт вместе с числом документов
+        growing = documents >= self.min_documents and (
+            occurrences / len(keys) <= self.max_key_repeat
+        )
+        if shape is None:
+            if len(keys) < self.min_generic_keys or not growing:
+                return False, None
+            pattern = "^.*$"
+        else:
+            _, pattern, strong = shape
+            if not strong and (len(keys) < self.min_keys or not growing):
+                return False, None
+
+        if value_types:
+            dominant = value_types.most_common(1)[0][1]
+            if dominant / sum(value_types.values()) < self.min_homogeneity:
+                return False, None
+        return True, pattern
+
+    def _key_shape(self, keys: list[str]) -> Optional[tuple[str, str, bool]]:
+        candidates = _COMPILED_SHAPES
+        for key in keys:
+            candidates = [s for s in candidates if s[2].match(key)]
+            if not candidates:
+                return None
+        name, pattern, _, strong = candidates[0]
+        return name, pattern, strong
+
+    def _statistics(self, ctx: ProcessingContext) -> tuple[int, int, Counter[str]]:
+        """Число объектов узла, вхождений ключей по ним и типы значений."""
+        documents = occurrences = 0
+        value_types: Counter[str] = Counter()
+        for j in ctx.jsons:
+            if isinstance(j.content, dict):
+                documents += 1
+                occurrences += len(j.content)
+                value_types.update(map(_value_kind, infer_json_types(j.content.values())))
+        for s in ctx.schemas:
+            if isinstance(s.content, dict):
+                props = s.content.get("properties", {})
+                documents += 1
+                occurrences += len(props)
+                value_types.update(
+                    str(p.get("type")).replace("integer", "number") if isinstance(p, dict) else ""
+                    for p in props.values()
+                )
+        return documents, occurrences, value_types
@@ -0,0 +1,87 @@
+"""
+Локальные ссылки ``$ref`` во входных схемах.
+
+Ссылки разыменовываются по ходу обхода, по одному уровню за раз: поддерево определения
+не копируется, а его потомки со своими ``$ref`` разыменовываются, только когда обход
+до них доходит. Результат разыменования помнит, из какого определения он получен
+(:class:`ResolvedSchema`), — по этой подписи конвейер обрабатывает узел, целиком
+описанный определением, один раз и выдаёт на его месте ``$ref`` в ``$defs`` результата.
+"""
+
+from typing import Any, Optional
+from urllib.parse import unquote
+
+# Ключевые слова рядом с $ref, не меняющие описываемые значения
+ANNOTATIONS = frozenset(
+    {
+        "$schema",
+        "$id",
+        "$comment",
+        "$defs",
+        "definitions",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+    }
+)
+
+# Длина цепочки $ref -> $ref, после которой ссылка считается циклической
+MAX_REF_HOPS = 32
+
+Signature = tuple[str, str, str]
+
+
+class ResolvedSchema(dict):
+    """
+    Содержимое определения с ключевыми словами, соседними с ``$ref``.
+
+    ``signature`` — ``(id корневой схемы, указатель, хэш соседних ключевых слов)``:
+    узлы с одинаковой подписью описываются одинаково.
+    """
+
+    __slots__ = ("signature",)
+
+    def __init__(self, content: dict, signature: Signature):
+        super().__init__(content)
+        self.signature = signature
+
+
+def local_pointer(ref: Any) -> Optional[str]:
+    """JSON Pointer локальной ссылки (``#/$defs/A`` -> ``/$defs/A``); ``None`` для внешних."""
+    if not isinstance(ref, str) or not ref.startswith("#"):
+        return None
+    return unquote(ref[1:])
+
+
+def resolve_pointer(root: Any, pointer: str) -> Any:
+    """
+    Значение по JSON Pointer внутри ``root``.
+
+    :raises LookupError: Указатель не ведёт ни к какому значению.
+    """
+    target = root
+    for part in pointer.split("/")[1:]:
+        part = part.replace("~1", "/").replace("~0", "~")
+        try:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise LookupError(f"Unresolvable reference: #{pointer}") from None
+    return target
+
+
+def siblings_digest(siblings: dict) -> str:
+    """Хэш соседних с ``$ref`` ключевых слов, влияющих на описание (без аннотаций)."""
+    from .cache import content_digest
+
+    structural = {k: v for k, v in siblings.items() if k not in ANNOTATIONS}
+    return content_digest(structural) if structural else ""
+
+
+def definition_name(pointer: str) -> str:
+    """Имя для ``$defs`` результата: последний сегмент указателя."""
+    name = pointer.rsplit("/", 1)[-1].replace("~1", "/").replace("~0", "~")
+    return name or "root"
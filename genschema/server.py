@@ -0,0 +1,400 @@
+"""
+Режим сервиса: тёплый процесс с готовым конвейером за локальным HTTP или Unix-сокетом.
+
+Запуск интерпретатора, импорт и настройка компараторов выполняются один раз, после чего
+каждый запрос стоит только генерации схемы. Маршруты:
+
+- ``POST /schema`` — схема тела запроса (JSON — один документ, NDJSON — по документу
+  на строку);
+- ``POST /sessions/<name>`` — добавить документы тела в именованную сессию;
+- ``GET /sessions/<name>`` — схема всех документов сессии;
+- ``DELETE /sessions/<name>`` — удалить сессию;
+- ``GET /sessions`` — имена сессий;
+- ``GET /health`` — проверка готовности.
+
+Сессия хранит не документы, а схему уже полученных: новые документы сливаются с ней
+так же, как частичные схемы при ``--jobs``, поэтому память сессии порядка размера схемы.
+Число сессий ограничено (дольше всех не использованная вытесняется), а простаивающие
+дольше ``session_ttl`` секунд удаляются.
+Соединения обслуживаются каждое своим потоком, а генерация — пулом из ``workers`` потоков.
+"""
+
+import errno
+import http.server
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar, cast
+from urllib.parse import unquote, urlsplit
+
+from .pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class ServiceError(Exception):
+    """Ошибка запроса с HTTP-статусом ответа."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_documents(body: bytes, content_type: str = "application/json") -> list[Any]:
+    """
+    Документы тела запроса: один для JSON, по одному на непустую строку для NDJSON.
+
+    :raises ServiceError: Некорректный JSON (400).
+    """
+    try:
+        text = body.decode("utf-8")
+        if content_type.split(";")[0].strip().lower() not in NDJSON_TYPES:
+            return [json.loads(text)]
+        documents = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                try:
+                    documents.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ServiceError(400, f"Invalid JSON on line {lineno}: {e}") from e
+        return documents
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ServiceError(400, f"Invalid JSON: {e}") from e
+
+
+class _Session:
+    __slots__ = ("lock", "schema", "documents", "used")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.schema: Optional[dict] = None
+        self.documents = 0
+        self.used = time.monotonic()  # последнее обращение
+
+
+class SchemaService:
+    """
+    Состояние сервиса без транспорта: конвейер и именованные сессии.
+
+    Конвейер неизменяем и вызывается параллельно; запросы к одной сессии
+    выполняются по очереди, к разным — параллельно.
+
+    :param max_sessions: Предельное число сессий: при создании сверх него вытесняется
+        сессия, к которой дольше всего не обращались (LRU). ``None`` — без ограничения.
+    :param session_ttl: Сессия, к которой не обращались столько секунд, удаляется.
+        ``None`` — не удалять.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        max_sessions: Optional[int] = 1024,
+        session_ttl: Optional[float] = 3600.0,
+    ):
+        if max_sessions is not None and max_sessions < 1:
+            raise ValueError("max_sessions must be a positive integer or None")
+        if session_ttl is not None and session_ttl <= 0:
+            raise ValueError("session_ttl must be positive or None")
+        self.pipeline = pipeline
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        # порядок — от давно не использованных к недавним
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generate(self, documents: list[Any]) -> dict:
+        return self.pipeline.generate(documents)
+
+    def add(self, name: str, documents: list[Any]) -> dict:
+        """Добавляет документы в сессию (создаёт её при необходимости)."""
+        while True:
+            session = self._open(name)
+            with session.lock:
+                # пока запрос ждал блокировку, сессию могли удалить, вытеснить или её срок
+                # мог истечь: документы, добавленные в неё, потерялись бы — создаём заново
+                with self._lock:
+                    if self._sessions.get(name) is not session:
+                        continue
+                if documents:
+                    previous = [session.schema] if session.schema is not None else []
+                    session.schema = self.pipeline.generate(documents, previous)
+                    session.documents += len(documents)
+                return {"session": name, "documents": session.documents}
+
+    def schema(self, name: str) -> dict:
+        session = self._session(name)
+        with session.lock:
+            return session.schema if session.schema is not None else {}
+
+    def drop(self, name: str) -> dict:
+        with self._lock:
+            self._expire()
+            session = self._sessions.pop(name, None)
+        if session is None:
+            raise ServiceError(404, f"Unknown session: {name}")
+        return {"session": name, "documents": session.documents}
+
+    def sessions(self) -> list[str]:
+        with self._lock:
+            self._expire()
+            return sorted(self._sessions)
+
+    def _open(self, name: str) -> _Session:
+        """Сессия с именем ``name``; создаётся при необходимости."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(name)
+            if session is None:
+                if self.max_sessions is not None and len(self._sessions) >= self.max_sessions:
+                    evicted, _ = self._sessions.popitem(last=False)
+                    logger.info("Session %r evicted: max_sessions=%d", evicted, self.max_sessions)
+                session = self._sessions[name] = _Session()
+            else:
+                self._touch(name, session)
+            return session
+
+    def _session(self, name: str) -> _Session:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(name)
+            if session is not None:
+                self._touch(name, session)
+        if session is None:
+            raise ServiceError(404, f"Unknown session: {name}")
+        return session
+
+    def _touch(self, name: str, session: _Session) -> None:
+        session.used = time.monotonic()
+        self._sessions.move_to_end(name)
+
+    def _expire(self) -> None:
+        """Удаляет простаивающие сессии; вызывается под ``self._lock``."""
+        if self.session_ttl is None:
+            return
+        deadline = time.monotonic() - self.session_ttl
+        while self._sessions:
+            name, session = next(iter(self._sessions.items()))
+            if session.used > deadline:
+                break
+            del self._sessions[name]
+            logger.info("Session %r expired: session_ttl=%s", name, self.session_ttl)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # соединение переиспользуется между запросами клиента
+
+    def setup(self) -> None:
+        # заголовки и тело ответа пишутся раздельно: без TCP_NODELAY каждый ответ
+        # keep-alive ждал бы отложенного ACK клиента (~40 мс); у Unix-сокета опции нет
+        super().setup()
+        if isinstance(self.server, SchemaHTTPServer):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        self._body_pending = True
+        try:
+            self._send(200, self._route(method, urlsplit(self.path).path))
+            return
+        except ServiceError as e:
+            status, message = e.status, str(e)
+        except Exception as e:
+            logger.exception("Error handling %s %s", method, self.path)
+            status, message = 500, f"Error generating schema: {e}"
+        if self._body_pending:
+            self._discard_body()
+        self._send(status, {"error": message})
+
+    def _route(self, method: str, path: str) -> Any:
+        server = cast(_PooledServerMixin, self.server)
+        service = server.service
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if parts == ["health"] and method == "GET":
+            return {"status": "ok", "sessions": len(service.sessions())}
+        if parts == ["schema"] and method == "POST":
+            return server.run(service.generate, self._documents())
+        if parts == ["sessions"] and method == "GET":
+            return service.sessions()
+        if len(parts) == 2 and parts[0] == "sessions" and parts[1]:
+            name = parts[1]
+            if method == "POST":
+                return server.run(service.add, name, self._documents())
+            if method == "GET":
+                return service.schema(name)
+            return service.drop(name)
+        raise ServiceError(404, f"Not found: {method} {path}")
+
+    def _content_length(self) -> Optional[int]:
+        """Длина тела из заголовка; ``None`` — заголовок не целое неотрицательное число."""
+        value = self.headers.get("Content-Length", "0").strip()
+        # int() принял бы и "-1", и "+1", и "1_000"; отрицательная длина — rfile.read(-1),
+        # то есть чтение до закрытия соединения
+        return int(value) if value.isascii() and value.isdigit() else None
+
+    def _documents(self) -> list[Any]:
+        length = self._content_length()
+        if length is None:
+            raise ServiceError(400, "Invalid Content-Length")
+        max_body = cast(_PooledServerMixin, self.server).max_body
+        if length > max_body:
+            raise ServiceError(413, f"Request body exceeds {max_body} bytes")
+        self._body_pending = False
+        body = self.rfile.read(length)
+        return parse_documents(body, self.headers.get("Content-Type", "application/json"))
+
+    def _discard_body(self) -> None:
+        """
+        Дочитывает тело отклонённого запроса блоками: оно не должно остаться в соединении
+        keep-alive, а закрытие до его отправки оборвало бы клиенту запись.
+        """
+        remaining = self._content_length()
+        if remaining is None:
+            # граница тела неизвестна: соединение нельзя использовать дальше
+            self.close_connection = True
+            return
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # адреса клиента у Unix-сокета нет: address_string() здесь не годится
+        logger.debug(format, *args)
+
+
+class _PooledServerMixin(socketserver.ThreadingMixIn):
+    """
+    Соединения держат лёгкие потоки (ожидание следующего запроса keep-alive ничего
+    не стоит), а генерация схем выполняется пулом из ``workers`` потоков.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128  # очередь listen() по умолчанию (5) теряет соединения при всплеске
+    service: SchemaService
+    max_body: int
+
+    def _setup(self, service: SchemaService, workers: int, max_body: int) -> None:
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        self.service = service
+        self.max_body = max_body
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="genschema-serve")
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Выполняет ``fn`` в пуле и дожидается результата."""
+        return self._pool.submit(fn, *args).result()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+class SchemaHTTPServer(_PooledServerMixin, http.server.HTTPServer):
+    def __init__(
+        self,
+        address: tuple[str, int],
+        service: SchemaService,
+        workers: int = 4,
+        max_body: int = 64 * 1024 * 1024,
+    ):
+        self._setup(service, workers, max_body)
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+
+class SchemaUnixServer(_PooledServerMixin, socketserver.UnixStreamServer):
+    def __init__(
+        self,
+        path: str,
+        service: SchemaService,
+        workers: int = 4,
+        max_body: int = 64 * 1024 * 1024,
+    ):
+        # сокет, оставшийся от завершившегося процесса, мешает bind; сокет, на котором
+        # ещё принимает соединения другой сервер, не трогаем
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            if _is_listening(path):
+                raise OSError(errno.EADDRINUSE, "Another server is listening on the socket", path)
+            os.unlink(path)
+        self._setup(service, workers, max_body)
+        super().__init__(path, _Handler)
+
+    @property
+    def url(self) -> str:
+        return f"unix:{self.server_address}"
+
+    def server_close(self) -> None:
+        super().server_close()
+        if isinstance(self.server_address, str) and os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def _is_listening(path: str) -> bool:
+    """Принимает ли Unix-сокет ``path`` соединения (то есть жив ли его сервер)."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.settimeout(1.0)
+        probe.connect(path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def make_server(
+    pipeline: Pipeline,
+    host: str = "127.0.0.1",
+    port: int = 8750,
+    socket_path: Optional[str] = None,
+    workers: int = 4,
+    max_body: int = 64 * 1024 * 1024,
+    max_sessions: Optional[int] = 1024,
+    session_ttl: Optional[float] = 3600.0,
+) -> SchemaHTTPServer | SchemaUnixServer:
+    """
+    Сервер схем: на Unix-сокете ``socket_path``, если он задан, иначе на ``host:port``.
+    Запуск — ``serve_forever()``, остановка — ``shutdown()`` и ``server_close()``.
+
+    :raises OSError: Адрес занят, в том числе сокет ``socket_path`` — работающим сервером.
+    """
+    service = SchemaService(pipeline, max_sessions, session_ttl)
+    if socket_path is not None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not supported on this platform")
+        return SchemaUnixServer(socket_path, service, workers, max_body)
+    return SchemaHTTPServer((host, port), service, workers, max_body)
@@ -0,0 +1,85 @@
+from typing import Any, Optional
+
+from .comparators.template import ProcessingContext
+from .comparators.type import infer_json_types, infer_schema_type
+
+
+class TupleHandlerBase:
+    def tuple_length(self, ctx: ProcessingContext) -> Optional[int]:
+        """Длина кортежа, если массивы узла описываются позиционно (``prefixItems``)."""
+        return None
+
+
+def _kind(t: Optional[str]) -> Optional[str]:
+    return "number" if t == "integer" else t
+
+
+class TupleHandler(TupleHandlerBase):
+    """
+    Обнаружение массивов-кортежей: ``[lat, lon]``, ``[timestamp, value]``, ``[id, "name", {...}]``.
+
+    Массивы узла считаются кортежем, если:
+
+    - все они одной длины от ``min_length`` до ``max_length``;
+    - на каждой позиции у всех массивов один тип (``integer`` и ``number`` не различаются);
+    - типы позиций различаются между собой (однородные массивы и так точно описываются
+      через ``items``) — или ``homogeneous=True``.
+
+    Входные схемы учитываются по ``prefixItems`` той же длины; схема с ``items``
+    без ``prefixItems`` описывает список, а не кортеж.
+
+    Решение принимается по сигнатуре длина/типы до спуска в элементы: проход прерывается
+    на первом несовпадении, а массивы длиннее ``max_length`` отбрасываются без просмотра
+    элементов, поэтому обычные списки почти ничего не стоят.
+    """
+
+    def __init__(self, min_length: int = 2, max_length: int = 8, homogeneous: bool = False):
+        if min_length < 1 or max_length < min_length:
+            raise ValueError("expected 1 <= min_length <= max_length")
+        self.min_length = min_length
+        self.max_length = max_length
+        self.homogeneous = homogeneous
+
+    def tuple_length(self, ctx: ProcessingContext) -> Optional[int]:
+        signature: Optional[list[Optional[str]]] = None
+
+        def accept(kinds: list[Optional[str]]) -> bool:
+            nonlocal signature
+            if signature is None:
+                if not self.min_length <= len(kinds) <= self.max_length:
+                    return False
+                signature = kinds
+                return True
+            if len(kinds) != len(signature):
+                return False
+            for i, (known, kind) in enumerate(zip(signature, kinds)):
+                if known is None:
+                    signature[i] = kind
+                elif kind is not None and kind != known:
+                    return False
+            return True
+
+        for s in ctx.schemas:
+            kinds = self._schema_signature(s.content)
+            if kinds is None or not accept(kinds):
+                return None
+        for j in ctx.jsons:
+            c = j.content
+            if not isinstance(c, list) or signature is not None and len(c) != len(signature):
+                return None
+            if len(c) > self.max_length or not accept(list(map(_kind, infer_json_types(c)))):
+                return None
+
+        if signature is None:
+            return None
+        if not self.homogeneous and len(set(signature)) == 1:
+            return None
+        return len(signature)
+
+    @staticmethod
+    def _schema_signature(c: Any) -> Optional[list[Optional[str]]]:
+        if not isinstance(c, dict) or not isinstance(c.get("prefixItems"), list):
+            return None
+        if isinstance(c.get("items"), dict):
+            return None
+        return [_kind(infer_schema_type(sub)) for sub in c["prefixItems"]]
@@ -0,0 +1,363 @@
+"""
+Генерация специализированного валидатора для схемы.
+
+Вместо интерпретации схемы на каждом документе (как делают универсальные
+валидаторы) схема один раз транслируется в исходный код Python: по функции
+на каждый узел, с проверками, развёрнутыми в константы. Поддерживается
+подмножество JSON Schema 2020-12, которое порождает genschema, плюс
+распространённые ключевые слова ручных схем. Незнакомое ключевое слово
+приводит к :class:`UnsupportedSchemaError`, а не к молчаливому пропуску.
+"""
+
+import math
+from collections.abc import Callable
+from typing import Any, Optional
+
+from .comparators.format import FormatDetector
+
+# Ключевые слова, не влияющие на результат проверки
+ANNOTATIONS = frozenset(
+    {
+        "$schema",
+        "$id",
+        "$comment",
+        "$defs",
+        "definitions",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+        "j2sElementTrigger",
+        "isPseudoArray",
+    }
+)
+
+_TYPE_CHECKS = {
+    "null": "x is None",
+    "boolean": "(x is True or x is False)",
+    "integer": "((isinstance(x, int) and not isinstance(x, bool))"
+    " or (isinstance(x, float) and x.is_integer()))",
+    "number": "(isinstance(x, (int, float)) and not isinstance(x, bool))",
+    "string": "isinstance(x, str)",
+    "array": "isinstance(x, list)",
+    "object": "isinstance(x, dict)",
+}
+
+_IS_NUMBER = _TYPE_CHECKS["number"]
+
+
+class UnsupportedSchemaError(ValueError):
+    """Схема содержит конструкцию, для которой нельзя сгенерировать валидатор."""
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Равенство по правилам JSON: ``1 == 1.0``, но ``True != 1``."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return bool(a == b)
+
+
+def _multiple_of(x: int | float, m: int | float) -> bool:
+    if isinstance(x, int) and isinstance(m, int):
+        return x % m == 0
+    q = x / m
+    return math.isfinite(q) and q == int(q)
+
+
+class _Emitter:
+    def __init__(self, root: Any, check_formats: bool):
+        self._root = root
+        self._check_formats = check_formats
+        self._functions: list[str] = []
+        self._constants: list[str] = []
+        self._refs: dict[str, str] = {}
+        self._counter = 0
+
+    def const(self, value_source: str) -> str:
+        name = f"_c{len(self._constants)}"
+        self._constants.append(f"{name} = {value_source}")
+        return name
+
+    def source(self, entry: str, name: str) -> str:
+        return "\n".join(
+            [
+                "# Автоматически сгенерировано genschema.validator. Не редактировать вручную.",
+                "import re",
+                "",
+                "from genschema.validator import _json_equal, _multiple_of",
+                "",
+                *self._constants,
+                "",
+                "",
+                *self._functions,
+                f"{name} = {entry}",
+                "",
+            ]
+        )
+
+    def _new_name(self) -> str:
+        self._counter += 1
+        return f"_v{self._counter}"
+
+    def node(self, schema: Any, name: Optional[str] = None) -> str:
+        if schema is True or schema == {}:
+            return "_accept"
+        if schema is False:
+            return "_reject"
+        if not isinstance(schema, dict):
+            raise UnsupportedSchemaError(f"Schema must be an object or boolean: {schema!r}")
+
+        name = name or self._new_name()
+        body: list[str] = []
+        for key, value in schema.items():
+            if key in ANNOTATIONS:
+                continue
+            handler = getattr(self, "_kw_" + key.replace("$", "dollar_"), None)
+            if handler is None:
+                if key == "format":
+                    body += self._format(value)
+                    continue
+                raise UnsupportedSchemaError(f"Unsupported keyword: {key}")
+            body += handler(value, schema)
+
+        self._functions += [f"def {name}(x):", *body, "    return True", "", ""]
+        return name
+
+    # ---------- общие ----------
+
+    def _kw_type(self, value: Any, schema: dict) -> list[str]:
+        types = value if isinstance(value, list) else [value]
+        unknown = [t for t in types if t not in _TYPE_CHECKS]
+        if unknown:
+            raise UnsupportedSchemaError(f"Unknown type: {unknown[0]!r}")
+        return [
+            f"    if not ({' or '.join(_TYPE_CHECKS[t] for t in types)}):",
+            "        return False",
+        ]
+
+    def _kw_enum(self, value: Any, schema: dict) -> list[str]:
+        if all(isinstance(v, str) for v in value):
+            c = self.const(f"frozenset({sorted(value)!r})")
+            return [f"    if not (isinstance(x, str) and x in {c}):", "        return False"]
+        c = self.const(repr(value))
+        return [f"    if not any(_json_equal(x, v) for v in {c}):", "        return False"]
+
+    def _kw_const(self, value: Any, schema: dict) -> list[str]:
+        c = self.const(repr(value))
+        return [f"    if not _json_equal(x, {c}):", "        return False"]
+
+    def _kw_dollar_ref(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if not {self._ref(value)}(x):", "        return False"]
+
+    def _ref(self, ref: str) -> str:
+        if ref in self._refs:
+            return self._refs[ref]
+        if not ref.startswith("#"):
+            raise UnsupportedSchemaError(f"Only local references are supported: {ref}")
+        target = self._root
+        for part in filter(None, ref[1:].split("/")):
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(part)] if isinstance(target, list) else target[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise UnsupportedSchemaError(f"Unresolvable reference: {ref}") from None
+        # имя резервируется до генерации тела — рекурсивные ссылки замыкаются на себя
+        name = self._refs[ref] = self._new_name()
+        self.node(target, name)
+        return name
+
+    def _combinator(self, value: Any, joiner: str) -> str:
+        names = [self.node(sub) for sub in value]
+        return joiner.join(f"{n}(x)" for n in names)
+
+    def _kw_anyOf(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if not ({self._combinator(value, ' or ')}):", "        return False"]
+
+    def _kw_allOf(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if not ({self._combinator(value, ' and ')}):", "        return False"]
+
+    def _kw_oneOf(self, value: Any, schema: dict) -> list[str]:
+        calls = self._combinator(value, ", ")
+        return [f"    if sum(({calls},)) != 1:", "        return False"]
+
+    def _kw_not(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if {self.node(value)}(x):", "        return False"]
+
+    # ---------- числа и строки ----------
+
+    def _numeric(self, op: str, value: Any) -> list[str]:
+        return [f"    if {_IS_NUMBER} and not (x {op} {value!r}):", "        return False"]
+
+    def _kw_minimum(self, value: Any, schema: dict) -> list[str]:
+        return self._numeric(">=", value)
+
+    def _kw_maximum(self, value: Any, schema: dict) -> list[str]:
+        return self._numeric("<=", value)
+
+    def _kw_exclusiveMinimum(self, value: Any, schema: dict) -> list[str]:
+        return self._numeric(">", value)
+
+    def _kw_exclusiveMaximum(self, value: Any, schema: dict) -> list[str]:
+        return self._numeric("<", value)
+
+    def _kw_multipleOf(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if {_IS_NUMBER} and not _multiple_of(x, {value!r}):", "        return False"]
+
+    def _kw_minLength(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, str) and len(x) < {value!r}:", "        return False"]
+
+    def _kw_maxLength(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, str) and len(x) > {value!r}:", "        return False"]
+
+    def _kw_pattern(self, value: Any, schema: dict) -> list[str]:
+        c = self.const(f"re.compile({value!r})")
+        return [f"    if isinstance(x, str) and not {c}.search(x):", "        return False"]
+
+    def _format(self, value: Any) -> list[str]:
+        if not self._check_formats:
+            return []  # как и в JSON Schema по умолчанию, format — только аннотация
+        for pattern, fmt in FormatDetector._registry["string"].items():
+            if fmt == value:
+                c = self.const(f"re.compile({pattern.pattern!r}, {int(pattern.flags)})")
+                return [
+                    f"    if isinstance(x, str) and not {c}.fullmatch(x):",
+                    "        return False",
+                ]
+        return []
+
+    # ---------- объекты ----------
+
+    def _kw_required(self, value: Any, schema: dict) -> list[str]:
+        if not value:
+            return []
+        c = self.const(repr(tuple(value)))
+        return [
+            "    if isinstance(x, dict):",
+            f"        for k in {c}:",
+            "            if k not in x:",
+            "                return False",
+        ]
+
+    def _kw_properties(self, value: Any, schema: dict) -> list[str]:
+        lines = ["    if isinstance(x, dict):"]
+        for prop, sub in value.items():
+            fn = self.node(sub)
+            if fn == "_accept":
+                continue
+            lines += [
+                f"        v = x.get({prop!r}, _missing)",
+                f"        if v is not _missing and not {fn}(v):",
+                "            return False",
+            ]
+        return lines if len(lines) > 1 else []
+
+    def _kw_patternProperties(self, value: Any, schema: dict) -> list[str]:
+        lines = ["    if isinstance(x, dict):", "        for k, v in x.items():"]
+        for pattern, sub in value.items():
+            c = self.const(f"re.compile({pattern!r})")
+            fn = self.node(sub)
+            lines += [
+                f"            if {c}.search(k) and not {fn}(v):",
+                "                return False",
+            ]
+        return lines
+
+    def _kw_additionalProperties(self, value: Any, schema: dict) -> list[str]:
+        fn = self.node(value)
+        if fn == "_accept":
+            return []
+        known = self.const(f"frozenset({sorted(schema.get('properties', {}))!r})")
+        patterns = [self.const(f"re.compile({p!r})") for p in schema.get("patternProperties", {})]
+        cond = f"k not in {known}" + "".join(f" and not {p}.search(k)" for p in patterns)
+        return [
+            "    if isinstance(x, dict):",
+            "        for k, v in x.items():",
+            f"            if {cond} and not {fn}(v):",
+            "                return False",
+        ]
+
+    def _kw_minProperties(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, dict) and len(x) < {value!r}:", "        return False"]
+
+    def _kw_maxProperties(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, dict) and len(x) > {value!r}:", "        return False"]
+
+    # ---------- массивы ----------
+
+    def _kw_prefixItems(self, value: Any, schema: dict) -> list[str]:
+        lines = ["    if isinstance(x, list):"]
+        for i, sub in enumerate(value):
+            fn = self.node(sub)
+            lines += [f"        if len(x) > {i} and not {fn}(x[{i}]):", "            return False"]
+        return lines
+
+    def _kw_items(self, value: Any, schema: dict) -> list[str]:
+        if isinstance(value, list):
+            raise UnsupportedSchemaError("Array form of 'items' is not supported, use prefixItems")
+        fn = self.node(value)
+        if fn == "_accept":
+            return []
+        start = len(schema.get("prefixItems", []))
+        items = f"x[{start}:]" if start else "x"
+        return [
+            "    if isinstance(x, list):",
+            f"        for v in {items}:",
+            f"            if not {fn}(v):",
+            "                return False",
+        ]
+
+    def _kw_minItems(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, list) and len(x) < {value!r}:", "        return False"]
+
+    def _kw_maxItems(self, value: Any, schema: dict) -> list[str]:
+        return [f"    if isinstance(x, list) and len(x) > {value!r}:", "        return False"]
+
+
+_PRELUDE = [
+    "_missing = object()",
+    "",
+    "",
+    "def _accept(x):",
+    "    return True",
+    "",
+    "",
+    "def _reject(x):",
+    "    return False",
+    "",
+    "",
+]
+
+
+def generate_validator_source(
+    schema: Any, name: str = "validate", check_formats: bool = False
+) -> str:
+    """
+    Возвращает исходный код модуля с функцией ``name(instance) -> bool``.
+
+    :param check_formats: Проверять ``format`` по шаблонам :class:`FormatDetector`.
+    По умолчанию ``format`` — аннотация, как и в ``jsonschema.validate``.
+    """
+    emitter = _Emitter(schema, check_formats)
+    entry = emitter.node(schema)
+    emitter._functions[:0] = _PRELUDE
+    return emitter.source(entry, name)
+
+
+def compile_validator(schema: Any, check_formats: bool = False) -> Callable[[Any], bool]:
+    """Генерирует и компилирует валидатор схемы; возвращает функцию ``instance -> bool``."""
+    namespace: dict[str, Any] = {}
+    exec(
+        compile(
+            generate_validator_source(schema, "validate", check_formats), "<genschema>", "exec"
+        ),
+        namespace,
+    )
+    validate: Callable[[Any], bool] = namespace["validate"]
+    return validate
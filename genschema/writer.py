@@ -0,0 +1,167 @@
+"""
+Потоковая запись схемы.
+
+:class:`SchemaWriter` выводит JSON по событиям (начало/конец объекта, ключ, готовое значение),
+поэтому конвейер может записывать узлы по мере их построения: вывод начинается до окончания
+обхода, а готовая схема целиком в памяти не собирается. Результат побайтно совпадает
+с ``json.dump(schema, f, indent=indent, ensure_ascii=False)``, в компактном режиме
+(``indent=None``) — с ``separators=(",", ":")``.
+"""
+
+import gzip
+import json
+from json.encoder import encode_basestring
+from typing import Any, Optional, TextIO
+
+# Сколько фрагментов копится перед записью в поток
+_FLUSH_ITEMS = 4096
+
+
+class SchemaWriter:
+    """
+    Событийный писатель JSON.
+
+    :param stream: Текстовый поток вывода.
+    :param indent: Отступ; ``None`` — компактный вывод без пробелов.
+    """
+
+    def __init__(self, stream: TextIO, indent: Optional[int] = 2):
+        self._stream = stream
+        self._indent = indent
+        self._key_sep = ":" if indent is None else ": "
+        self._encoder = json.JSONEncoder(
+            ensure_ascii=False,
+            indent=indent,
+            separators=(",", ":") if indent is None else (",", ": "),
+        )
+        self._empty: list[bool] = []  # стек открытых контейнеров: ещё без элементов
+        self._after_key = False
+        self._buffer: list[str] = []
+
+    def begin_object(self) -> None:
+        self._buffer.append(self._separator() + "{")
+        self._empty.append(True)
+
+    def end_object(self) -> None:
+        self._close("}")
+
+    def begin_array(self) -> None:
+        self._buffer.append(self._separator() + "[")
+        self._empty.append(True)
+
+    def end_array(self) -> None:
+        self._close("]")
+
+    def key(self, name: str) -> None:
+        self._buffer.append(self._separator() + encode_basestring(name) + self._key_sep)
+        self._after_key = True
+
+    def value(self, value: Any) -> None:
+        """Готовое значение целиком (лист схемы, ключевое слово узла)."""
+        buffer = self._buffer
+        buffer.append(self._separator())
+        text = _encode_flat(value, self._indent, len(self._empty))
+        if text is None:
+            text = self._encoder.encode(value)
+            if self._indent is not None and self._empty and "\n" in text:
+                text = text.replace("\n", "\n" + " " * (self._indent * len(self._empty)))
+        buffer.append(text)
+        if len(buffer) >= _FLUSH_ITEMS:
+            self._stream.write("".join(buffer))
+            buffer.clear()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._stream.write("".join(self._buffer))
+            self._buffer.clear()
+        self._stream.flush()
+
+    def _separator(self) -> str:
+        """Запятая и перевод строки перед очередным элементом контейнера."""
+        if self._after_key:
+            self._after_key = False
+            return ""
+        empty = self._empty
+        if not empty:
+            return ""
+        if empty[-1]:
+            empty[-1] = False
+            sep = ""
+        else:
+            sep = ","
+        if self._indent is None:
+            return sep
+        return sep + "\n" + " " * (self._indent * len(empty))
+
+    def _close(self, bracket: str) -> None:
+        empty = self._empty.pop()
+        if not empty and self._indent is not None:
+            self._buffer.append("\n" + " " * (self._indent * len(self._empty)) + bracket)
+        else:
+            self._buffer.append(bracket)
+        if not self._empty:
+            self.flush()
+
+
+_SCALARS = (str, bool, int, type(None))
+
+
+def _encode_scalar(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return int.__repr__(value)
+
+
+def _encode_flat(value: Any, indent: Optional[int], depth: int) -> Optional[str]:
+    """
+    Быстрая сериализация типичного листа схемы: строки, ``bool``, целые, ``null``,
+    списки строк и словари из таких значений. Для остального — ``None``
+    (значение сериализуется стандартным кодировщиком).
+    """
+    if isinstance(value, _SCALARS):
+        return _encode_scalar(value)
+    if isinstance(value, list):
+        if not all(type(v) is str for v in value):
+            return None
+        return _join([encode_basestring(v) for v in value], "[", "]", indent, depth)
+    if not isinstance(value, dict):
+        return None
+    members = []
+    for k, v in value.items():
+        if type(k) is not str:
+            return None
+        if isinstance(v, _SCALARS):
+            text = _encode_scalar(v)
+        elif isinstance(v, list) and all(type(i) is str for i in v):
+            text = _join([encode_basestring(i) for i in v], "[", "]", indent, depth + 1)
+        else:
+            return None
+        members.append(encode_basestring(k) + (":" if indent is None else ": ") + text)
+    return _join(members, "{", "}", indent, depth)
+
+
+def _join(parts: list[str], left: str, right: str, indent: Optional[int], depth: int) -> str:
+    if not parts:
+        return left + right
+    if indent is None:
+        return left + ",".join(parts) + right
+    inner = "\n" + " " * (indent * (depth + 1))
+    return left + inner + ("," + inner).join(parts) + "\n" + " " * (indent * depth) + right
+
+
+def open_output(path: str, compress: Optional[bool] = None) -> TextIO:
+    """
+    Открывает файл для записи схемы.
+    ``compress=None`` — сжатие gzip определяется по расширению ``.gz``.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
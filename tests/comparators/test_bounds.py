@@ -0,0 +1,178 @@
+import unittest
+from unittest import mock
+
+from genschema import Converter
+from genschema.comparators import (
+    DeleteElement,
+    NumericRangeComparator,
+    StatisticsComparator,
+    StringLengthComparator,
+    columnar,
+)
+from genschema.comparators.columnar import ScalarBatch
+from genschema.comparators.summary import NodeSummary
+from genschema.comparators.template import ProcessingContext, Resource
+
+
+def _jsons(*values):
+    return [Resource(str(i), "json", v) for i, v in enumerate(values)]
+
+
+class TestScalarBatch(unittest.TestCase):
+    def test_collect_groups_by_type(self):
+        batch = ScalarBatch.collect(_jsons(1, "a", None, 2.5, True, "b"))
+        self.assertEqual(batch.types, ["integer", "string", "null", "number", "boolean"])
+        self.assertEqual(batch.ids["string"], ["1", "5"])
+        self.assertTrue(batch.has_null)
+
+    def test_collect_rejects_containers(self):
+        self.assertIsNone(ScalarBatch.collect(_jsons(1, [1])))
+        self.assertIsNone(ScalarBatch.collect(_jsons({"a": 1})))
+
+    def test_formats_in_first_appearance_order(self):
+        batch = ScalarBatch.collect(_jsons("x", "a@b.io", "x", "2024-01-01", "c@d.io"))
+        self.assertEqual(batch.formats(), {None: ["0", "2"], "email": ["1", "4"], "date": ["3"]})
+
+    def test_numeric_range_keeps_python_types(self):
+        batch = ScalarBatch.collect(_jsons(3, -1, 2.5, 10))
+        self.assertEqual(batch.numeric_range(), (-1, 10))
+        self.assertIsInstance(batch.numeric_range()[0], int)
+
+    def test_numeric_range_large_column(self):
+        values = list(range(-5, columnar.NUMPY_THRESHOLD * 2)) + [2**70]
+        batch = ScalarBatch.collect(_jsons(*values))
+        self.assertEqual(batch.numeric_range(), (-5, 2**70))
+
+    def test_divisor_and_distinct(self):
+        batch = ScalarBatch.collect(_jsons(6, 9, -3, "a", "b", "a"))
+        self.assertEqual(batch.divisor(), 3)
+        self.assertEqual(batch.distinct(["string"], 2), {"a", "b"})
+        self.assertIsNone(batch.distinct(["integer", "string"], 4))
+        self.assertEqual(ScalarBatch.collect(_jsons("x")).divisor(), 0)
+
+    def test_string_length_range(self):
+        batch = ScalarBatch.collect(_jsons("", "abc", "ab"))
+        self.assertEqual(batch.string_length_range(), (0, 3))
+        self.assertIsNone(ScalarBatch.collect(_jsons(1)).string_length_range())
+
+
+class TestNumericRangeComparator(unittest.TestCase):
+    def test_from_jsons(self):
+        ctx = ProcessingContext([], _jsons(4, 1.5, 9))
+        general, alts = NumericRangeComparator().process(ctx, "", {"type": "number"})
+        self.assertEqual(general, {"minimum": 1.5, "maximum": 9})
+        self.assertIsNone(alts)
+
+    def test_unbounded_schema_drops_bound(self):
+        s = Resource("s", "schema", {"type": "integer", "minimum": 0})
+        ctx = ProcessingContext([s], _jsons(4, 9))
+        general, _ = NumericRangeComparator().process(ctx, "", {"type": "integer"})
+        self.assertEqual(general, {"minimum": 0})
+
+    def test_uses_context_batch(self):
+        ctx = ProcessingContext([], _jsons(1, 2))
+        ctx.batch = ScalarBatch.collect(_jsons(5, 7))
+        general, _ = NumericRangeComparator().process(ctx, "", {"type": "integer"})
+        self.assertEqual(general, {"minimum": 5, "maximum": 7})
+
+
+class TestStringLengthComparator(unittest.TestCase):
+    def test_pipeline(self):
+        for columnar_mode in (False, True):
+            conv = Converter(columnar=columnar_mode)
+            conv.add_json({"name": "ab", "tags": ["x", "long one"]})
+            conv.add_json({"name": "abcd", "tags": []})
+            conv.register(StringLengthComparator())
+            conv.register(DeleteElement())
+            result = conv.run()
+            self.assertEqual(
+                result["properties"]["name"], {"type": "string", "minLength": 2, "maxLength": 4}
+            )
+            self.assertEqual(
+                result["properties"]["tags"]["items"],
+                {"type": "string", "minLength": 1, "maxLength": 8},
+            )
+
+
+class TestStatisticsComparator(unittest.TestCase):
+    def _process(self, t: str, *values: object, schemas: tuple = (), **kwargs: object) -> object:
+        ctx = ProcessingContext(
+            [Resource(f"s{i}", "schema", s) for i, s in enumerate(schemas)], _jsons(*values)
+        )
+        general, alts = StatisticsComparator(**kwargs).process(ctx, "", {"type": t})
+        self.assertIsNone(alts)
+        return general
+
+    def test_numbers(self):
+        self.assertEqual(
+            self._process("integer", 10, 30, 20, 10, 30, 20),
+            {"minimum": 10, "maximum": 30, "multipleOf": 10, "enum": [10, 20, 30]},
+        )
+
+    def test_strings(self):
+        self.assertEqual(
+            self._process("string", "on", "off", "on", "off"),
+            {"minLength": 2, "maxLength": 3, "enum": ["off", "on"]},
+        )
+
+    def test_enum_needs_low_cardinality(self):
+        # значения почти не повторяются
+        self.assertNotIn("enum", self._process("string", "a", "b", "c", "a"))
+        many = [str(i % 9) for i in range(100)]
+        self.assertNotIn("enum", self._process("string", *many))
+        self.assertIn("enum", self._process("string", *many, max_enum=9))
+
+    def test_multiple_of_only_for_integers(self):
+        self.assertNotIn("multipleOf", self._process("integer", 3, 5, 3, 5))
+        self.assertNotIn("multipleOf", self._process("number", 2, 4.0, 2, 4.0))
+
+    def test_multiple_of_needs_several_values(self):
+        # кратность единственного значения — совпадение, а не свойство поля
+        for values in ((42,), (42, 42, 42), (42, 84, 42), (0, 42, 84)):
+            with self.subTest(values=values):
+                self.assertNotIn("multipleOf", self._process("integer", *values))
+        self.assertEqual(self._process("integer", 42, 84, 126)["multipleOf"], 42)
+        self.assertEqual(
+            self._process("integer", 42, min_multiple_of_values=1),
+            {"minimum": 42, "maximum": 42, "multipleOf": 42},
+        )
+        # делитель из схемы сохраняется и при одном новом значении
+        schema = {"type": "integer", "multipleOf": 42}
+        self.assertEqual(self._process("integer", 84, schemas=(schema,))["multipleOf"], 42)
+
+    def test_flags(self):
+        self.assertEqual(
+            self._process("integer", 2, 4, 6, 2, numeric_range=False, enum=False),
+            {"multipleOf": 2},
+        )
+        self.assertIsNone(self._process("string", "a", "a", string_length=False, enum=False))
+
+    def test_schemas(self):
+        schema = {"type": "integer", "enum": [3, 6], "multipleOf": 3, "minimum": 3}
+        self.assertEqual(
+            self._process("integer", 9, 9, schemas=(schema,)),
+            {"minimum": 3, "multipleOf": 3, "enum": [3, 6, 9]},
+        )
+        # схема без ограничений снимает их все
+        self.assertIsNone(self._process("integer", 1, 1, schemas=({"type": "integer"},)))
+
+    def test_single_collect_per_node(self):
+        with mock.patch.object(NodeSummary, "collect", wraps=NodeSummary.collect) as collect:
+            self._process("integer", 1, 2, 1, 2)
+        collect.assert_called_once()
+
+    def test_pipeline_round_trip(self):
+        conv = Converter()
+        for i, status in enumerate(("new", "done", "new", "done", "new")):
+            conv.add_json({"status": status, "qty": 5 * (i + 1), "price": 2.5})
+        conv.register(StatisticsComparator())
+        conv.register(DeleteElement())
+        schema = conv.run()
+        self.assertEqual(schema["properties"]["status"]["enum"], ["done", "new"])
+        self.assertEqual(schema["properties"]["qty"]["multipleOf"], 5)
+
+        again = Converter()
+        again.add_schema(schema)
+        again.register(StatisticsComparator())
+        again.register(DeleteElement())
+        self.assertEqual(again.run(), schema)
@@ -113,3 +113,27 @@ class TestRequiredComparator(unittest.TestCase):
         general, alts = self.comparator.process(ctx, "", {})
         self.assertEqual(general, {"required": ["a"]})
         self.assertIsNone(alts)
+
+    def test_process_untyped_empty_schema_is_skipped(self):
+        # items пустого массива: схема без типа не описывает ни одного объекта
+        s1 = Resource("s1", "schema", {})
+        j1 = Resource("j1", "json", {"a": 1})
+        ctx = ProcessingContext([s1], [j1], False)
+        general, _ = self.comparator.process(ctx, "", {})
+        self.assertEqual(general, {"required": ["a"]})
+
+    def test_process_schema_without_required_narrows_to_nothing(self):
+        s1 = Resource("s1", "schema", {"type": "object", "properties": {"a": {}}})
+        j1 = Resource("j1", "json", {"a": 1})
+        ctx = ProcessingContext([s1], [j1], False)
+        general, alts = self.comparator.process(ctx, "", {})
+        self.assertIsNone(general)
+        self.assertIsNone(alts)
+
+    def test_process_non_object_schema(self):
+        s1 = Resource("s1", "schema", {"type": "null"})
+        s2 = Resource("s2", "schema", {"type": "object", "required": ["a"]})
+        ctx = ProcessingContext([s1, s2], [], False)
+        general, alts = self.comparator.process(ctx, "", {})
+        self.assertIsNone(general)
+        self.assertIsNone(alts)
@@ -0,0 +1,88 @@
+import unittest
+from dataclasses import replace
+
+from genschema.comparators import (
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+    StatisticsComparator,
+    TypeComparator,
+)
+from genschema.comparators.columnar import ScalarBatch
+from genschema.comparators.summary import NodeSummary
+from genschema.comparators.template import ProcessingContext, Resource, ResourceView
+
+
+def _jsons(*values):
+    return [Resource(str(i), "json", v) for i, v in enumerate(values)]
+
+
+class TestNodeSummary(unittest.TestCase):
+    def test_collect(self):
+        summary = NodeSummary.collect(
+            _jsons({"a": 1, "b": 2}, "x", [], {"a": 3}, None, {}, [1], 2.5)
+        )
+        self.assertEqual(summary.types, ["object", "string", "array", "null", "number"])
+        self.assertEqual(summary.ids["object"], ["0", "3", "5"])
+        self.assertEqual(summary.values["string"], ["x"])
+        self.assertNotIn("object", summary.values)
+        self.assertEqual((summary.empty, summary.non_empty), (2, 6))
+        self.assertEqual(summary.keys, {"a", "b"})
+        self.assertEqual(summary.common_keys, set())
+        self.assertEqual(summary.occurrences, 3)
+        self.assertFalse(summary.is_leaf)
+        self.assertFalse(summary.only_objects)
+
+    def test_objects_only(self):
+        summary = NodeSummary.collect(_jsons({"a": 1, "b": 2}, {"a": 3, "c": 4}))
+        self.assertEqual(summary.common_keys, {"a"})
+        self.assertTrue(summary.only_objects)
+        self.assertIsNone(NodeSummary.collect([]).common_keys)
+
+    def test_reuses_batch(self):
+        batch = ScalarBatch.collect(_jsons(1, "a"))
+        summary = NodeSummary.collect(iter(()), batch)
+        self.assertIs(summary.ids, batch.ids)
+        self.assertEqual(summary.non_empty, 2)
+
+    def test_cached_on_context(self):
+        ctx = ProcessingContext([], _jsons(1, 2))
+        self.assertIs(ctx.summary, ctx.summary)
+        # новый контекст — новые данные, сводка не переносится
+        self.assertIsNot(replace(ctx, jsons=_jsons("a")).summary, ctx.summary)
+
+
+class TestSingleScan(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def _ctx(self, *values):
+        def factory():
+            self.calls += 1
+            return iter(_jsons(*values))
+
+        return ProcessingContext([], ResourceView(factory))
+
+    def test_object_node(self):
+        ctx = self._ctx({"a": 1}, {"a": 2, "b": []}, {"a": 3})
+        node = {"type": "object"}
+        self.assertEqual(TypeComparator().process(ctx, "", {})[0]["type"], "object")
+        self.assertEqual(RequiredComparator().process(ctx, "", node), ({"required": ["a"]}, None))
+        self.assertEqual(EmptyComparator().process(ctx, "", node), ({"minProperties": 1}, None))
+        self.assertEqual(self.calls, 1)
+
+    def test_string_node(self):
+        ctx = self._ctx("a@b.io", "x", "a@b.io")
+        node = {"type": "string"}
+        TypeComparator().process(ctx, "", {})
+        _, variants = FormatComparator().process(ctx, "", node)
+        self.assertEqual(
+            variants,
+            [
+                {"type": "string", "j2sElementTrigger": ["1"]},
+                {"type": "string", "j2sElementTrigger": ["0", "2"], "format": "email"},
+            ],
+        )
+        stats, _ = StatisticsComparator(min_enum_repeats=1).process(ctx, "", node)
+        self.assertEqual(stats["enum"], ["a@b.io", "x"])
+        self.assertEqual(self.calls, 1)
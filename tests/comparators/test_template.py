@@ -0,0 +1,53 @@
+import unittest
+
+from genschema.comparators.template import ProcessingContext, Resource, ResourceView
+
+
+class TestResourceView(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.produced = 0
+
+    def _factory(self):
+        self.calls += 1
+        for i in range(3):
+            self.produced += 1
+            yield Resource(str(i), "json", i)
+
+    def test_factory_not_called_until_iterated(self):
+        ResourceView(self._factory)
+        self.assertEqual(self.calls, 0)
+
+    def test_iteration_regenerates_resources(self):
+        view = ResourceView(self._factory)
+        self.assertEqual([r.content for r in view], [0, 1, 2])
+        self.assertEqual([r.content for r in view], [0, 1, 2])
+        self.assertEqual(self.calls, 2)
+
+    def test_bool_short_circuits(self):
+        view = ResourceView(self._factory)
+        self.assertTrue(view)
+        self.assertEqual(self.produced, 1)
+        self.assertFalse(ResourceView(lambda: iter(())))
+
+    def test_materialize_caches(self):
+        view = ResourceView(self._factory)
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view[1].content, 1)
+        list(view)
+        self.assertEqual(self.calls, 1)
+
+    def test_add_and_eq(self):
+        view = ResourceView(self._factory)
+        extra = Resource("x", "schema", {})
+        self.assertEqual([r.id for r in view + [extra]], ["0", "1", "2", "x"])
+        self.assertEqual([r.id for r in [extra] + view], ["x", "0", "1", "2"])
+        self.assertEqual(view, list(self._factory()))
+
+    def test_context_materialize(self):
+        view = ResourceView(self._factory)
+        ctx = ProcessingContext([], view)
+        ctx.materialize()
+        list(ctx.jsons)
+        list(ctx.jsons)
+        self.assertEqual(self.calls, 1)
@@ -1,7 +1,19 @@
+import enum
 import unittest
+from collections import OrderedDict
 
 from genschema.comparators.template import ProcessingContext, Resource
-from genschema.comparators.type import TypeComparator, infer_json_type, infer_schema_type
+from genschema.comparators.type import (
+    _JSON_TYPES,
+    TypeComparator,
+    infer_json_type,
+    infer_json_types,
+    infer_schema_type,
+)
+
+
+class _Level(enum.IntEnum):
+    LOW = 1
 
 
 class TestInferJsonType(unittest.TestCase):
@@ -64,6 +76,73 @@ class TestInferJsonType(unittest.TestCase):
         self.assertEqual(infer_json_type(bytearray()), "any")  # bytearray
         self.assertEqual(infer_json_type(object()), "any")  # custom object
 
+    def test_subclasses(self):
+        self.assertEqual(infer_json_type(_Level.LOW), "integer")
+        self.assertEqual(infer_json_type(OrderedDict(a=1)), "object")
+        self.assertEqual(infer_json_type(type("Text", (str,), {})("x")), "string")
+        # bool — подкласс int, но остаётся boolean
+        self.assertEqual(infer_json_type(False), "boolean")
+
+    def test_batch(self):
+        values = [None, True, 1, 1.5, "s", [], {}, _Level.LOW, (1,)]
+        self.assertEqual(infer_json_types(values), [infer_json_type(v) for v in values])
+        self.assertEqual(infer_json_types(iter(values[:2])), ["null", "boolean"])
+
+
+def _by_isinstance(v: object) -> str:
+    """Эталон: классификация цепочкой isinstance, без таблицы типов."""
+    for py_type, json_type in (
+        (type(None), "null"),
+        (bool, "boolean"),
+        (int, "integer"),
+        (float, "number"),
+        (str, "string"),
+        (list, "array"),
+        (dict, "object"),
+    ):
+        if isinstance(v, py_type):
+            return json_type
+    return "any"
+
+
+class TestInferJsonTypeDispatch(unittest.TestCase):
+    def test_table_matches_isinstance(self):
+        class Flag(enum.IntFlag):
+            A = 1
+
+        values = [
+            "text",
+            {"a": 1},
+            12,
+            3.5,
+            None,
+            True,
+            [1],
+            (1,),
+            b"x",
+            Flag.A,
+            _Level.LOW,
+            OrderedDict(),
+            type("Items", (list,), {})(),
+            type("Ratio", (float,), {})(0.5),
+        ]
+        expected = [_by_isinstance(v) for v in values]
+        # повторный вызов идёт по типу, уже дописанному в таблицу
+        for _ in range(2):
+            self.assertEqual([infer_json_type(v) for v in values], expected)
+            self.assertEqual(infer_json_types(values), expected)
+
+    def test_only_json_subclasses_are_cached(self):
+        class Point:
+            pass
+
+        for value in ((1,), b"x", Point()):
+            with self.subTest(value=value):
+                self.assertEqual(infer_json_type(value), "any")
+                self.assertNotIn(type(value), _JSON_TYPES)
+        self.assertEqual(infer_json_type(_Level.LOW), "integer")
+        self.assertIn(_Level, _JSON_TYPES)
+
 
 class TestInferSchemaType(unittest.TestCase):
     def test_non_dict_input(self):
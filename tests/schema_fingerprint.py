@@ -4,7 +4,7 @@ import hashlib
 import json
 import os
 
-from genschema import Converter, PseudoArrayHandler
+from genschema import Pipeline, PseudoArrayHandler
 from genschema.comparators import (
     DeleteElement,
     EmptyComparator,
@@ -21,16 +21,22 @@ def _load_datasets(dataset_dir: str) -> list[str]:
     return sorted(dataset_files)
 
 
+PIPELINE = Pipeline(
+    [
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        NoAdditionalProperties(),
+        DeleteElement(),
+        DeleteElement("isPseudoArray"),
+    ],
+    pseudo_handler=PseudoArrayHandler(),
+    base_of="anyOf",
+)
+
+
 def _generate_schema(data: object) -> dict:
-    conv = Converter(pseudo_handler=PseudoArrayHandler(), base_of="anyOf")
-    conv.add_json(data)
-    conv.register(FormatComparator())
-    conv.register(RequiredComparator())
-    conv.register(EmptyComparator())
-    conv.register(NoAdditionalProperties())
-    conv.register(DeleteElement())
-    conv.register(DeleteElement("isPseudoArray"))
-    return conv.run()
+    return PIPELINE.generate([data])
 
 
 def _canonical_json(obj: object) -> str:
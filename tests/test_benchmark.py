@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import benchmark
+
+
+class TestStructuralDiff(unittest.TestCase):
+    def test_equivalent_spellings(self):
+        ours = {
+            "type": "object",
+            "properties": {
+                "a": {"anyOf": [{"type": "integer"}, {"type": "null"}]},
+                "b": {"type": "array", "maxItems": 0, "items": {}},
+            },
+            "required": ["a"],
+        }
+        theirs = {
+            "$schema": "http://json-schema.org/schema#",
+            "type": "object",
+            "properties": {"a": {"type": ["integer", "null"]}, "b": {"type": "array"}},
+            "required": ["a"],
+        }
+        diff = benchmark.structural_diff(ours, theirs)
+        self.assertTrue(diff["identical"])
+        self.assertEqual(diff["common_paths"], 3)
+
+    def test_differences(self):
+        ours = {
+            "type": "object",
+            "properties": {"a": {"type": "string", "format": "email"}, "b": {"type": "integer"}},
+            "required": ["a", "b"],
+        }
+        theirs = {
+            "type": "object",
+            "properties": {"a": {"type": "string"}, "c": {"type": "number"}},
+            "required": ["a"],
+        }
+        diff = benchmark.structural_diff(ours, theirs, limit=1)
+        self.assertFalse(diff["identical"])
+        self.assertEqual(diff["only_genschema"], ["/properties/b"])
+        self.assertEqual(diff["only_genson"], ["/properties/c"])
+        self.assertEqual(diff["required"], [{"path": "", "genschema": ["a", "b"], "genson": ["a"]}])
+        self.assertEqual(diff["format"][0]["genschema"], ["email"])
+        self.assertEqual(diff["counts"]["types"], 0)
+
+
+class TestHarness(unittest.TestCase):
+    def test_results_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "one.json"), "w") as f:
+                json.dump({"a": [1, 2], "b": "x@y.io"}, f)
+            out = os.path.join(tmp, "out.json")
+            argv = ["benchmark.py", "--dataset-dir", tmp, "--sizes", "3,7", "--repeat", "1"]
+            with (
+                mock.patch.object(sys, "argv", argv + ["--out", out]),
+                mock.patch("sys.stdout"),
+                mock.patch("sys.stderr"),
+            ):
+                self.assertEqual(benchmark.main(), 0)
+            with open(out) as f:
+                results = json.load(f)
+        self.assertEqual(
+            [(r["workload"], r["documents"]) for r in results["results"]],
+            [("dataset:one.json", 1), ("records:3", 3), ("records:7", 7)]
+            + [("orders:3", 3), ("orders:7", 7)],
+        )
+        for entry in results["results"]:
+            self.assertGreater(entry["genschema"]["peak_memory_bytes"], 0)
+            self.assertNotIn("schema", entry["genschema"])
+            self.assertEqual(entry["diff"] is None, entry["genson"] is None)
+        self.assertEqual(results["micro"]["infer_json_type"]["values"], 20000)
+
+    def test_synthetic_workloads_are_reproducible(self):
+        first = dict(benchmark.iter_workloads("/nonexistent", [5, 10], seed=3))
+        second = dict(benchmark.iter_workloads("/nonexistent", [5, 10], seed=3))
+        self.assertEqual(first, second)
+        # меньший размер — начало большего
+        self.assertEqual(first["orders:10"][:5], first["orders:5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from genschema import Converter, PseudoArrayHandler, SchemaCache, pipeline
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+)
+
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SchemaCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(SchemaCache.key("nothing")))
+
+    def test_put_get(self):
+        key = SchemaCache.key("a", "b")
+        self.cache.put(key, {"type": "string"})
+        self.assertEqual(self.cache.get(key), {"type": "string"})
+
+    def test_key_depends_on_parts(self):
+        self.assertNotEqual(SchemaCache.key("ab", "c"), SchemaCache.key("a", "bc"))
+
+    def test_lru_eviction(self):
+        cache = SchemaCache(self.tmp.name, max_bytes=60)
+        keys = [SchemaCache.key(str(i)) for i in range(3)]
+        cache.put(keys[0], {"type": "string", "i": 0})
+        cache.put(keys[1], {"type": "string", "i": 1})
+        os.utime(cache._path(keys[0]), (0, 0))
+        os.utime(cache._path(keys[1]), (1, 1))
+        cache.get(keys[0])  # становится самым свежим
+        cache.put(keys[2], {"type": "string", "i": 2})
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+    def test_clear(self):
+        key = SchemaCache.key("x")
+        self.cache.put(key, {})
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(key))
+
+
+class TestConverterCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SchemaCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name: str, data: object) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def _converter(self, cache: object = None) -> Converter:
+        conv = Converter(pseudo_handler=PseudoArrayHandler(), cache=cache)  # type: ignore[arg-type]
+        conv.register(FormatComparator())
+        conv.register(RequiredComparator())
+        conv.register(EmptyComparator())
+        conv.register(DeleteElement())
+        conv.register(DeleteElement("isPseudoArray"))
+        return conv
+
+    def _run(self, paths: list[str], cache: object = None) -> dict:
+        conv = self._converter(cache)
+        for p in paths:
+            conv.add_json(p)
+        return conv.run()
+
+    def test_single_file_matches_uncached(self):
+        path = self._write("a.json", {"id": 1, "mail": "a@b.io", "tags": ["x", 2]})
+        self.assertEqual(self._run([path], self.cache), self._run([path]))
+
+    def test_unchanged_inputs_are_not_parsed(self):
+        paths = [self._write("a.json", {"a": 1}), self._write("b.json", {"a": "x", "b": []})]
+        first = self._run(paths, self.cache)
+        with mock.patch.object(pipeline, "_load_json_file") as load:
+            second = self._run(paths, self.cache)
+        load.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_only_changed_file_is_reprofiled(self):
+        a = self._write("a.json", {"a": 1})
+        b = self._write("b.json", {"a": 2, "b": True})
+        self._run([a, b], self.cache)
+        self._write("b.json", {"a": 2, "b": "2024-01-01"})
+
+        loaded = []
+        real = pipeline._load_json_file
+
+        def spy(path: str, *args: object) -> object:
+            loaded.append(path)
+            return real(path, *args)
+
+        with mock.patch.object(pipeline, "_load_json_file", side_effect=spy):
+            result = self._run([a, b], self.cache)
+        self.assertEqual(loaded, [b])
+        self.assertEqual(result, self._run([a, b]))
+
+    def test_cold_and_incremental_runs_match_uncached(self):
+        # числовые ключи одного файла — не псевдомассив вместе с ключом name другого
+        a = self._write("a.json", {"items": {"1": {"n": 1}, "2": {"n": 2}}})
+        b = self._write("b.json", {"items": {"name": {"n": 3}}})
+        expected = self._run([a, b])
+        self.assertEqual(sorted(expected["properties"]["items"]["properties"]), ["1", "2", "name"])
+        self.assertEqual(self._run([a, b], self.cache), expected)
+
+        self._write("b.json", {"items": {"name": {"n": "x"}}})
+        with mock.patch.object(pipeline, "_load_json_file", wraps=pipeline._load_json_file) as load:
+            result = self._run([a, b], self.cache)
+        self.assertEqual([c.args[0] for c in load.call_args_list], [b])
+        self.assertEqual(result, self._run([a, b]))
+
+    def test_entries_are_keyed_by_parsed_bytes(self):
+        from genschema import cache
+
+        path = self._write("a.json", {"a": 1})
+        # файл изменился между хэшированием и разбором: запись — по разобранным байтам
+        with mock.patch.object(cache, "file_digest", return_value="0" * 64):
+            first = self._run([path], self.cache)
+        with mock.patch.object(pipeline, "_load_json_file") as load:
+            second = self._run([path], self.cache)
+        load.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_config_change_misses_cache(self):
+        path = self._write("a.json", {"a": "x@y.io"})
+        self._run([path], self.cache)
+        conv = Converter(cache=self.cache)
+        conv.add_json(path)
+        self.assertNotEqual(conv.fingerprint(), self._converter().fingerprint())
+        self.assertEqual(conv.run()["properties"]["a"]["type"], "string")
+
+    def test_canonical_key_ignores_input_order(self):
+        paths = [self._write("a.json", {"a": 1}), self._write("b.json", {"a": "x"})]
+        results = []
+        for ordered in (paths, paths[::-1]):
+            conv = Converter(cache=self.cache, canonical=True)
+            conv.register(DeleteElement())
+            for p in ordered:
+                conv.add_json(p)
+            results.append(conv.run())
+        self.assertEqual(results[0], results[1])
+        # частичные схемы двух файлов и один общий результат
+        self.assertEqual(len(list(self.cache.directory.glob("*/*.json"))), 3)
+
+    def test_input_mode_is_part_of_key(self):
+        lines = '{"a": 1}\n{"a": "x"}\n'
+        for name in ("docs.jsonl", "docs.json"):
+            with open(os.path.join(self.tmp.name, name), "w", encoding="utf-8") as f:
+                f.write(lines)
+        path = os.path.join(self.tmp.name, "docs.jsonl")
+        self.assertIn("anyOf", self._run([path], self.cache)["properties"]["a"])
+        # те же байты как один документ JSON некорректны, а не берутся из кэша
+        with self.assertRaises(ValueError):
+            self._run([os.path.join(self.tmp.name, "docs.json")], self.cache)
+
+    def test_truncations_survive_cache_hit(self):
+        wide = self._write("wide.json", {"a": 1, "b": 2, "c": 3})
+        other = self._write("other.json", {"a": 1})
+        reports = []
+        for _ in range(2):
+            conv = Converter(cache=self.cache, max_properties_per_object=2)
+            conv.register(DeleteElement())
+            conv.add_json(wide)
+            conv.add_json(other)
+            conv.run()
+            reports.append(conv.truncations)
+        self.assertTrue(reports[0])
+        self.assertEqual(reports[1], reports[0])
+
+        # изменился другой файл: отчёт усечения берётся из частичной схемы в кэше
+        self._write("other.json", {"a": 2})
+        conv = Converter(cache=self.cache, max_properties_per_object=2)
+        conv.register(DeleteElement())
+        conv.add_json(wide)
+        conv.add_json(other)
+        with mock.patch.object(pipeline, "_load_json_file", wraps=pipeline._load_json_file) as load:
+            conv.run()
+        self.assertEqual([c.args[0] for c in load.call_args_list], [other])
+        self.assertEqual(conv.truncations[0], reports[0][0])
@@ -0,0 +1,116 @@
+import json
+import random
+import unittest
+from typing import Any
+
+from genschema import Converter, DynamicKeyHandler, Pipeline, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    NumericRangeComparator,
+    RequiredComparator,
+    StringLengthComparator,
+)
+
+SCALARS: list[Any] = [
+    None,
+    True,
+    0,
+    7,
+    1.0,
+    2.5,
+    "",
+    "text",
+    "a@b.io",
+    "2024-01-31",
+    "https://example.com",
+]
+KEYS = ["id", "name", "tags", "meta", "1", "2", "3"]
+
+
+def _value(rng: random.Random, depth: int) -> Any:
+    roll = rng.random()
+    if depth >= 3 or roll < 0.5:
+        return rng.choice(SCALARS)
+    if roll < 0.75:
+        return [_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    keys = rng.sample(KEYS, rng.randint(0, 4))
+    return {k: _value(rng, depth + 1) for k in keys}
+
+
+def _documents(seed: int) -> list[Any]:
+    rng = random.Random(seed)
+    return [_value(rng, 0) for _ in range(rng.randint(2, 8))]
+
+
+def _shuffled_keys(value: Any, rng: random.Random) -> Any:
+    """Тот же JSON с другим порядком ключей объектов."""
+    if isinstance(value, dict):
+        items = list(value.items())
+        rng.shuffle(items)
+        return {k: _shuffled_keys(v, rng) for k, v in items}
+    if isinstance(value, list):
+        return [_shuffled_keys(v, rng) for v in value]
+    return value
+
+
+class TestCanonicalOrder(unittest.TestCase):
+    COMPARATORS = (
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        NumericRangeComparator(),
+        StringLengthComparator(),
+        DeleteElement(),
+        DeleteElement("isPseudoArray"),
+    )
+    CONFIGS: list[dict[str, Any]] = [
+        {},
+        {"max_variants": 2},
+        {"columnar": True},
+        {"pseudo_handler": DynamicKeyHandler(min_keys=2)},
+        {"max_properties_per_object": 2, "max_depth": 2},
+        {"base_of": "oneOf", "max_schema_nodes": 12},
+    ]
+
+    def _pipeline(self, **kwargs: Any) -> Pipeline:
+        kwargs.setdefault("pseudo_handler", PseudoArrayHandler())
+        return Pipeline(self.COMPARATORS, canonical=True, **kwargs)
+
+    def test_permutations_give_identical_bytes(self):
+        for config in self.CONFIGS:
+            pipeline = self._pipeline(**config)
+            for seed in range(40):
+                docs = _documents(seed)
+                rng = random.Random(seed)
+                expected = json.dumps(pipeline.generate(docs))
+                for _ in range(4):
+                    permuted = [_shuffled_keys(d, rng) for d in rng.sample(docs, len(docs))]
+                    with self.subTest(config=config, seed=seed):
+                        self.assertEqual(json.dumps(pipeline.generate(permuted)), expected)
+
+    def test_schemas_are_ordered_too(self):
+        pipeline = self._pipeline()
+        parts = [pipeline.generate([d]) for d in _documents(3)]
+        expected = pipeline.generate(schemas=parts)
+        self.assertEqual(pipeline.generate(schemas=parts[::-1]), expected)
+
+    def test_default_mode_keeps_input_order(self):
+        pipeline = Pipeline([DeleteElement()])
+        self.assertEqual(
+            [v["type"] for v in pipeline.generate(["a", 1])["anyOf"]], ["string", "integer"]
+        )
+        self.assertEqual(
+            [v["type"] for v in pipeline.generate([1, "a"])["anyOf"]], ["integer", "string"]
+        )
+        self.assertNotEqual(pipeline.fingerprint(), self._pipeline().fingerprint())
+
+    def test_converter_option(self):
+        conv = Converter(canonical=True)
+        conv.register(DeleteElement())
+        conv.add_json([1])
+        conv.add_json({"a": 1})
+        self.assertTrue(conv.pipeline.canonical)
+        expected = Pipeline([DeleteElement()], canonical=True).generate([{"a": 1}, [1]])
+        self.assertEqual(conv.run(), expected)
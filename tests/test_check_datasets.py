@@ -14,6 +14,7 @@ from genschema.comparators import (
     NoAdditionalProperties,
     RequiredComparator,
 )
+from genschema.validator import compile_validator
 
 dataset_dir = "tests/datasets/"
 dataset_files = glob.glob(f"{dataset_dir}*.json")
@@ -66,3 +67,14 @@ def test_schema_generation_and_validation(file_path):
         print("Data validates successfully against the schema.")
     except Exception as e:  # Catch ValidationError or others
         pytest.fail(f"Data for {file_path} does not validate against schema: {str(e)}")
+
+    # Step 5: Validate the data with the generated specialized validator
+    start_compile = time.time()
+    compiled = compile_validator(schema)
+    print(f"Time to compile validator: {round(time.time() - start_compile, 4)} seconds")
+    start_compiled_val = time.time()
+    assert compiled(data), f"Generated validator rejects data for {file_path}"
+    compiled_val_time = time.time() - start_compiled_val
+    print(f"Time to validate data with generated validator: {round(compiled_val_time, 4)} seconds")
+    if compiled_val_time:
+        print(f"Speedup over jsonschema: {round(data_val_time / compiled_val_time, 1)}x")
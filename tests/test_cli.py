@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from genschema import cli
+
+
+class TestCliInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "data")
+        os.makedirs(os.path.join(self.root, "a", "b"))
+        self.files = []
+        for i, rel in enumerate(["one.json", "a/two.json", "a/b/three.json", "a/skip.txt"]):
+            path = os.path.join(self.root, rel)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"id": i, "name": f"n{i}", "extra" if i % 2 else "tag": [i]}, f)
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _main(self, *argv: str) -> dict:
+        out = os.path.join(self.tmp.name, "schema.json")
+        with mock.patch.object(sys, "argv", ["genschema", *argv, "-o", out]):
+            cli.main()
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_directory_is_traversed_recursively(self):
+        self.assertEqual(
+            cli._expand_inputs([self.root], "*.json"),
+            sorted(self.files[:3]),
+        )
+
+    def test_glob_pattern(self):
+        pattern = os.path.join(self.root, "**", "t*.json")
+        self.assertEqual(cli._expand_inputs([pattern], "*.json"), sorted(self.files[1:3]))
+
+    def test_missing_input(self):
+        with self.assertRaises(FileNotFoundError):
+            cli._expand_inputs([os.path.join(self.root, "nope.json")], "*.json")
+        with self.assertRaises(FileNotFoundError):
+            cli._expand_inputs([os.path.join(self.root, "*.yaml")], "*.json")
+
+    def test_chunk(self):
+        chunks = cli._chunk([str(i) for i in range(10)], 2)
+        self.assertEqual(sum(chunks, []), [str(i) for i in range(10)])
+        self.assertTrue(all(len(c) <= 2 for c in chunks))
+
+    def test_parallel_matches_serial(self):
+        serial = self._main(self.root)
+        parallel = self._main(self.root, "--jobs", "2")
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial["required"], ["id", "name"])
+
+    def test_parallel_output_does_not_depend_on_chunking(self):
+        # псевдомассивы определяются при слиянии по всем файлам, а не в каждой пачке
+        datasets = os.path.join(os.path.dirname(__file__), "datasets")
+        serial = self._main(datasets)
+        for jobs in ("2", "4"):
+            with self.subTest(jobs=jobs):
+                self.assertEqual(self._main(datasets, "--jobs", jobs), serial)
+
+    def test_validator_out(self):
+        path = os.path.join(self.tmp.name, "schema_validator.py")
+        self._main(self.root, "--validator-out", path)
+        namespace: dict = {}
+        with open(path, encoding="utf-8") as f:
+            exec(f.read(), namespace)
+        self.assertTrue(namespace["validate"]({"id": 1, "name": "x", "tag": [1]}))
+        self.assertFalse(namespace["validate"]({"id": "1", "name": "x"}))
+
+    def test_gzip_and_compact_output(self):
+        expected = self._main(self.root)
+        out = os.path.join(self.tmp.name, "schema.json.gz")
+        with mock.patch.object(sys, "argv", ["genschema", self.root, "--compact", "-o", out]):
+            cli.main()
+        with gzip.open(out, "rt", encoding="utf-8") as f:
+            text = f.read()
+        self.assertNotIn(" ", text)
+        self.assertEqual(json.loads(text), expected)
+
+    def test_compressed_json_lines(self):
+        expected = self._main(*self.files[:3])
+        archive = os.path.join(self.root, "a", "captures.jsonl.gz")
+        with gzip.open(archive, "wt", encoding="utf-8") as f:
+            for path in self.files[:3]:
+                with open(path, encoding="utf-8") as src:
+                    f.write(json.dumps(json.load(src)) + "\n")
+        self.assertEqual(self._main(archive), expected)
+        self.assertEqual(self._main(archive, "--batch-size", "2"), expected)
+        self.assertIn(archive, cli._expand_inputs([self.root], cli.DEFAULT_INCLUDE))
+
+    def test_tuples(self):
+        path = os.path.join(self.root, "pair.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"pair": [1, "a"]}, f)
+        self.assertIn("items", self._main(path)["properties"]["pair"])
+        pair = self._main(path, "--tuples")["properties"]["pair"]
+        self.assertEqual([p["type"] for p in pair["prefixItems"]], ["integer", "string"])
+        self.assertIs(pair["items"], False)
@@ -0,0 +1,78 @@
+import random
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from genschema import Converter, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+)
+from genschema.comparators.format import FormatDetector
+
+WORKERS = 8
+
+
+def _payload(seed: int) -> list:
+    rnd = random.Random(seed)
+    values = [1, 2.5, "x", "a@b.io", "2024-01-01", None, True, [1, "y"], {"k": 1}]
+    return [
+        {f"f{rnd.randrange(6)}": rnd.choice(values) for _ in range(rnd.randrange(1, 6))}
+        for _ in range(rnd.randrange(1, 20))
+    ]
+
+
+def _converter() -> Converter:
+    conv = Converter(pseudo_handler=PseudoArrayHandler(), max_schema_nodes=200)
+    for c in (FormatComparator(), RequiredComparator(), EmptyComparator(), DeleteElement()):
+        conv.register(c)
+    return conv
+
+
+class TestSharedConverter(unittest.TestCase):
+    def test_generate_under_thread_pool(self):
+        conv = _converter()
+        payloads = [_payload(i) for i in range(300)]
+        expected = [conv.generate(p) for p in payloads]
+
+        barrier = threading.Barrier(WORKERS)
+
+        def work(i: int) -> dict:
+            if i < WORKERS:
+                barrier.wait()  # одновременный старт первых задач
+            return conv.generate(payloads[i])
+
+        with ThreadPoolExecutor(WORKERS) as pool:
+            results = list(pool.map(work, range(len(payloads))))
+        self.assertEqual(results, expected)
+
+    def test_sessions_isolate_requests(self):
+        conv = _converter()
+        payloads = [_payload(i) for i in range(100)]
+
+        def request(payload: list) -> dict:
+            session = conv.session()
+            for doc in payload:
+                session.add_json(doc)
+            return session.run()
+
+        expected = [request(p) for p in payloads]
+        with ThreadPoolExecutor(WORKERS) as pool:
+            self.assertEqual(list(pool.map(request, payloads)), expected)
+
+    def test_concurrent_add_json_keeps_every_document(self):
+        conv = _converter()
+        docs = [{"n": i} for i in range(2000)]
+        with ThreadPoolExecutor(WORKERS) as pool:
+            list(pool.map(conv.add_json, docs))
+        result = conv.run()
+        self.assertEqual(result["properties"]["n"], {"type": "integer"})
+        self.assertEqual(sorted(int(j.id) for j in conv._jsons), list(range(2000)))
+
+    def test_format_detector_per_thread_cache(self):
+        values = ["a@b.io", "2024-01-01", "x", "http://e.io"] * 500
+        expected = [FormatDetector.detect(v) for v in values]
+        with ThreadPoolExecutor(WORKERS) as pool:
+            self.assertEqual(list(pool.map(FormatDetector.detect, values)), expected)
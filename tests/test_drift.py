@@ -0,0 +1,163 @@
+import unittest
+
+from genschema import Converter, DriftDetector, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    FormatComparator,
+    RequiredComparator,
+)
+
+
+def _schema(*docs: object) -> dict:
+    conv = Converter(pseudo_handler=PseudoArrayHandler())
+    for d in docs:
+        conv.add_json(d)  # type: ignore[arg-type]
+    conv.register(FormatComparator())
+    conv.register(RequiredComparator())
+    conv.register(DeleteElement())
+    conv.register(DeleteElement("isPseudoArray"))
+    return conv.run()
+
+
+class TestDriftDetector(unittest.TestCase):
+    BASE = {"id": 1, "mail": "a@b.io", "scores": {"1": 1.5, "2": 2}, "tags": ["x"]}
+
+    def _kinds(self, *docs: object) -> list[tuple[str, str]]:
+        detector = DriftDetector(_schema(self.BASE), PseudoArrayHandler())
+        detector.feed_many(docs)
+        return [(d.path, d.kind) for d in detector.report()]
+
+    def test_matching_documents(self):
+        detector = DriftDetector(_schema(self.BASE), PseudoArrayHandler())
+        self.assertTrue(detector.feed({**self.BASE, "scores": {"7": 3}, "tags": []}))
+        self.assertEqual(detector.report(), [])
+        self.assertEqual(detector.documents, 1)
+
+    def test_type_and_format(self):
+        self.assertEqual(
+            self._kinds({**self.BASE, "id": "1", "mail": "nope", "tags": [None]}),
+            [
+                ("/properties/id", "type"),
+                ("/properties/mail", "format"),
+                ("/properties/tags/items", "type"),
+            ],
+        )
+
+    def test_required_and_new_property(self):
+        doc = {k: v for k, v in self.BASE.items() if k != "id"}
+        self.assertEqual(
+            self._kinds({**doc, "extra": 1}),
+            [("/properties/extra", "property"), ("/properties/id", "required")],
+        )
+
+    def test_pseudo_array_status(self):
+        self.assertEqual(
+            self._kinds({**self.BASE, "scores": {"a": 1}}),
+            [("/properties/scores", "pseudo_array")],
+        )
+
+    def test_mismatched_subtree_is_not_descended(self):
+        self.assertEqual(
+            self._kinds({**self.BASE, "tags": {"k": [None]}}), [("/properties/tags", "type")]
+        )
+
+    def test_counts_are_aggregated(self):
+        detector = DriftDetector({"type": "integer"})
+        detector.feed_many([1, "a", "b", None])
+        self.assertEqual(
+            [(d.actual, d.count, d.first_document) for d in detector.report()],
+            [("null", 1, 3), ("string", 2, 1)],
+        )
+
+    def test_alternatives(self):
+        detector = DriftDetector(_schema([1, "a@b.io", "x"]))
+        detector.feed(["plain", 5, True, 0.5])
+        self.assertEqual(
+            [(d.path, d.actual) for d in detector.report()],
+            [("/items", "boolean"), ("/items", "number")],
+        )
+
+    def test_additional_properties_schema(self):
+        baseline = {
+            "type": "object",
+            "properties": {"m": {"type": "object", "additionalProperties": {"type": "integer"}}},
+        }
+        detector = DriftDetector(baseline)
+        self.assertTrue(detector.feed({"m": {"a": 1, "b": 2, "c": 3, "d": 4}}))
+        detector.feed({"m": {"e": "x"}})
+        self.assertEqual(
+            [(d.path, d.kind) for d in detector.report()],
+            [("/properties/m/additionalProperties", "type")],
+        )
+
+    def test_truncated_baseline(self):
+        deep = {"meta": {"a": 1, "b": "x", "c": None}, "id": 1}
+        wide = {f"k{i}": {"v": i, "tags": ["t"]} for i in range(5)}
+        for doc, budget in ((deep, {"max_depth": 1}), (wide, {"max_properties_per_object": 3})):
+            conv = Converter(**budget)  # type: ignore[arg-type]
+            conv.register(DeleteElement())
+            conv.add_json(doc)
+            baseline = conv.run()
+            with self.subTest(budget=budget):
+                self.assertTrue(conv.truncations)
+                detector = DriftDetector(baseline, PseudoArrayHandler())
+                self.assertTrue(detector.feed(doc))
+                self.assertEqual(detector.report(), [])
+
+    def test_recursive_and_cyclic_refs(self):
+        tree = {
+            "$ref": "#/$defs/T",
+            "$defs": {
+                "T": {
+                    "type": "object",
+                    "properties": {
+                        "v": {"type": "integer"},
+                        "kids": {"type": "array", "items": {"$ref": "#/$defs/T"}},
+                    },
+                }
+            },
+        }
+        detector = DriftDetector(tree)
+        detector.feed({"v": 1, "kids": [{"v": 2, "kids": [{"v": "x"}]}]})
+        self.assertEqual(
+            [(d.path, d.kind) for d in detector.report()], [("/$defs/T/properties/v", "type")]
+        )
+        # ссылка, которая никуда не ведёт, не описывает значений и не даёт дрейфа
+        self.assertTrue(DriftDetector({"$ref": "#/a", "a": {"$ref": "#/a"}}).feed(5))
+
+
+class TestConverterDrift(unittest.TestCase):
+    def test_baseline_from_add_schema(self):
+        conv = Converter(pseudo_handler=PseudoArrayHandler())
+        conv.add_schema(_schema({"a": 1}))
+        conv.add_json({"a": 2})
+        conv.add_json({"a": 2.5, "b": True})
+        drifts = conv.drift()
+        self.assertEqual(
+            [(d.path, d.kind, d.first_document) for d in drifts],
+            [("/properties/a", "type", 1), ("/properties/b", "property", 1)],
+        )
+
+    def test_baselines_with_refs(self):
+        addr = {"type": "object", "properties": {"city": {"type": "string"}}}
+        conv = Converter(pseudo_handler=PseudoArrayHandler())
+        for name in ("home", "work"):
+            conv.add_schema(
+                {
+                    "type": "object",
+                    "properties": {name: {"$ref": "#/$defs/Addr"}},
+                    "$defs": {"Addr": addr},
+                }
+            )
+        conv.add_json({"home": {"city": "x"}, "work": {"city": "y"}})
+        conv.add_json({"home": {"city": 1}})
+        self.assertEqual(
+            [(d.path, d.kind, d.expected) for d in conv.drift()],
+            [("/$defs/Addr/properties/city", "type", ["string"])],
+        )
+
+    def test_requires_baseline(self):
+        conv = Converter()
+        conv.add_json({"a": 1})
+        with self.assertRaises(ValueError):
+            conv.drift()
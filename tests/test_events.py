@@ -0,0 +1,192 @@
+import unittest
+from collections.abc import Iterator
+from decimal import Decimal
+from typing import Any
+
+from genschema import Converter, EventProfiler, Pipeline, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+    StatisticsComparator,
+)
+from tests.test_canonical import _documents
+
+
+def _events(value: Any) -> Iterator[tuple[str, Any]]:
+    """События разбора документа в порядке обхода."""
+    if isinstance(value, dict):
+        yield "start_object", None
+        for k, v in value.items():
+            yield "key", k
+            yield from _events(v)
+        yield "end_object", None
+    elif isinstance(value, list):
+        yield "start_array", None
+        for v in value:
+            yield from _events(v)
+        yield "end_array", None
+    else:
+        yield "value", value
+
+
+class TestEventProfiler(unittest.TestCase):
+    def test_profile(self):
+        profiler = EventProfiler()
+        for doc in ({"id": 1, "tags": ["a"]}, {"id": 4, "tags": [], "mail": "a@b.io"}):
+            profiler.feed(_events(doc))
+        self.assertEqual(profiler.documents, 2)
+        self.assertEqual(
+            profiler.schema(),
+            {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer", "minimum": 1, "maximum": 4},
+                    "tags": {
+                        "type": "array",
+                        "items": {"type": "string", "minLength": 1, "maxLength": 1},
+                    },
+                    "mail": {"type": "string", "format": "email", "minLength": 6, "maxLength": 6},
+                },
+                "required": ["id", "tags"],
+                "minProperties": 1,
+            },
+        )
+
+    def test_ijson_events(self):
+        # ijson.parse: (префикс, событие, значение), числа — Decimal
+        profiler = EventProfiler()
+        profiler.feed(
+            [
+                ("", "start_map", None),
+                ("", "map_key", "n"),
+                ("n", "start_array", None),
+                ("n.item", "number", Decimal("2")),
+                ("n.item", "number", Decimal("2.5")),
+                ("n.item", "null", None),
+                ("n", "end_array", None),
+                ("", "end_map", None),
+            ]
+        )
+        items = profiler.schema()["properties"]["n"]["items"]
+        self.assertEqual([v["type"] for v in items["anyOf"]], ["integer", "number", "null"])
+
+    def test_malformed(self):
+        for events in (
+            [("end_object", None)],
+            [("start_array", None), ("end_object", None)],
+            [("start_object", None), ("value", 1)],
+            [("key", "a")],
+            [("finish", None)],
+        ):
+            with self.subTest(events=events), self.assertRaises(ValueError):
+                EventProfiler().feed(events)
+        profiler = EventProfiler()
+        profiler.start_object()
+        with self.assertRaises(ValueError):
+            profiler.schema()
+
+
+class TestAdaptive(unittest.TestCase):
+    def _profile(self, docs: list[Any], **kwargs: int) -> EventProfiler:
+        profiler = EventProfiler(**kwargs)
+        for doc in docs:
+            profiler.feed(_events(doc))
+        return profiler
+
+    def test_converged_stream_matches_full(self):
+        docs = [
+            {"id": i, "mail": f"u{i % 50}@x.io", "price": i % 7 + 0.5, "tags": ["a", "bb"][: i % 3]}
+            for i in range(2000)
+        ]
+        adaptive = self._profile(docs, converge_after=20, sample_every=8)
+        self.assertGreater(adaptive.skipped, 2000)
+        self.assertEqual(adaptive.schema(), self._profile(docs).schema())
+
+    def test_novelty_after_convergence(self):
+        docs: list[Any] = [{"n": i % 10, "s": "abc"} for i in range(500)]
+        docs += [{"n": 10}, {"n": 3.5, "s": None}, {"n": -1, "s": "abc", "new": [True]}]
+        for doc in ({"n": 7, "s": "abcd"}, {"n": 8, "s": "x@y.io"}):
+            docs += [doc] * 50
+        # новые ключи, типы и выход за границы замечаются сразу, формат — при выборочной проверке
+        self.assertEqual(
+            self._profile(docs, converge_after=5, sample_every=4).schema(),
+            self._profile(docs).schema(),
+        )
+
+    def test_divisor_needs_several_values(self):
+        docs: list[Any] = [{"n": 42}] * 100
+        for kwargs in ({}, {"converge_after": 5, "sample_every": 1000}):
+            with self.subTest(**kwargs):
+                self.assertNotIn(
+                    "multipleOf", self._profile(docs, **kwargs).schema()["properties"]["n"]
+                )
+                # новые значения в границах после сходимости тоже учитываются
+                profile = self._profile([{"n": 126}] + docs + [{"n": 84}], **kwargs).schema()
+                self.assertEqual(profile["properties"]["n"]["multipleOf"], 42)
+
+    def test_format_checked_by_sampling(self):
+        docs = [{"s": "abcdef"}] * 100 + [{"s": "a@b.io"}]
+        adaptive = self._profile(docs, converge_after=10, sample_every=1000)
+        # значение той же длины без проверки формата учтено как строка без формата,
+        # и формат, встретившийся только у непроверенных значений, в профиль не попадает
+        self.assertNotIn("anyOf", adaptive.schema()["properties"]["s"])
+        self.assertEqual(adaptive.skipped, 90)
+        # так же строка без формата учитывается с известным пути форматом
+        mails = [{"s": "a@b.io"}] * 100 + [{"s": "abcdef"}]
+        adaptive = self._profile(mails, converge_after=10, sample_every=1000)
+        self.assertEqual(adaptive.schema()["properties"]["s"]["format"], "email")
+        # формат, попавший в выборку, возвращает путь к полной проверке
+        adaptive = self._profile(docs + [{"s": "a@b.io"}] * 1000, converge_after=10)
+        self.assertEqual(len(adaptive.schema()["properties"]["s"]["anyOf"]), 2)
+
+    def test_invalid_parameters(self):
+        for kwargs in ({"converge_after": 0}, {"sample_every": 0}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                EventProfiler(**kwargs)
+
+
+class TestAddEvents(unittest.TestCase):
+    COMPARATORS = (
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        StatisticsComparator(enum=False),
+        DeleteElement(),
+        DeleteElement("isPseudoArray"),
+    )
+
+    def _converter(self) -> Converter:
+        return Converter.from_pipeline(
+            Pipeline(self.COMPARATORS, pseudo_handler=PseudoArrayHandler())
+        )
+
+    def test_matches_add_json(self):
+        for seed in range(80):
+            docs = _documents(seed)
+            conv = self._converter()
+            for doc in docs:
+                conv.add_events(_events(doc))
+            with self.subTest(seed=seed):
+                self.assertEqual(conv.run(), conv.generate(docs))
+
+    def test_mixed_with_json(self):
+        docs = [{"a": 1, "b": "x"}, {"a": 2.5}, {"a": None, "b": "y@z.io"}]
+        conv = self._converter()
+        conv.add_json(docs[0])
+        conv.add_events(event for doc in docs[1:] for event in _events(doc))
+        self.assertEqual(conv.run(), conv.generate(docs))
+
+    def test_adaptive(self):
+        docs = [_documents(seed) for seed in range(40)]
+        docs = [doc for batch in docs for doc in batch]
+        conv = self._converter()
+        conv.add_events((e for doc in docs for e in _events(doc)), converge_after=8)
+        self.assertEqual(conv.run(), conv.generate(docs))
+
+    def test_no_documents(self):
+        conv = self._converter()
+        conv.add_events([])
+        conv.add_json({"a": 1})
+        self.assertEqual(conv.run(), conv.generate([{"a": 1}]))
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _probe(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout)
+
+
+class TestImportTime(unittest.TestCase):
+    HEAVY = ("rich", "numpy", "concurrent.futures")
+    # модули необязательных режимов: импортируются использующими их методами и подкомандами
+    OPTIONAL = (
+        "genschema.cache",
+        "genschema.drift",
+        "genschema.events",
+        "genschema.inputs",
+        "genschema.validator",
+    )
+
+    def test_heavy_dependencies_are_lazy(self):
+        for module in ("genschema", "genschema.cli"):
+            probe = _probe(module)
+            print(f"\nimport {module}: {probe['elapsed'] * 1000:.1f} ms")
+            for heavy in self.HEAVY + self.OPTIONAL:
+                self.assertNotIn(heavy, probe["modules"], f"{module} imports {heavy}")
+
+    def test_lazy_exports(self):
+        probe = _probe("genschema; genschema.DriftDetector; genschema.SchemaCache")
+        self.assertIn("genschema.drift", probe["modules"])
+        self.assertIn("genschema.cache", probe["modules"])
+        self.assertNotIn("genschema.events", probe["modules"])
+
+    def test_quiet_mode_prints_plain_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"a": 1}, f)
+            out = subprocess.run(
+                [sys.executable, "-m", "genschema.cli", path, "--quiet"],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        self.assertEqual(json.loads(out.stdout)["properties"], {"a": {"type": "integer"}})
+        self.assertEqual(out.stderr, "")
@@ -0,0 +1,157 @@
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from genschema import Converter, Pipeline, PseudoArrayHandler, SchemaCache, pipeline
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+)
+from genschema.inputs import detect_compression, is_json_lines, iter_documents
+
+DOCS = [
+    {"id": 1, "mail": "a@b.io", "tags": ["x"]},
+    {"id": 2.5, "tags": [], "extra": None},
+    {"id": "3", "mail": "x", "nested": {"k": [1, "a"]}},
+]
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+class _Files(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name: str, text: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        suffix = os.path.splitext(name)[1]
+        opener = OPENERS.get(suffix, open)
+        with opener(path, "wt", encoding="utf-8") as f:  # type: ignore[operator]
+            f.write(text)
+        return path
+
+    def _lines(self, name: str) -> str:
+        return self._write(name, "\n".join(json.dumps(d) for d in DOCS) + "\n\n")
+
+
+class TestInputs(_Files):
+    def test_detect_compression_by_magic(self):
+        self.assertEqual(detect_compression(self._write("a.json.gz", "{}")), "gzip")
+        self.assertEqual(detect_compression(self._write("a.json.bz2", "{}")), "bz2")
+        self.assertEqual(detect_compression(self._write("a.json.xz", "{}")), "xz")
+        self.assertIsNone(detect_compression(self._write("a.json", "{}")))
+        # сигнатура важнее расширения
+        path = os.path.join(self.tmp.name, "misnamed.json")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write('{"a": 1}')
+        self.assertEqual(list(iter_documents(path)), [{"a": 1}])
+
+    def test_json_lines_suffixes(self):
+        self.assertTrue(is_json_lines("a.jsonl"))
+        self.assertTrue(is_json_lines("a.NDJSON.zst"))
+        self.assertTrue(is_json_lines("a.jsonl.gz"))
+        self.assertFalse(is_json_lines("a.json.gz"))
+
+    def test_iter_documents(self):
+        for name in ("d.jsonl", "d.jsonl.gz", "d.ndjson.bz2", "d.jsonl.xz"):
+            self.assertEqual(list(iter_documents(self._lines(name))), DOCS, name)
+        self.assertEqual(list(iter_documents(self._write("d.json.gz", json.dumps(DOCS)))), [DOCS])
+
+    def test_digest_of_parsed_bytes(self):
+        from genschema.cache import file_digest
+
+        for name in ("d.jsonl", "d.jsonl.gz", "d.ndjson.bz2", "d.jsonl.xz"):
+            path = self._lines(name)
+            digest = hashlib.sha256()
+            self.assertEqual(list(iter_documents(path, digest)), DOCS, name)
+            self.assertEqual(digest.hexdigest(), file_digest(path), name)
+
+    def test_invalid_line(self):
+        path = self._write("bad.jsonl", '{"a": 1}\n{"a": \n')
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            list(iter_documents(path))
+
+    def test_zstd_requires_package(self):
+        path = os.path.join(self.tmp.name, "a.jsonl.zst")
+        with open(path, "wb") as f:
+            f.write(b"\x28\xb5\x2f\xfd" + b"\x00" * 8)
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            with self.assertRaisesRegex(ValueError, "zstandard"):
+                list(iter_documents(path))
+
+
+class TestConverterInputs(_Files):
+    def _converter(self, cache: SchemaCache | None = None) -> Converter:
+        conv = Converter(pseudo_handler=PseudoArrayHandler(), cache=cache)
+        for c in (FormatComparator(), RequiredComparator(), EmptyComparator(), DeleteElement()):
+            conv.register(c)
+        conv.register(DeleteElement("isPseudoArray"))
+        return conv
+
+    def _expected(self) -> dict:
+        conv = self._converter()
+        for d in DOCS:
+            conv.add_json(d)
+        return conv.run()
+
+    def test_add_json_lines_archive(self):
+        conv = self._converter()
+        conv.add_json(self._lines("d.jsonl.gz"))
+        self.assertEqual(conv.run(), self._expected())
+
+    def test_cached_archive(self):
+        cache = SchemaCache(os.path.join(self.tmp.name, "cache"))
+        path = self._lines("d.jsonl.bz2")
+        for _ in range(2):
+            conv = self._converter(cache)
+            conv.add_json(path)
+            self.assertEqual(conv.run(), self._expected())
+
+    def test_drift_reads_archive(self):
+        conv = self._converter()
+        conv.add_schema(self._write("base.json.gz", json.dumps(self._expected())))
+        conv.add_json(self._lines("d.jsonl.xz"))
+        self.assertEqual(conv.drift(), [])
+
+    def test_generate_batched(self):
+        pipe = self._converter().pipeline
+        for size in (1, 2, 10):
+            self.assertEqual(
+                pipe.generate_batched(iter_documents(self._lines("d.jsonl")), size),
+                pipe.generate(DOCS),
+            )
+        with self.assertRaises(ValueError):
+            Pipeline().generate_batched([], 0)
+
+    def test_batches_share_pseudo_array_decision(self):
+        # ключи 1 и 2 первой пачки — не псевдомассив вместе с ключом name второй
+        docs = [{"items": {"1": {"n": 1}, "2": {"n": 2}}}, {"items": {"name": {"n": 3}}}]
+        pipe = self._converter().pipeline
+        batched = pipe.generate_batched(docs, 1)
+        self.assertEqual(batched, pipe.generate(docs))
+        self.assertNotIn("patternProperties", batched["properties"]["items"])
+
+    def test_add_json_with_batch_size_streams(self):
+        path = self._lines("d.jsonl.gz")
+        cache = SchemaCache(os.path.join(self.tmp.name, "cache"))
+        for c in (None, cache, cache):
+            conv = self._converter(c)
+            conv.add_json(path, batch_size=2)
+            with mock.patch.object(pipeline, "_load_json_file") as load:
+                self.assertEqual(conv.run(), self._expected())
+            load.assert_not_called()
+        with self.assertRaises(ValueError):
+            self._converter().add_json(path, batch_size=0)
@@ -0,0 +1,296 @@
+import unittest
+
+from jsonschema.validators import Draft202012Validator
+
+from genschema import Converter, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+    TypeComparator,
+)
+from genschema.comparators.template import ProcessingContext, Resource
+from genschema.pipeline import Pipeline, _Run
+from tests.test_canonical import _documents
+
+
+class TestPartitionCtx(unittest.TestCase):
+    def test_partition_by_triggers(self):
+        run = _Run(Pipeline())
+        j1 = Resource("1", "json", "a")
+        j2 = Resource("2", "json", 1)
+        s1 = Resource("0", "schema", {"type": "string"})
+        ctx = ProcessingContext([s1], [j1, j2], False)
+        alts = [
+            {"type": "string", "j2sElementTrigger": ["0", "1"]},
+            {"type": "integer", "j2sElementTrigger": ["2"]},
+        ]
+
+        parts = run._partition_ctx(ctx, alts)
+
+        self.assertEqual(parts[0].schemas, [s1])
+        self.assertEqual(parts[0].jsons, [j1])
+        self.assertEqual(parts[1].schemas, [])
+        self.assertEqual(parts[1].jsons, [j2])
+
+    def test_alternative_without_triggers_gets_whole_ctx(self):
+        run = _Run(Pipeline())
+        ctx = ProcessingContext([], [Resource("0", "json", 1)], False)
+        parts = run._partition_ctx(ctx, [{"type": "integer"}])
+        self.assertIs(parts[0], ctx)
+
+
+class TestMaxVariants(unittest.TestCase):
+    def _run(self, data: list, **kwargs: object) -> dict:
+        conv = Converter(**kwargs)  # type: ignore[arg-type]
+        conv.add_json(data)
+        conv.register(DeleteElement())
+        return conv.run()
+
+    def test_invalid_limit(self):
+        with self.assertRaises(ValueError):
+            Converter(max_variants=0)
+
+    def test_unlimited_by_default(self):
+        result = self._run([1, "a", None, True, {"k": 1}])
+        self.assertEqual(len(result["items"]["anyOf"]), 5)
+
+    def test_rare_variants_are_collapsed(self):
+        result = self._run(["a", "b", "c", 1, 2, None, True], max_variants=3)
+        self.assertEqual(
+            result["items"]["anyOf"],
+            [{"type": "string"}, {"type": "integer"}, {"type": ["null", "boolean"]}],
+        )
+
+    def test_collapsed_variant_is_not_descended(self):
+        result = self._run(["a", "b", {"k": 1}, [1]], max_variants=2)
+        self.assertEqual(
+            result["items"]["anyOf"],
+            [{"type": "string"}, {"type": ["object", "array"]}],
+        )
+
+    def test_single_variant_replaces_union(self):
+        result = self._run([1, "a"], max_variants=1)
+        self.assertEqual(result["items"], {"type": ["integer", "string"]})
+
+    def test_format_variants_collapse_to_plain_string(self):
+        conv = Converter(max_variants=2)
+        conv.add_json(["a@example.com", "b@example.com", "2024-01-01", "x"])
+        conv.register(FormatComparator())
+        conv.register(DeleteElement())
+        result = conv.run()
+        self.assertEqual(
+            result["items"]["anyOf"],
+            [{"type": "string", "format": "email"}, {"type": "string"}],
+        )
+
+
+class TestSchemaReingestion(unittest.TestCase):
+    DOC = {
+        "mixed": [None, "x", {"k": "v"}],
+        "ids": {"1": {"v": 1}, "2": {"v": 2}},
+        "empty_list": [],
+        "empty_obj": {},
+        "mails": ["a@b.io", "x"],
+        "nums": [1, 2.5],
+        "nested": [[1], []],
+    }
+
+    def _converter(self) -> Converter:
+        conv = Converter(pseudo_handler=PseudoArrayHandler())
+        conv.register(FormatComparator())
+        conv.register(RequiredComparator())
+        conv.register(EmptyComparator())
+        conv.register(DeleteElement())
+        conv.register(DeleteElement("isPseudoArray"))
+        return conv
+
+    def test_generated_schema_round_trips(self):
+        conv = self._converter()
+        conv.add_json(self.DOC)
+        schema = conv.run()
+
+        conv = self._converter()
+        conv.add_schema(schema)
+        self.assertEqual(conv.run(), schema)
+
+    def test_partial_schemas_merge_like_raw_documents(self):
+        docs = [{"a": 1, "b": "x@y.io"}, {"a": None, "c": []}, {"a": 2.5, "b": "z", "c": [1]}]
+
+        raw = self._converter()
+        for d in docs:
+            raw.add_json(d)
+
+        merged = self._converter()
+        for d in docs:
+            part = self._converter()
+            part.add_json(d)
+            merged.add_schema(part.run())
+
+        self.assertEqual(merged.run(), raw.run())
+
+    def test_empty_array_items_do_not_drop_constraints(self):
+        # items пустого массива ({}) не описывает ни одного элемента
+        pipeline = self._converter().pipeline
+        for first, rest in (
+            ([[]], [2.5, [{}, {}]]),
+            ([[], None], [[{"k": {"a": 1}}], [{"k": {"a": 2}}]]),
+        ):
+            with self.subTest(first=first):
+                merged = pipeline.generate(rest, [pipeline.generate(first)])
+                self.assertEqual(merged, pipeline.generate(first + rest))
+
+    def test_pattern_properties_kept_when_keys_are_named(self):
+        pipeline = self._converter().pipeline
+        first, rest = [{"m": {"0": "x", "1": "y"}}], [{"m": {"name": 1, "5": 2}}]
+        merged = pipeline.generate(rest, [pipeline.generate(first)])
+        m = merged["properties"]["m"]
+        self.assertEqual(sorted(m["properties"]), ["5", "name"])
+        # значения ключей-индексов сохранены в шаблоне, и ключ "5" подчиняется обоим
+        pattern = m["patternProperties"]["^[0-9]+$"]
+        self.assertEqual([v["type"] for v in pattern["anyOf"]], ["string", "integer"])
+        self.assertEqual(m["properties"]["5"], pattern)
+        validator = Draft202012Validator(merged)
+        for doc in first + rest:
+            self.assertTrue(validator.is_valid(doc))
+
+    def test_random_merges(self):
+        with_pseudo = self._converter().pipeline
+        plain = Pipeline(with_pseudo.comparators)
+        for seed in range(300):
+            docs = _documents(seed)
+            first, rest = docs[: len(docs) // 2], docs[len(docs) // 2 :]
+            with self.subTest(seed=seed):
+                merged = plain.generate(rest, [plain.generate(first)])
+                self.assertEqual(merged, plain.generate(docs))
+                # шаблон псевдомассива не восстанавливает имён ключей, но данных не теряет
+                merged = with_pseudo.generate(rest, [with_pseudo.generate(first)])
+                validator = Draft202012Validator(merged)
+                self.assertTrue(all(validator.is_valid(doc) for doc in docs))
+
+
+class TestBudgets(unittest.TestCase):
+    def _converter(self, **kwargs: object) -> Converter:
+        conv = Converter(pseudo_handler=PseudoArrayHandler(), **kwargs)  # type: ignore[arg-type]
+        conv.register(RequiredComparator())
+        conv.register(DeleteElement())
+        conv.register(DeleteElement("isPseudoArray"))
+        return conv
+
+    def test_invalid_limits(self):
+        for kwargs in (
+            {"max_depth": -1},
+            {"max_properties_per_object": 0},
+            {"max_schema_nodes": 0},
+        ):
+            with self.assertRaises(ValueError):
+                Converter(**kwargs)  # type: ignore[arg-type]
+
+    def test_max_depth(self):
+        thread: dict = {"text": "a", "replies": []}
+        node = thread
+        for i in range(5):
+            node["replies"].append({"text": str(i), "replies": []})
+            node = node["replies"][0]
+        conv = self._converter(max_depth=2)
+        conv.add_json(thread)
+        result = conv.run()
+
+        items = result["properties"]["replies"]["items"]
+        self.assertEqual(
+            items, {"type": "object", "additionalProperties": {"type": ["string", "array"]}}
+        )
+        self.assertEqual(
+            [(t.path, t.reason) for t in conv.truncations],
+            [("/properties/replies/items", "max_depth")],
+        )
+
+    def test_wide_object_merges_values(self):
+        conv = self._converter(max_properties_per_object=3)
+        conv.add_json({f"k{i}": {"v": i} for i in range(5)})
+        conv.add_json({"k0": {"v": None}, "other": {"v": 1}})
+        result = conv.run()
+        self.assertEqual(result["type"], "object")
+        self.assertNotIn("properties", result)
+        self.assertNotIn("required", result)
+        self.assertEqual(
+            result["additionalProperties"]["properties"]["v"]["anyOf"],
+            [{"type": "integer"}, {"type": "null"}],
+        )
+        self.assertEqual(conv.truncations[0].reason, "max_properties_per_object")
+
+    def test_truncated_partial_schema_stays_truncated(self):
+        part = self._converter(max_properties_per_object=2)
+        part.add_json({"a": 1, "b": 2, "c": 3})
+        merged = self._converter(max_properties_per_object=2)
+        merged.add_schema(part.run())
+        merged.add_json({"d": "x"})
+        self.assertEqual(
+            merged.run(),
+            {
+                "type": "object",
+                "additionalProperties": {"anyOf": [{"type": "integer"}, {"type": "string"}]},
+            },
+        )
+
+    def test_max_schema_nodes(self):
+        conv = self._converter(max_schema_nodes=4)
+        conv.add_json({"a": {"b": 1, "c": 2}, "d": [1], "e": 1})
+        result = conv.run()
+        self.assertEqual(
+            result["properties"]["a"],
+            {"type": "object", "additionalProperties": {"type": "integer"}},
+        )
+        self.assertEqual(result["properties"]["d"], {"type": "array", "items": {"type": "integer"}})
+        self.assertEqual(len(conv.truncations), 2)
+
+        conv.run()
+        self.assertEqual(len(conv.truncations), 2)  # отчёт относится к последнему запуску
+
+
+class TestPipeline(unittest.TestCase):
+    COMPARATORS = (FormatComparator(), RequiredComparator(), EmptyComparator(), DeleteElement())
+
+    def test_generate_matches_converter(self):
+        docs = [{"a": 1, "b": "x@y.io"}, {"a": None, "c": [1, "s"]}]
+        conv = Converter(pseudo_handler=PseudoArrayHandler())
+        for c in self.COMPARATORS:
+            conv.register(c)
+        for d in docs:
+            conv.add_json(d)
+
+        pipeline = Pipeline(self.COMPARATORS, pseudo_handler=PseudoArrayHandler())
+        self.assertEqual(pipeline.generate(docs), conv.run())
+        self.assertEqual(pipeline.fingerprint(), conv.fingerprint())
+        # повторный вызов не зависит от предыдущего
+        self.assertEqual(pipeline.generate(docs), conv.run())
+
+    def test_schemas_and_jsons(self):
+        pipeline = Pipeline([DeleteElement()])
+        result = pipeline.generate([{"b": 1}], schemas=[{"type": "object", "properties": {}}])
+        self.assertEqual(result, {"type": "object", "properties": {"b": {"type": "integer"}}})
+
+    def test_immutable(self):
+        pipeline = Pipeline(self.COMPARATORS)
+        with self.assertRaises(AttributeError):
+            pipeline.base_of = "oneOf"  # type: ignore[misc]
+        extended = pipeline.extend(DeleteElement("isPseudoArray"))
+        self.assertEqual(len(pipeline.comparators), 4)
+        self.assertEqual(len(extended.comparators), 5)
+
+    def test_validated_once(self):
+        with self.assertRaises(UserWarning):
+            Pipeline([TypeComparator()])
+        with self.assertRaises(ValueError):
+            Pipeline(max_variants=0)
+
+    def test_converter_from_pipeline(self):
+        pipeline = Pipeline([DeleteElement()], max_depth=0)
+        conv = Converter.from_pipeline(pipeline)
+        conv.add_json({"a": 1})
+        self.assertEqual(
+            conv.run(), {"type": "object", "additionalProperties": {"type": "integer"}}
+        )
+        self.assertIs(conv.pipeline, pipeline)
+        self.assertEqual(conv.truncations[0].reason, "max_depth")
@@ -0,0 +1,101 @@
+import unittest
+
+from genschema import Converter, DynamicKeyHandler
+from genschema.comparators import DeleteElement
+from genschema.comparators.template import ProcessingContext, Resource
+from genschema.pseudo_arrays import KEY_SHAPES
+
+
+def _ctx(*docs: dict) -> ProcessingContext:
+    return ProcessingContext([], [Resource(str(i), "json", d) for i, d in enumerate(docs)])
+
+
+def _keys(*docs: dict) -> list[str]:
+    return sorted({k for d in docs for k in d})
+
+
+class TestDynamicKeyHandler(unittest.TestCase):
+    def check(self, *docs: dict) -> tuple[bool, object]:
+        return DynamicKeyHandler().is_pseudo_array(_keys(*docs), _ctx(*docs))
+
+    def test_numeric_keys_as_before(self):
+        self.assertEqual(self.check({"1": "a", "2": {}}), (True, "^[0-9]+$"))
+
+    def test_strong_shapes(self):
+        patterns = {name: pattern for name, pattern, _ in KEY_SHAPES}
+        uuid_doc = {"0f8fad5b-d9cb-469f-a165-70867728950e": {"v": 1}}
+        self.assertEqual(self.check(uuid_doc), (True, patterns["uuid"]))
+        self.assertEqual(self.check({"2024-01-01": 1, "2024-01-02": 2.5}), (True, patterns["date"]))
+        self.assertEqual(
+            self.check({"9b74c9897bac770ffc029102a200c5de": "x"}), (True, patterns["hash"])
+        )
+
+    def test_weak_shape_needs_cardinality(self):
+        skus = [{f"SKU-{d:04}{i}": {"n": i} for i in range(3)} for d in range(2)]
+        self.assertTrue(self.check(*skus)[0])
+        self.assertFalse(self.check(skus[0], {})[0])
+        # одни и те же ключи в каждом документе — это запись, а не словарь
+        records = [{"field001": 1, "field002": 2, "field003": 3, "field004": 4} for _ in range(3)]
+        self.assertFalse(self.check(*records)[0])
+
+    def test_weak_shape_needs_several_documents(self):
+        # в одном документе каждый ключ встречается один раз — словарь не отличить от записи
+        skus = {f"SKU-{i:05}": {"n": i} for i in range(5)}
+        self.assertFalse(self.check(skus)[0])
+        self.assertTrue(self.check(skus, {"SKU-00100": {"n": 0}})[0])
+
+    def test_short_keys_are_records(self):
+        letters = {"a": 1, "b": 2, "c": 3, "d": 4}
+        lines = {"line1": "x", "line2": "y", "line3": "z", "zip5": "w"}
+        for doc in (letters, lines):
+            with self.subTest(keys=list(doc)):
+                self.assertEqual(self.check(doc), (False, None))
+                self.assertEqual(self.check(doc, dict(doc)), (False, None))
+                self.assertEqual(self.check(*({k: v} for k, v in doc.items())), (False, None))
+
+    def test_plain_records_and_heterogeneous_values(self):
+        self.assertFalse(self.check({"name": "a", "age": 1})[0])
+        self.assertFalse(self.check({"2024-01-01": 1, "2024-01-02": "x", "2024-01-03": None})[0])
+
+    def test_generic_high_cardinality(self):
+        names = [{"k" + chr(97 + i % 26) + chr(97 + i // 26): i} for i in range(70)]
+        self.assertEqual(self.check(*names), (True, "^.*$"))
+        self.assertFalse(self.check(dict(kv for n in names for kv in n.items()))[0])
+        self.assertFalse(
+            DynamicKeyHandler(min_generic_keys=100).is_pseudo_array(_keys(*names), _ctx(*names))[0]
+        )
+
+    def test_pipeline_collapses_map(self):
+        conv = Converter(pseudo_handler=DynamicKeyHandler())
+        conv.add_json({"by_day": {"2024-01-01": {"n": 1}, "2024-01-02": {"n": 2}}})
+        conv.register(DeleteElement())
+        conv.register(DeleteElement("isPseudoArray"))
+        result = conv.run()
+        self.assertEqual(
+            result["properties"]["by_day"]["patternProperties"],
+            {r"^\d{4}-\d{2}-\d{2}$": {"type": "object", "properties": {"n": {"type": "integer"}}}},
+        )
+
+    def test_shape_must_fit_every_key(self):
+        # "abcdef" без цифр не подходит под форму token, "zz1" — под hex
+        doc = {k: 1 for k in ("0a1", "abcdef", "zz1", "zz2", "zz3")}
+        self.assertEqual(self.check(doc), (False, None))
+
+    def test_statistics_collected_once_per_node(self):
+        calls = []
+
+        class Counting(DynamicKeyHandler):
+            def _statistics(self, ctx: ProcessingContext) -> tuple:
+                calls.append(ctx)
+                return super()._statistics(ctx)
+
+        for count in (10, 100):
+            calls.clear()
+            conv = Converter(pseudo_handler=Counting())
+            for i in range(count):
+                skus = {f"SKU-{2 * i:05}": {"n": i}, f"SKU-{2 * i + 1:05}": {"n": i}}
+                conv.add_json({"by_sku": skus})
+            conv.register(DeleteElement())
+            conv.run()
+            with self.subTest(count=count):
+                self.assertEqual(len(calls), 3)  # корень, by_sku и его элементы
@@ -0,0 +1,155 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from jsonschema.validators import Draft202012Validator
+
+from genschema import Converter, Pipeline, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+)
+from genschema.pipeline import _Run
+from genschema.refs import local_pointer, resolve_pointer
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "home": {"$ref": "#/$defs/Address"},
+        "work": {"$ref": "#/$defs/Address", "description": "office"},
+        "tree": {"anyOf": [{"$ref": "#/$defs/Node"}, {"type": "null"}]},
+    },
+    "required": ["home"],
+    "$defs": {
+        "Address": {
+            "type": "object",
+            "properties": {"city": {"type": "string"}, "zip": {"type": "integer"}},
+            "required": ["city"],
+        },
+        "Node": {
+            "type": "object",
+            "properties": {
+                "value": {"type": "integer"},
+                "children": {"type": "array", "items": {"$ref": "#/$defs/Node"}},
+            },
+        },
+    },
+}
+
+
+def _pipeline() -> Pipeline:
+    return Pipeline(
+        [FormatComparator(), RequiredComparator(), EmptyComparator(), DeleteElement()],
+        pseudo_handler=PseudoArrayHandler(),
+    )
+
+
+def _chain(depth: int) -> dict:
+    """Определения D0..Dn, каждое дважды ссылается на следующее: при встраивании 2**n узлов."""
+    defs = {
+        f"D{i}": {
+            "type": "object",
+            "properties": {"a": {"$ref": f"#/$defs/D{i + 1}"}, "b": {"$ref": f"#/$defs/D{i + 1}"}},
+        }
+        for i in range(depth)
+    }
+    defs[f"D{depth}"] = {"type": "string"}
+    return {"type": "object", "properties": {"root": {"$ref": "#/$defs/D0"}}, "$defs": defs}
+
+
+class TestPointers(unittest.TestCase):
+    def test_local_pointer(self):
+        self.assertEqual(local_pointer("#/$defs/A%20B"), "/$defs/A B")
+        self.assertEqual(local_pointer("#"), "")
+        self.assertIsNone(local_pointer("other.json#/$defs/A"))
+        self.assertIsNone(local_pointer(None))
+
+    def test_resolve_pointer(self):
+        doc = {"a/b": {"~x": [1, {"y": 2}]}}
+        self.assertEqual(resolve_pointer(doc, "/a~1b/~0x/1/y"), 2)
+        self.assertIs(resolve_pointer(doc, ""), doc)
+        for pointer in ("/missing", "/a~1b/~0x/5", "/a~1b/~0x/k"):
+            with self.subTest(pointer=pointer), self.assertRaises(LookupError):
+                resolve_pointer(doc, pointer)
+
+
+class TestRefs(unittest.TestCase):
+    def test_defs_preserved(self):
+        result = _pipeline().generate(schemas=[SCHEMA])
+        props = result["properties"]
+        self.assertEqual(props["home"], {"$ref": "#/$defs/Address"})
+        self.assertEqual(props["work"], {"$ref": "#/$defs/Address"})
+        self.assertEqual(props["tree"]["anyOf"][0], {"$ref": "#/$defs/Node"})
+        self.assertEqual(list(result["$defs"]), ["Address", "Node"])
+        self.assertEqual(result["$defs"]["Address"]["required"], ["city"])
+        node = result["$defs"]["Node"]["properties"]
+        self.assertEqual(node["children"]["items"], {"$ref": "#/$defs/Node"})
+
+    def test_each_definition_processed_once(self):
+        run_level = _Run._run_level
+        with mock.patch.object(_Run, "_run_level", autospec=True, side_effect=run_level) as m:
+            result = _pipeline().generate(schemas=[_chain(40)])
+        # корень, root, по три узла на D0..D39 (сам узел и a/b) и D40
+        self.assertLess(m.call_count, 4 * 42)
+        self.assertEqual(len(result["$defs"]), 41)
+        self.assertEqual(result["$defs"]["D40"]["type"], "string")
+
+    def test_stable_on_refeed(self):
+        result = _pipeline().generate(schemas=[SCHEMA])
+        self.assertEqual(_pipeline().generate(schemas=[result]), result)
+
+    def test_data_inlines_definition(self):
+        doc = {"home": {"city": "Oslo", "street": "x"}, "tree": None}
+        result = _pipeline().generate([doc], [SCHEMA])
+        home = result["properties"]["home"]
+        self.assertEqual(home["type"], "object")
+        self.assertEqual(set(home["properties"]), {"city", "zip", "street"})
+        self.assertEqual(result["properties"]["work"], {"$ref": "#/$defs/Address"})
+        Draft202012Validator.check_schema(result)
+        self.assertTrue(Draft202012Validator(result).is_valid(doc))
+
+    def test_output_validates(self):
+        result = _pipeline().generate(schemas=[SCHEMA])
+        Draft202012Validator.check_schema(result)
+        validator = Draft202012Validator(result)
+        tree = {"value": 1, "children": [{"value": 2, "children": []}]}
+        self.assertTrue(validator.is_valid({"home": {"city": "a"}, "tree": tree}))
+        self.assertFalse(validator.is_valid({"home": {"zip": 1}}))
+        self.assertFalse(validator.is_valid({"home": {"city": "a"}, "tree": {"value": "x"}}))
+
+    def test_write_matches_generate(self):
+        doc = {"home": {"city": "Oslo"}, "tree": {"value": 1, "children": []}}
+        for jsons in ([], [doc]):
+            with self.subTest(jsons=jsons):
+                stream = io.StringIO()
+                _pipeline().write(stream, jsons, [SCHEMA])
+                self.assertEqual(
+                    json.loads(stream.getvalue()), _pipeline().generate(jsons, [SCHEMA])
+                )
+
+    def test_unresolvable_refs_ignored(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "a": {"$ref": "#/$defs/Missing"},
+                "b": {"$ref": "other.json#/$defs/A"},
+                "c": {"$ref": "#/$defs/Loop"},
+            },
+            "$defs": {"Loop": {"$ref": "#/$defs/Loop"}},
+        }
+        result = Converter().generate(schemas=[schema])
+        self.assertNotIn("$defs", result)
+        self.assertEqual(set(result["properties"]), {"a", "b", "c"})
+
+    def test_no_refs_unchanged(self):
+        docs = [{"a": [1, {"b": "x"}]}, {"a": [], "c": None}]
+        schema = _pipeline().generate(docs)
+        self.assertNotIn("$defs", schema)
+        self.assertEqual(_pipeline().generate(schemas=[schema]), schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+from unittest import mock
+
+from genschema import Pipeline, PseudoArrayHandler, cli
+from genschema.comparators import DeleteElement, FormatComparator, RequiredComparator
+from genschema.server import SchemaService, ServiceError, make_server, parse_documents
+
+DOCS = [{"id": 1, "mail": "a@b.io"}, {"id": 2, "name": "x"}, {"id": 3, "mail": "c@d.io"}]
+NDJSON = "\n".join(json.dumps(d) for d in DOCS).encode()
+
+
+def _pipeline() -> Pipeline:
+    return Pipeline(
+        [FormatComparator(), RequiredComparator(), DeleteElement()],
+        pseudo_handler=PseudoArrayHandler(),
+    )
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+class TestParseDocuments(unittest.TestCase):
+    def test_json_and_ndjson(self):
+        self.assertEqual(parse_documents(b'{"a": [1]}'), [{"a": [1]}])
+        self.assertEqual(parse_documents(NDJSON + b"\n\n", "application/x-ndjson"), DOCS)
+        # JSON — всегда один документ, даже если это массив
+        self.assertEqual(parse_documents(b"[1, 2]"), [[1, 2]])
+
+    def test_invalid(self):
+        for body, content_type in (
+            (b"{", "application/json"),
+            (b"\xff", "application/json"),
+            (b'{"a": 1}\n{', "application/x-ndjson; charset=utf-8"),
+        ):
+            with self.subTest(body=body), self.assertRaises(ServiceError) as e:
+                parse_documents(body, content_type)
+            self.assertEqual(e.exception.status, 400)
+
+
+class TestSchemaService(unittest.TestCase):
+    def test_least_recently_used_session_is_evicted(self):
+        service = SchemaService(_pipeline(), max_sessions=2)
+        service.add("a", DOCS[:1])
+        service.add("b", DOCS[:1])
+        service.schema("a")  # b теперь дольше всех не использовалась
+        service.add("c", DOCS[:1])
+        self.assertEqual(service.sessions(), ["a", "c"])
+        with self.assertRaises(ServiceError):
+            service.schema("b")
+
+    def test_idle_sessions_expire(self):
+        with mock.patch("genschema.server.time.monotonic", return_value=100.0) as clock:
+            service = SchemaService(_pipeline(), session_ttl=10)
+            service.add("old", DOCS[:1])
+            clock.return_value = 105.0
+            service.add("new", DOCS[:1])
+            clock.return_value = 112.0
+            self.assertEqual(service.sessions(), ["new"])
+            self.assertEqual(service.add("old", DOCS)["documents"], 3)  # создана заново
+
+    def test_session_dropped_while_waiting_for_lock(self):
+        service = SchemaService(_pipeline())
+        service.add("a", DOCS[:1])
+        session = service._sessions["a"]
+        lock = session.lock
+
+        class Dropping:
+            def __enter__(self) -> None:
+                service.drop("a")  # удалена, пока запрос ждал блокировку сессии
+                lock.acquire()
+
+            def __exit__(self, *exc: object) -> None:
+                lock.release()
+
+        session.lock = Dropping()  # type: ignore[assignment]
+        self.assertEqual(service.add("a", DOCS[1:]), {"session": "a", "documents": 2})
+        self.assertEqual(service.schema("a"), _pipeline().generate(DOCS[1:]))
+
+    def test_invalid_limits(self):
+        for kwargs in ({"max_sessions": 0}, {"session_ttl": 0}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                SchemaService(_pipeline(), **kwargs)  # type: ignore[arg-type]
+
+
+class TestServer(unittest.TestCase):
+    unix = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "gs.sock") if self.unix else None
+        self.server = make_server(_pipeline(), port=0, socket_path=path, workers=4)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if isinstance(self.server.server_address, str):
+            return _UnixConnection(self.server.server_address)
+        return http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        content_type: str = "application/json",
+        conn: Optional[http.client.HTTPConnection] = None,
+    ) -> tuple[int, Any]:
+        own = conn is None
+        conn = conn or self._connection()
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        conn.request(method, path, body, {"Content-Type": content_type})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        if own:
+            conn.close()
+        return response.status, payload
+
+    def test_schema(self):
+        status, schema = self._request("POST", "/schema", NDJSON, "application/x-ndjson")
+        self.assertEqual(status, 200)
+        self.assertEqual(schema, _pipeline().generate(DOCS))
+        self.assertEqual(
+            self._request("POST", "/schema", DOCS[0])[1], _pipeline().generate(DOCS[:1])
+        )
+
+    def test_sessions(self):
+        conn = self._connection()  # одно соединение keep-alive на все запросы
+        for doc in DOCS:
+            status, info = self._request("POST", "/sessions/a%20b", doc, conn=conn)
+        self.assertEqual((status, info), (200, {"session": "a b", "documents": 3}))
+        self.assertEqual(self._request("GET", "/sessions", conn=conn)[1], ["a b"])
+        self.assertEqual(
+            self._request("GET", "/sessions/a%20b", conn=conn), (200, _pipeline().generate(DOCS))
+        )
+        self.assertEqual(self._request("DELETE", "/sessions/a%20b", conn=conn)[0], 200)
+        self.assertEqual(self._request("GET", "/sessions/a%20b", conn=conn)[0], 404)
+        self.assertEqual(self._request("GET", "/health", conn=conn)[1]["sessions"], 0)
+        conn.close()
+
+    def test_errors(self):
+        self.assertEqual(self._request("POST", "/schema", b"{")[0], 400)
+        self.assertEqual(self._request("GET", "/nope")[0], 404)
+        self.assertEqual(self._request("DELETE", "/sessions/missing")[0], 404)
+        self.server.max_body = 4
+        conn = self._connection()
+        self.assertEqual(self._request("POST", "/schema", b'{"a": 1}', conn=conn)[0], 413)
+        self.assertEqual(self._request("POST", "/nope", b"{}", conn=conn)[0], 404)
+        # тело отклонённых запросов дочитано: соединение keep-alive пригодно дальше
+        self.assertEqual(self._request("GET", "/health", conn=conn)[0], 200)
+        conn.close()
+
+    def test_invalid_content_length(self):
+        for length in ("-1", "+2", "1_0", "abc"):
+            conn = self._connection()
+            conn.connect()
+            conn.sock.settimeout(5)  # с rfile.read(-1) сервер ждал бы закрытия соединения
+            conn.putrequest("POST", "/schema")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            with self.subTest(length=length):
+                self.assertEqual(conn.getresponse().status, 400)
+            conn.close()
+
+    def test_concurrent_requests(self):
+        payloads = [[{"k": i, f"f{i % 3}": "a@b.io"}] * (i % 5 + 1) for i in range(40)]
+
+        def work(i: int) -> tuple[int, Any]:
+            return self._request("POST", "/schema", payloads[i][0])
+
+        def add(i: int) -> tuple[int, Any]:
+            return self._request("POST", f"/sessions/s{i % 2}", payloads[i][0])
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(work, range(len(payloads))))
+            list(pool.map(add, range(len(payloads))))
+        self.assertEqual([r[1] for r in results], [_pipeline().generate(p[:1]) for p in payloads])
+        for name in ("s0", "s1"):
+            status, schema = self._request("GET", f"/sessions/{name}")
+            self.assertEqual(schema["required"], ["k"])
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestUnixServer(TestServer):
+    unix = True
+
+    def test_socket_removed_on_close(self):
+        path = self.server.server_address
+        self.assertTrue(os.path.exists(path))
+        self.server.shutdown()
+        self.server.server_close()  # повторный вызов из tearDown безопасен
+        self.assertFalse(os.path.exists(path))
+
+    def test_live_socket_is_not_replaced(self):
+        path = self.server.server_address
+        with self.assertRaises(OSError):
+            make_server(_pipeline(), socket_path=path)
+        self.assertEqual(self._request("GET", "/health")[0], 200)
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.tmp.name, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()  # файл сокета остался, но соединения никто не принимает
+        server = make_server(_pipeline(), socket_path=path)
+        server.server_close()
+        self.assertFalse(os.path.exists(path))
+
+
+class TestServeCli(unittest.TestCase):
+    def test_serve_uses_pipeline_options(self):
+        argv = [
+            "genschema",
+            "serve",
+            "-q",
+            "--socket",
+            "gs.sock",
+            "--no-format",
+            "--session-ttl",
+            "0",
+        ]
+        with (
+            mock.patch("genschema.server.make_server") as make,
+            mock.patch.object(sys, "argv", argv),
+        ):
+            cli.main()
+        pipeline = make.call_args.args[0]
+        self.assertEqual(make.call_args.kwargs["socket_path"], "gs.sock")
+        self.assertEqual(make.call_args.kwargs["max_sessions"], 1024)
+        self.assertIsNone(make.call_args.kwargs["session_ttl"])
+        self.assertFalse(any(isinstance(c, FormatComparator) for c in pipeline.comparators))
+        make.return_value.serve_forever.assert_called_once()
+        make.return_value.server_close.assert_called_once()
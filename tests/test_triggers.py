@@ -0,0 +1,108 @@
+import unittest
+from typing import Any
+
+from genschema import Pipeline, PseudoArrayHandler, TupleHandler
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+    StatisticsComparator,
+    TypeComparator,
+)
+from genschema.comparators.template import (
+    Comparator,
+    ComparatorResult,
+    ProcessingContext,
+    Resource,
+)
+from tests.test_canonical import _documents
+
+
+class _TriggerReader(Comparator):
+    """Читает триггеры узла: заставляет конвейер строить их везде."""
+
+    name = "trigger-reader"
+    needs_triggers = True
+
+    def __init__(self) -> None:
+        self.seen: list[list[str]] = []
+
+    def can_process(self, ctx: ProcessingContext, env: str, node: dict) -> bool:
+        return "j2sElementTrigger" in node
+
+    def process(self, ctx: ProcessingContext, env: str, node: dict) -> ComparatorResult:
+        self.seen.append(node["j2sElementTrigger"])
+        return None, None
+
+
+def _ctx(*values: Any, triggers: bool = True) -> ProcessingContext:
+    jsons = [Resource(str(i), "json", v) for i, v in enumerate(values)]
+    return ProcessingContext([], jsons, triggers=triggers)
+
+
+class TestLazyTriggers(unittest.TestCase):
+    COMPARATORS = (
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        StatisticsComparator(),
+        DeleteElement(),
+        DeleteElement("isPseudoArray"),
+    )
+    CONFIGS: list[dict[str, Any]] = [
+        {},
+        {"max_variants": 2},
+        {"columnar": True},
+        {"tuple_handler": TupleHandler()},
+        {"base_of": "oneOf", "max_depth": 2},
+    ]
+
+    def test_lazy_output_matches_eager(self):
+        for config in self.CONFIGS:
+            lazy = Pipeline(self.COMPARATORS, pseudo_handler=PseudoArrayHandler(), **config)
+            eager = lazy.extend(_TriggerReader())
+            self.assertFalse(lazy._tracks_triggers())
+            self.assertTrue(eager._tracks_triggers())
+            for seed in range(60):
+                docs = _documents(seed)
+                with self.subTest(config=config, seed=seed):
+                    self.assertEqual(lazy.generate(docs), eager.generate(docs))
+
+    def test_triggers_kept_without_delete_element(self):
+        pipeline = Pipeline([FormatComparator()])
+        self.assertTrue(pipeline._tracks_triggers())
+        self.assertEqual(pipeline.generate(["a"])["j2sElementTrigger"], ["0"])
+
+    def test_single_variant_skips_ids(self):
+        self.assertEqual(
+            TypeComparator().process(_ctx(1, 2, triggers=False), "", {}),
+            ({"type": "integer"}, None),
+        )
+        self.assertEqual(
+            FormatComparator().process(_ctx("a", "b", triggers=False), "", {"type": "string"}),
+            (None, None),
+        )
+        general, _ = FormatComparator().process(
+            _ctx("a@b.io", triggers=False), "", {"type": "string"}
+        )
+        self.assertEqual(general, {"type": "string", "format": "email"})
+
+    def test_alternatives_always_carry_triggers(self):
+        _, variants = TypeComparator().process(_ctx(1, "a", 2.5, triggers=False), "", {})
+        self.assertEqual(
+            variants,
+            [
+                {"type": "string", "j2sElementTrigger": ["1"]},
+                {"type": "number", "j2sElementTrigger": ["0", "2"]},
+            ],
+        )
+        _, variants = FormatComparator().process(
+            _ctx("a@b.io", "x", triggers=False), "", {"type": "string"}
+        )
+        self.assertEqual([v["j2sElementTrigger"] for v in variants], [["1"], ["0"]])
+
+    def test_reader_sees_triggers(self):
+        reader = _TriggerReader()
+        Pipeline([reader, DeleteElement()]).generate([{"a": 1}, {"a": 2}])
+        self.assertIn(["0/a", "1/a"], reader.seen)
@@ -0,0 +1,92 @@
+import io
+import json
+import unittest
+
+from genschema import Converter, Pipeline, TupleHandler
+from genschema.comparators import DeleteElement, RequiredComparator
+from genschema.comparators.template import ProcessingContext, Resource
+
+POINTS = [
+    {"at": [1700000000, 20.5, "ok"], "tags": ["a", "b"]},
+    {"at": [1700000060, 21, "fail"], "tags": ["c", "d"]},
+]
+
+
+def _ctx(*values: object, schemas: tuple = ()) -> ProcessingContext:
+    return ProcessingContext(
+        [Resource(f"s{i}", "schema", s) for i, s in enumerate(schemas)],
+        [Resource(str(i), "json", v) for i, v in enumerate(values)],
+    )
+
+
+class TestTupleHandler(unittest.TestCase):
+    def test_length(self):
+        handler = TupleHandler()
+        self.assertEqual(handler.tuple_length(_ctx([1, "a"], [2.5, "b"])), 2)
+        self.assertIsNone(handler.tuple_length(_ctx([1, "a"], [1, "a", None])))
+        self.assertIsNone(handler.tuple_length(_ctx([1, "a"], ["a", 1])))
+        self.assertIsNone(handler.tuple_length(_ctx([1, "a"], {"0": 1})))
+        self.assertIsNone(handler.tuple_length(_ctx()))
+
+    def test_homogeneous_and_bounds(self):
+        self.assertIsNone(TupleHandler().tuple_length(_ctx([1.5, 2], [3, 4])))
+        self.assertEqual(TupleHandler(homogeneous=True).tuple_length(_ctx([1.5, 2], [3, 4])), 2)
+        self.assertIsNone(TupleHandler().tuple_length(_ctx(list(range(8)) + ["x"])))
+        self.assertIsNone(TupleHandler().tuple_length(_ctx([1])))
+        with self.assertRaises(ValueError):
+            TupleHandler(min_length=3, max_length=2)
+
+    def test_schemas(self):
+        tuple_schema = {"type": "array", "prefixItems": [{"type": "integer"}, {}], "items": False}
+        handler = TupleHandler()
+        self.assertEqual(handler.tuple_length(_ctx([1, "a"], schemas=(tuple_schema,))), 2)
+        self.assertIsNone(handler.tuple_length(_ctx(schemas=({"type": "array", "items": {}},))))
+
+
+class TestTuplePipeline(unittest.TestCase):
+    def _pipeline(self, **kwargs: object) -> Pipeline:
+        return Pipeline(
+            [RequiredComparator(), DeleteElement()], tuple_handler=TupleHandler(), **kwargs
+        )
+
+    def test_prefix_items(self):
+        schema = self._pipeline().generate(POINTS)
+        self.assertEqual(
+            schema["properties"]["at"],
+            {
+                "type": "array",
+                "prefixItems": [{"type": "integer"}, {"type": "number"}, {"type": "string"}],
+                "items": False,
+            },
+        )
+        self.assertEqual(schema["properties"]["tags"]["items"], {"type": "string"})
+        self.assertNotIn(
+            "prefixItems", Pipeline([DeleteElement()]).generate(POINTS)["properties"]["at"]
+        )
+
+    def test_merge_with_schema(self):
+        pipeline = self._pipeline()
+        schema = pipeline.generate(POINTS)
+        self.assertEqual(pipeline.generate(schemas=[schema]), schema)
+        self.assertEqual(pipeline.generate(POINTS[:1], [pipeline.generate(POINTS[1:])]), schema)
+        # без обработчика позиции сливаются в общую схему элементов
+        items = Pipeline([DeleteElement()]).generate(schemas=[schema])["properties"]["at"]["items"]
+        self.assertEqual([v["type"] for v in items["anyOf"]], ["number", "string"])
+
+    def test_streaming_and_budget(self):
+        pipeline = self._pipeline()
+        stream = io.StringIO()
+        pipeline.write(stream, POINTS)
+        self.assertEqual(json.loads(stream.getvalue()), pipeline.generate(POINTS))
+
+        _, truncations = self._pipeline(max_depth=1).generate_with_report(POINTS)
+        self.assertEqual([t.path for t in truncations], ["/properties/at", "/properties/tags"])
+
+    def test_fingerprint_and_drift(self):
+        self.assertNotEqual(self._pipeline().fingerprint(), Pipeline().fingerprint())
+        conv = Converter(tuple_handler=TupleHandler())
+        conv.add_schema(self._pipeline().generate(POINTS))
+        conv.add_json({"at": [1, 2, 3], "tags": []})
+        self.assertEqual(
+            [(d.path, d.kind) for d in conv.drift()], [("/properties/at/prefixItems/2", "type")]
+        )
@@ -0,0 +1,120 @@
+import unittest
+
+from jsonschema.validators import Draft202012Validator
+
+from genschema import Converter, PseudoArrayHandler
+from genschema.comparators import (
+    DeleteElement,
+    FormatComparator,
+    NoAdditionalProperties,
+    RequiredComparator,
+)
+from genschema.validator import (
+    UnsupportedSchemaError,
+    compile_validator,
+    generate_validator_source,
+)
+
+
+class TestCompileValidator(unittest.TestCase):
+    def assertAgrees(self, schema: dict, instances: list) -> None:
+        validate = compile_validator(schema)
+        reference = Draft202012Validator(schema)
+        for instance in instances:
+            with self.subTest(instance=instance):
+                self.assertEqual(validate(instance), reference.is_valid(instance))
+
+    def test_types(self):
+        values = [None, True, 0, 1.0, 1.5, "s", [], {}]
+        for t in ("null", "boolean", "integer", "number", "string", "array", "object"):
+            self.assertAgrees({"type": t}, values)
+        self.assertAgrees({"type": ["integer", "null"]}, values)
+
+    def test_object_keywords(self):
+        schema = {
+            "type": "object",
+            "properties": {"a": {"type": "integer"}, "b": {"type": "string"}},
+            "patternProperties": {"^x-": {"type": "boolean"}},
+            "additionalProperties": False,
+            "required": ["a"],
+            "minProperties": 1,
+            "maxProperties": 3,
+        }
+        self.assertAgrees(
+            schema,
+            [
+                {"a": 1},
+                {"a": 1, "b": "s", "x-1": True},
+                {"a": 1, "x-1": 1},
+                {"a": 1, "c": 1},
+                {"b": "s"},
+                {"a": 1, "b": "s", "x-1": True, "x-2": False},
+                [],
+            ],
+        )
+
+    def test_array_keywords(self):
+        schema = {
+            "type": "array",
+            "prefixItems": [{"type": "string"}],
+            "items": {"type": "integer"},
+            "minItems": 1,
+            "maxItems": 3,
+        }
+        self.assertAgrees(schema, [["a"], ["a", 1, 2], [1], ["a", "b"], [], ["a", 1, 2, 3]])
+
+    def test_scalar_keywords(self):
+        self.assertAgrees(
+            {"minimum": 1, "exclusiveMaximum": 5, "multipleOf": 0.5},
+            [0, 1, 2.5, 2.7, 5, "x", True],
+        )
+        self.assertAgrees(
+            {"minLength": 2, "maxLength": 3, "pattern": "^a"}, ["a", "ab", "abcd", "b"]
+        )
+        self.assertAgrees({"enum": [1, "a", None]}, [1, 1.0, True, "a", None, "b"])
+        self.assertAgrees({"const": {"a": [1]}}, [{"a": [1]}, {"a": [True]}, {"a": []}])
+
+    def test_combinators_and_refs(self):
+        schema = {
+            "$defs": {"node": {"type": "object", "properties": {"next": {"$ref": "#/$defs/node"}}}},
+            "oneOf": [{"type": "integer"}, {"type": "number", "minimum": 0}],
+            "not": {"const": 3},
+        }
+        self.assertAgrees(schema, [-1, 1, 3, 0.5, -0.5, "x"])
+        self.assertAgrees(
+            {"$ref": "#/$defs/node", "$defs": schema["$defs"]},
+            [{"next": {"next": {}}}, {"next": {"next": 1}}],
+        )
+        self.assertAgrees({"anyOf": [{"type": "string"}], "allOf": [{"minLength": 2}]}, ["ab", "a"])
+
+    def test_formats_are_annotations_by_default(self):
+        schema = {"type": "string", "format": "email"}
+        self.assertTrue(compile_validator(schema)("x"))
+        self.assertFalse(compile_validator(schema, check_formats=True)("x"))
+        self.assertTrue(compile_validator(schema, check_formats=True)("a@b.io"))
+
+    def test_unsupported_keyword(self):
+        with self.assertRaises(UnsupportedSchemaError):
+            compile_validator({"if": {"type": "string"}})
+        with self.assertRaises(UnsupportedSchemaError):
+            compile_validator({"$ref": "other.json#"})
+
+    def test_generated_schema(self):
+        docs = [{"id": 1, "mail": "a@b.io", "tags": ["x"]}, {"id": 2, "tags": [], "n": None}]
+        conv = Converter(pseudo_handler=PseudoArrayHandler())
+        for d in docs:
+            conv.add_json(d)
+        for comparator in (
+            FormatComparator(),
+            RequiredComparator(),
+            NoAdditionalProperties(),
+            DeleteElement(),
+            DeleteElement("isPseudoArray"),
+        ):
+            conv.register(comparator)
+        schema = conv.run()
+        self.assertAgrees(schema, [*docs, {"id": "1", "tags": []}, {"tags": []}, {"id": 1, "z": 1}])
+
+        namespace: dict = {}
+        exec(generate_validator_source(schema, name="check"), namespace)
+        self.assertTrue(all(namespace["check"](d) for d in docs))
@@ -0,0 +1,122 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest import mock
+
+from genschema import Converter, Pipeline, PseudoArrayHandler, SchemaWriter
+from genschema import writer as writer_module
+from genschema.comparators import (
+    DeleteElement,
+    EmptyComparator,
+    FormatComparator,
+    RequiredComparator,
+)
+from genschema.writer import open_output
+
+DOC = {
+    "id": 1,
+    "name": 'Привет "мир"\n',
+    "score": [1.5, None, "x"],
+    "tags": ["a@b.io", "b"],
+    "ids": {"1": {"v": 1}, "2": {"v": "2"}},
+    "empty": {},
+    "list": [],
+    "nested": [[{"deep": True}], []],
+}
+
+
+def _dumps(value: object, indent: object) -> str:
+    if indent is None:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(value, ensure_ascii=False, indent=indent)  # type: ignore[arg-type]
+
+
+class TestSchemaWriter(unittest.TestCase):
+    def test_events_match_json_dumps(self):
+        for indent in (2, 4, None):
+            buf = io.StringIO()
+            w = SchemaWriter(buf, indent)
+            w.begin_object()
+            w.key("a")
+            w.value({"type": ["string", "null"], "minimum": 1.5, "x": {"y": [1, {}]}})
+            w.key("b")
+            w.begin_array()
+            w.value("s")
+            w.begin_object()
+            w.end_object()
+            w.value([])
+            w.end_array()
+            w.key("c")
+            w.begin_object()
+            w.key("ключ")
+            w.value(None)
+            w.end_object()
+            w.end_object()
+            expected = {
+                "a": {"type": ["string", "null"], "minimum": 1.5, "x": {"y": [1, {}]}},
+                "b": ["s", {}, []],
+                "c": {"ключ": None},
+            }
+            self.assertEqual(buf.getvalue(), _dumps(expected, indent))
+
+    def test_scalar_root(self):
+        buf = io.StringIO()
+        w = SchemaWriter(buf)
+        w.value(True)
+        w.flush()
+        self.assertEqual(buf.getvalue(), "true")
+
+
+class TestStreamingOutput(unittest.TestCase):
+    COMPARATORS = (
+        FormatComparator(),
+        RequiredComparator(),
+        EmptyComparator(),
+        DeleteElement(),
+        DeleteElement("isPseudoArray"),
+    )
+
+    def _pipeline(self, **kwargs: Any) -> Pipeline:
+        return Pipeline(self.COMPARATORS, pseudo_handler=PseudoArrayHandler(), **kwargs)
+
+    def test_matches_generate(self):
+        docs = [DOC, {"id": "x", "score": {"a": 1}, "extra": [1, "a", None]}]
+        for kwargs in ({}, {"max_depth": 1}, {"max_schema_nodes": 5}, {"max_variants": 1}):
+            pipeline = self._pipeline(**kwargs)
+            expected = pipeline.generate(docs)
+            for indent in (2, None):
+                buf = io.StringIO()
+                pipeline.write(buf, docs, indent=indent)
+                self.assertEqual(buf.getvalue(), _dumps(expected, indent), (kwargs, indent))
+
+    def test_output_starts_before_generation_ends(self):
+        writes: list[str] = []
+        stream = mock.Mock(write=writes.append)
+        with mock.patch.object(writer_module, "_FLUSH_ITEMS", 4):
+            self._pipeline().write(stream, [DOC])
+        self.assertGreater(len(writes), 2)
+        self.assertEqual(json.loads("".join(writes)), self._pipeline().generate([DOC]))
+
+    def test_converter_write(self):
+        conv = Converter(pseudo_handler=PseudoArrayHandler(), max_depth=1)
+        for c in self.COMPARATORS:
+            conv.register(c)
+        conv.add_json(DOC)
+        buf = io.StringIO()
+        conv.write(buf)
+        streamed = conv.truncations
+        self.assertEqual(json.loads(buf.getvalue()), conv.run())
+        self.assertEqual(streamed, conv.truncations)
+        self.assertTrue(streamed)
+
+    def test_gzip_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schema.json.gz")
+            with open_output(path) as f:
+                self._pipeline().write(f, [DOC], indent=None)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), self._pipeline().generate([DOC]))